@@ -11,6 +11,7 @@ class AuditLogAdmin(admin.ModelAdmin):
     list_filter = ("action", "actor", "detail_code")
     search_fields = ("actor", "action", "entity_uid", "detail_code")
     date_hierarchy = "change_ts"
+    show_full_result_count = False
 
     readonly_fields = (
         "change_ts",
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from apps.audit.partitions import (
+    ensure_partitions,
+    expire_partitions,
+    is_partitioned,
+    partition_settings,
+)
+
+
+class Command(BaseCommand):
+    """Create upcoming monthly `audit_log` partitions and expire old ones.
+
+    Run it at least monthly (e.g. daily from cron). Defaults come from
+    `AUDIT_PARTITIONS`; expired partitions are detached, or dropped with
+    `--drop`. Requires PostgreSQL and migration `audit.0004`.
+
+    Usage:
+      manage.py audit_partitions
+      manage.py audit_partitions --ahead 6 --retention-months 24 --drop
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--ahead", type=int, default=None, help="Future months to create.")
+        parser.add_argument(
+            "--retention-months", type=int, default=None, help="Months to keep (0 = all)."
+        )
+        parser.add_argument("--drop", action="store_true", help="Drop instead of detach.")
+
+    def handle(self, *args, **opts):
+        if not is_partitioned():
+            raise CommandError("audit_log is not partitioned (PostgreSQL with audit.0004 only)")
+        conf = partition_settings()
+        ahead = conf["MONTHS_AHEAD"] if opts["ahead"] is None else opts["ahead"]
+        retention = (
+            conf["RETENTION_MONTHS"]
+            if opts["retention_months"] is None
+            else opts["retention_months"]
+        )
+        action = "drop" if opts["drop"] else conf["EXPIRED_ACTION"]
+        try:
+            now = timezone.now()
+            created = ensure_partitions(now, ahead)
+            expired = expire_partitions(now, retention, action)
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Audit partitions: created={len(created)} expired={len(expired)} ({action})"
+            )
+        )
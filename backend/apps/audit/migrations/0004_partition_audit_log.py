@@ -0,0 +1,81 @@
+from django.db import migrations
+from django.utils import timezone
+
+from apps.audit.partitions import (
+    DEFAULT_PARTITION,
+    TABLE,
+    add_months,
+    create_partition,
+    is_partitioned,
+    month_start,
+    partition_settings,
+)
+
+
+def forwards(apps, schema_editor):
+    """Rebuild `audit_log` as a table range-partitioned by month on `change_ts`.
+
+    Rows are copied into monthly partitions covering the existing data plus
+    `MONTHS_AHEAD` future months; indexes are recreated on the partitioned
+    parent with their original names. The primary key becomes `(id, change_ts)`
+    because it must contain the partition key; `id` keeps its sequence.
+    """
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql" or is_partitioned(conn):
+        return
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+            [TABLE, f"{TABLE}_pkey"],
+        )
+        index_defs = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"SELECT min(change_ts), max(id) FROM {TABLE}")
+        oldest, max_id = cursor.fetchone()
+
+    schema_editor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_legacy")
+    schema_editor.execute(f"CREATE SEQUENCE {TABLE}_pk_seq AS bigint")
+    schema_editor.execute("SELECT setval(%s, %s, false)", [f"{TABLE}_pk_seq", (max_id or 0) + 1])
+    schema_editor.execute(
+        f"CREATE TABLE {TABLE} (LIKE {TABLE}_legacy INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE (change_ts)"
+    )
+    schema_editor.execute(
+        f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_pk_seq')"
+    )
+    schema_editor.execute(f"ALTER SEQUENCE {TABLE}_pk_seq OWNED BY {TABLE}.id")
+    schema_editor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+
+    now = timezone.now()
+    month = month_start(oldest or now)
+    last = add_months(month_start(now), partition_settings()["MONTHS_AHEAD"])
+    while month <= last:
+        create_partition(month, conn)
+        month = add_months(month, 1)
+
+    schema_editor.execute(f"INSERT INTO {TABLE} SELECT * FROM {TABLE}_legacy")
+    schema_editor.execute(f"DROP TABLE {TABLE}_legacy")
+    schema_editor.execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, change_ts)"
+    )
+    for index_def in index_defs:
+        schema_editor.execute(index_def)
+
+
+class Migration(migrations.Migration):
+    """
+    Converts audit_log into a monthly range-partitioned table (PostgreSQL only).
+
+    Later partitions are created and expired by `manage.py audit_partitions`.
+    The Django model keeps `id` as its primary key; it stays unique because
+    it is still drawn from a single sequence. Reversing is a no-op: the
+    partitioned table has the same columns as the plain one.
+    """
+
+    dependencies = [
+        ("audit", "0003_auditlog_change_ts_id_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+from django.db import migrations, models
+
+FORWARD_SQL = r"""
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS audit_log_actor_trgm_idx
+ON public.audit_log USING gin (actor gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS audit_log_action_trgm_idx
+ON public.audit_log USING gin (action gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS audit_log_detail_code_trgm_idx
+ON public.audit_log USING gin (detail_code gin_trgm_ops);
+"""
+
+REVERSE_SQL = r"""
+DROP INDEX IF EXISTS audit_log_actor_trgm_idx;
+DROP INDEX IF EXISTS audit_log_action_trgm_idx;
+DROP INDEX IF EXISTS audit_log_detail_code_trgm_idx;
+"""
+
+
+def forwards(apps, schema_editor):
+    """Create the trigram search indexes only on PostgreSQL."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(FORWARD_SQL)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+    """
+    Indexes for the audit log API.
+
+    - (entity_uid, change_ts, id) and (detail_code, change_ts, id) serve the
+      filtered keyset pages;
+    - GIN trigram indexes on actor, action and detail_code serve the
+      `search` parameter (`ILIKE '%q%'`). Executed only on PostgreSQL.
+
+    On the partitioned table each index is created on every partition.
+    """
+
+    dependencies = [
+        ("audit", "0004_partition_audit_log"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["entity_uid", "change_ts", "id"], name="audit_log_entity_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["detail_code", "change_ts", "id"], name="audit_log_detail_ts_idx"
+            ),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
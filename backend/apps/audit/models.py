@@ -8,11 +8,17 @@ class AuditLog(models.Model):
     Fields:
         change_ts: When the change occurred (application-time).
         actor: Who initiated the change (username, "api", etc.).
-        action: Short action code (OPEN_ENTITY, CLOSE_ENTITY, OPEN_DETAIL, CLOSE_DETAIL).
+        action: Short action code (OPEN_ENTITY, CLOSE_ENTITY, OPEN_DETAIL, CLOSE_DETAIL;
+            SKIP_ENTITY / SKIP_DETAIL for queued changes dropped by coalescing).
         entity_uid: Stable UUID of the logical entity.
         detail_code: Key of the detail if the change was on entity details.
         before: Previous state as JSON.
         after: New state as JSON.
+
+    Indexes:
+        - (change_ts, id): time-window scans and keyset pagination.
+        - (entity_uid, change_ts, id), (detail_code, change_ts, id): filtered pages.
+        - trigram GIN on actor, action, detail_code (PostgreSQL): `search`.
     """
 
     change_ts = models.DateTimeField()
@@ -25,6 +31,11 @@ class AuditLog(models.Model):
 
     class Meta:
         db_table = "audit_log"
+        indexes = [
+            models.Index(fields=["change_ts", "id"], name="audit_log_change_ts_id_idx"),
+            models.Index(fields=["entity_uid", "change_ts", "id"], name="audit_log_entity_ts_idx"),
+            models.Index(fields=["detail_code", "change_ts", "id"], name="audit_log_detail_ts_idx"),
+        ]
 
     def __str__(self) -> str:
         base = f"{self.action}::{self.entity_uid}"
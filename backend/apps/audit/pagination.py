@@ -0,0 +1,87 @@
+"""Keyset pagination for the audit log on `(change_ts, id)`.
+
+Each page is `ORDER BY change_ts, id` (both descending by default) with
+`LIMIT limit + 1`; the extra row only tells whether a next page exists, so
+no `COUNT(*)` is ever issued. The cursor is the key of the last row
+returned, and the next page continues strictly after it with
+`(change_ts, id) < / > (cursor)`, which the `(change_ts, id)` index (or the
+`entity_uid` / `detail_code` composites when filtered) serves without OFFSET.
+"""
+
+from __future__ import annotations
+
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+from apps.common.cursors import (
+    InvalidCursor,
+    cursor_datetime,
+    decode_cursor,
+    encode_cursor,
+    page_size,
+)
+
+
+class AuditLogCursorPagination(BasePagination):
+    """`?limit=` and opaque `?cursor=` paging; `?ordering=change_ts` for oldest first."""
+
+    default_limit = 100
+    max_limit = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        descending = params.get("ordering", "").split(",")[0].strip() != "change_ts"
+        try:
+            limit = page_size(params.get("limit"), self.default_limit, self.max_limit)
+            after = decode_cursor(params.get("cursor"), 2)
+            if after is not None:
+                after = (cursor_datetime(after[0]), int(after[1]))
+        except (InvalidCursor, TypeError, ValueError) as exc:
+            raise ParseError(str(exc)) from exc
+
+        if after is not None:
+            ts, pk = after
+            if descending:
+                queryset = queryset.filter(Q(change_ts__lt=ts) | Q(change_ts=ts, id__lt=pk))
+            else:
+                queryset = queryset.filter(Q(change_ts__gt=ts) | Q(change_ts=ts, id__gt=pk))
+        order = ("-change_ts", "-id") if descending else ("change_ts", "id")
+        rows = list(queryset.order_by(*order)[: limit + 1])
+
+        self.next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            self.next_cursor = encode_cursor(rows[-1].change_ts, rows[-1].id)
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({"results": data, "next": self.next_cursor})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results", "next"],
+            "properties": {
+                "results": schema,
+                "next": {"type": "string", "nullable": True},
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": "limit",
+                "required": False,
+                "in": "query",
+                "schema": {"type": "integer", "maximum": self.max_limit},
+            },
+            {"name": "cursor", "required": False, "in": "query", "schema": {"type": "string"}},
+            {
+                "name": "ordering",
+                "required": False,
+                "in": "query",
+                "schema": {"type": "string", "enum": ["-change_ts", "change_ts"]},
+            },
+        ]
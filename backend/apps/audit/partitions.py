@@ -0,0 +1,151 @@
+"""Monthly range partitions of `audit_log` by `change_ts` (PostgreSQL only).
+
+Partitions are named `audit_log_yYYYYmMM` and cover `[first of month, first
+of next month)` in UTC. Rows outside every monthly partition (e.g. changes
+back-dated past the oldest partition) land in `audit_log_default`; creating
+a partition moves the matching default rows into it first, so the attach
+never fails. A filter on `change_ts` lets the planner prune to the months it
+touches.
+
+`manage.py audit_partitions` keeps `AUDIT_PARTITIONS["MONTHS_AHEAD"]` future
+months created and detaches (or drops) months that ended more than
+`RETENTION_MONTHS` months ago. Detached partitions remain as standalone
+tables for archiving, renamed to `audit_log_yYYYYmMM_detached_<timestamp>` so
+the month can be created again later.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+
+TABLE = "audit_log"
+DEFAULT_PARTITION = f"{TABLE}_default"
+_NAME_RE = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def partition_settings() -> Dict[str, Any]:
+    """Return the effective `AUDIT_PARTITIONS` configuration with defaults applied.
+
+    `RETENTION_MONTHS` of 0 keeps every partition; `EXPIRED_ACTION` is
+    "detach" or "drop".
+    """
+    conf = {"MONTHS_AHEAD": 3, "RETENTION_MONTHS": 0, "EXPIRED_ACTION": "detach"}
+    conf.update(getattr(settings, "AUDIT_PARTITIONS", {}) or {})
+    return conf
+
+
+def month_start(ts: datetime) -> datetime:
+    """First instant (UTC) of the month containing `ts`."""
+    ts = ts.astimezone(dt_timezone.utc)
+    return datetime(ts.year, ts.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month: datetime, n: int) -> datetime:
+    """Shift a month start by `n` months."""
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def parse_partition_name(name: str) -> Optional[datetime]:
+    """Month start encoded in a partition name, or None for other tables."""
+    match = _NAME_RE.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+
+
+def expired_months(months: List[datetime], now: datetime, retention_months: int) -> List[datetime]:
+    """Months that ended before the retention horizon (none when retention is 0)."""
+    if retention_months <= 0:
+        return []
+    horizon = add_months(month_start(now), -retention_months)
+    return sorted(m for m in months if add_months(m, 1) <= horizon)
+
+
+def is_partitioned(conn=connection) -> bool:
+    if conn.vendor != "postgresql":
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def attached_months(conn=connection) -> List[datetime]:
+    """Month starts of the monthly partitions currently attached to `audit_log`."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    return sorted(m for m in map(parse_partition_name, names) if m is not None)
+
+
+def create_partition(month: datetime, conn=connection) -> str:
+    """Create and attach the partition for `month`, moving matching default rows."""
+    name = partition_name(month)
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE change_ts >= %s AND change_ts < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            [lower, upper],
+        )
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+            [lower, upper],
+        )
+    return name
+
+
+def ensure_partitions(
+    now: datetime, months_ahead: int, since: Optional[datetime] = None, conn=connection
+) -> List[str]:
+    """Create missing partitions from `since` (default: this month) to `months_ahead`."""
+    existing = set(attached_months(conn))
+    month = month_start(since or now)
+    last = add_months(month_start(now), months_ahead)
+    created = []
+    while month <= last:
+        if month not in existing:
+            created.append(create_partition(month, conn))
+        month = add_months(month, 1)
+    return created
+
+
+def detached_name(name: str, now: datetime) -> str:
+    """Name a detached partition keeps, freeing `name` for a later `create_partition`."""
+    return f"{name}_detached_{now.astimezone(dt_timezone.utc):%Y%m%d%H%M%S}"
+
+
+def expire_partitions(
+    now: datetime, retention_months: int, action: str = "detach", conn=connection
+) -> List[str]:
+    """Detach (and rename) or drop partitions past retention; returns the original names."""
+    if action not in ("detach", "drop"):
+        raise ValueError("action must be 'detach' or 'drop'")
+    names = [
+        partition_name(m) for m in expired_months(attached_months(conn), now, retention_months)
+    ]
+    with transaction.atomic(using=conn.alias), conn.cursor() as cursor:
+        for name in names:
+            if action == "drop":
+                cursor.execute(f"DROP TABLE {name}")
+            else:
+                cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+                cursor.execute(f"ALTER TABLE {name} RENAME TO {detached_name(name, now)}")
+    return names
@@ -2,24 +2,32 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, viewsets
 
 from .models import AuditLog
+from .pagination import AuditLogCursorPagination
 from .serializers import AuditLogSerializer
 
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     """Read-only browse & filter access to audit trail.
 
-    Secured as admin-only by default.
+    Secured as admin-only by default. Lists are keyset-paginated on
+    `(change_ts, id)` and never counted; `search` matches actor, action and
+    detail_code (trigram-indexed on PostgreSQL).
     """
 
     queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
     permission_classes = [permissions.IsAdminUser]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = AuditLogCursorPagination
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = {
         "entity_uid": ["exact"],
         "detail_code": ["exact"],
         "change_ts": ["gte", "lte"],
     }
-    search_fields = ["actor", "action", "detail_code"]
-    ordering_fields = ["change_ts", "id"]
-    ordering = ["-change_ts", "-id"]
+    # `trgm_icontains` compiles to `col ILIKE %q%` on PostgreSQL, which the
+    # gin_trgm_ops indexes serve (plain `icontains` wraps the column in UPPER()).
+    search_fields = [
+        "actor__trgm_icontains",
+        "action__trgm_icontains",
+        "detail_code__trgm_icontains",
+    ]
@@ -0,0 +1,59 @@
+"""Opaque keyset-pagination cursors.
+
+A cursor is the sort key of the last row on a page, JSON-encoded and
+url-safe base64'd, so clients treat it as an opaque token and the server can
+resume with `WHERE (sort key) > (cursor)` instead of OFFSET.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client-supplied cursor cannot be decoded."""
+
+
+def encode_cursor(*key: Any) -> str:
+    """Encode a sort key (datetimes, ints, strings, UUIDs) as an opaque token."""
+    parts = [v.isoformat() if isinstance(v, datetime) else v for v in key]
+    raw = json.dumps(parts, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str], size: int) -> Optional[List[Any]]:
+    """Decode a token produced by `encode_cursor`; None when no cursor was given."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        parts = json.loads(raw)
+    except (binascii.Error, ValueError) as exc:
+        raise InvalidCursor("invalid cursor") from exc
+    if not isinstance(parts, list) or len(parts) != size:
+        raise InvalidCursor("invalid cursor")
+    return parts
+
+
+def cursor_datetime(value: Any) -> datetime:
+    """Parse the datetime component of a decoded cursor."""
+    dt = parse_datetime(value) if isinstance(value, str) else None
+    if dt is None:
+        raise InvalidCursor("invalid cursor")
+    return dt
+
+
+def page_size(raw: Optional[str], default: int, maximum: int) -> int:
+    """Parse a `limit` query parameter clamped to `[1, maximum]`."""
+    if raw in (None, ""):
+        return default
+    try:
+        return max(1, min(int(raw), maximum))
+    except (TypeError, ValueError) as exc:
+        raise ValueError("invalid limit") from exc
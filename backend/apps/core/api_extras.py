@@ -3,8 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
-from django.db.models import F, Q, Value
-from django.db.models.functions import Coalesce
+from django.db.models import CharField, F, IntegerField, JSONField, Q, QuerySet, Value
 from django.utils.dateparse import parse_date, parse_datetime
 from django.utils.timezone import make_aware, now
 from drf_spectacular.utils import OpenApiParameter, extend_schema
@@ -12,6 +11,14 @@ from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.common.cursors import (
+    InvalidCursor,
+    cursor_datetime,
+    decode_cursor,
+    encode_cursor,
+    page_size,
+)
+
 from .models import Entity, EntityDetail
 
 
@@ -134,6 +141,66 @@ class EntitiesAsOfView(APIView):
         )
 
 
+# (kind, op, model, timestamp column) in output order; the position is the
+# tie-breaker after `at`, matching the old (at, kind, op) sort.
+_DIFF_BRANCHES = (
+    ("detail", "CLOSE", EntityDetail, "valid_to"),
+    ("detail", "OPEN", EntityDetail, "valid_from"),
+    ("entity", "CLOSE", Entity, "valid_to"),
+    ("entity", "OPEN", Entity, "valid_from"),
+)
+
+
+def _diff_branch(rank: int, ts_from, ts_to, after: Optional[list]) -> QuerySet:
+    """One arm of the diff UNION: rows opened in [from, to) or closed in (from, to]."""
+    kind, op, model, column = _DIFF_BRANCHES[rank]
+    if op == "OPEN":
+        qs = model.objects.filter(**{f"{column}__gte": ts_from, f"{column}__lt": ts_to})
+    else:
+        qs = model.objects.filter(**{f"{column}__gt": ts_from, f"{column}__lte": ts_to})
+
+    if after is not None:
+        at, after_rank, after_id = after
+        if rank > after_rank:
+            qs = qs.filter(**{f"{column}__gte": at})
+        elif rank == after_rank:
+            qs = qs.filter(Q(**{f"{column}__gt": at}) | Q(**{column: at, "id__gt": after_id}))
+        else:
+            qs = qs.filter(**{f"{column}__gt": at})
+
+    is_entity = model is Entity
+    null_text = Value(None, output_field=CharField())
+    return qs.values(
+        row_at=F(column),
+        row_rank=Value(rank, output_field=IntegerField()),
+        row_id=F("id"),
+        row_uid=F("entity_uid"),
+        row_code=null_text if is_entity else F("detail_code"),
+        row_name=F("display_name") if is_entity and op == "OPEN" else null_text,
+        row_type=F("entity_type__code") if is_entity and op == "OPEN" else null_text,
+        row_value=(
+            F("value_json")
+            if not is_entity and op == "OPEN"
+            else Value(None, output_field=JSONField())
+        ),
+    )
+
+
+def _diff_change(row: Dict[str, Any]) -> Dict[str, Any]:
+    kind, op, _, _ = _DIFF_BRANCHES[row["row_rank"]]
+    change: Dict[str, Any] = {"kind": kind, "op": op, "entity_uid": str(row["row_uid"])}
+    if kind == "detail":
+        change["detail_code"] = row["row_code"]
+    change["at"] = row["row_at"]
+    if op == "OPEN":
+        change["after"] = (
+            {"display_name": row["row_name"], "entity_type": row["row_type"]}
+            if kind == "entity"
+            else {"value_json": row["row_value"]}
+        )
+    return change
+
+
 class DiffView(APIView):
     """
     Return list of changes (Entity and Detail) between two timestamps.
@@ -141,9 +208,15 @@ class DiffView(APIView):
     Semantics:
       - OPEN events where valid_from is in [from, to)
       - CLOSE events where valid_to is in (from, to] (strict on left to avoid double-count)
+
+    The four event kinds are read with a single `UNION ALL ... ORDER BY at`
+    statement served by the `valid_from` / `valid_to` indexes, one page at a
+    time; `next` is an opaque cursor for the following page (null on the last).
     """
 
     permission_classes = [permissions.IsAuthenticated]
+    default_limit = 500
+    max_limit = 5000
 
     @extend_schema(
         summary="Change diff between two instants",
@@ -154,6 +227,10 @@ class DiffView(APIView):
             OpenApiParameter(
                 "to", str, OpenApiParameter.QUERY, description="ISO date/datetime (exclusive)"
             ),
+            OpenApiParameter("limit", int, OpenApiParameter.QUERY, description="Page size"),
+            OpenApiParameter(
+                "cursor", str, OpenApiParameter.QUERY, description="`next` from previous page"
+            ),
         ],
         responses={200: dict},
         tags=["entities"],
@@ -172,60 +249,34 @@ class DiffView(APIView):
             return Response(
                 {"detail": "'to' must be greater than 'from'."}, status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            limit = page_size(request.query_params.get("limit"), self.default_limit, self.max_limit)
+            after = decode_cursor(request.query_params.get("cursor"), 3)
+            if after is not None:
+                after[0] = cursor_datetime(after[0])
+        except (InvalidCursor, ValueError) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        changes: List[Dict[str, Any]] = []
-
-       
-        for e in Entity.objects.filter(valid_from__gte=ts_from, valid_from__lt=ts_to):
-            changes.append(
-                {
-                    "kind": "entity",
-                    "op": "OPEN",
-                    "entity_uid": str(e.entity_uid),
-                    "at": e.valid_from,
-                    "after": {
-                        "display_name": e.display_name,
-                        "entity_type": e.entity_type.code if e.entity_type_id else None,
-                    },
-                }
-            )
-     
-        for e in Entity.objects.filter(valid_to__gt=ts_from, valid_to__lte=ts_to):
-            changes.append(
-                {
-                    "kind": "entity",
-                    "op": "CLOSE",
-                    "entity_uid": str(e.entity_uid),
-                    "at": e.valid_to,
-                }
-            )
-
-        
-        for d in EntityDetail.objects.filter(valid_from__gte=ts_from, valid_from__lt=ts_to):
-            changes.append(
-                {
-                    "kind": "detail",
-                    "op": "OPEN",
-                    "entity_uid": str(d.entity_uid),
-                    "detail_code": d.detail_code,
-                    "at": d.valid_from,
-                    "after": {"value_json": d.value_json},
-                }
-            )
-   
-        for d in EntityDetail.objects.filter(valid_to__gt=ts_from, valid_to__lte=ts_to):
-            changes.append(
-                {
-                    "kind": "detail",
-                    "op": "CLOSE",
-                    "entity_uid": str(d.entity_uid),
-                    "detail_code": d.detail_code,
-                    "at": d.valid_to,
-                }
-            )
+        first, *rest = [
+            _diff_branch(rank, ts_from, ts_to, after) for rank in range(len(_DIFF_BRANCHES))
+        ]
+        rows = list(
+            first.union(*rest, all=True).order_by("row_at", "row_rank", "row_id")[: limit + 1]
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last["row_at"], last["row_rank"], last["row_id"])
 
-        changes.sort(key=lambda x: (x["at"], x["kind"], x["op"]))
+        changes = [_diff_change(row) for row in rows]
         return Response(
-            {"from": ts_from, "to": ts_to, "count": len(changes), "results": changes},
+            {
+                "from": ts_from,
+                "to": ts_to,
+                "count": len(changes),
+                "results": changes,
+                "next": next_cursor,
+            },
             status=status.HTTP_200_OK,
         )
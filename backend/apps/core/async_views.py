@@ -0,0 +1,174 @@
+"""Async implementations of the entity read endpoints.
+
+Reads are I/O-bound, so under `config.asgi` (uvicorn) they are served as
+native coroutines using Django's async ORM: a request waiting on PostgreSQL
+does not occupy a worker. Writes on the same URLs still go through the
+synchronous DRF views.
+
+The read endpoints allow anonymous access (`IsAuthenticatedOrReadOnly`), so the
+async path skips DRF authentication and content negotiation and renders JSON
+directly with the API's default renderer.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from apps.common.cursors import (
+    InvalidCursor,
+    cursor_datetime,
+    decode_cursor,
+    encode_cursor,
+    page_size,
+)
+from apps.common.renderers import ORJSONRenderer
+from apps.core.etags import aentity_etag, is_not_modified, make_etag
+from apps.core.fieldsets import parse_fieldset, shape
+from apps.core.models import EntityCurrent
+from apps.core.serializers import EntityCurrentSerializer
+from apps.core.services.asof import adetails_at, aentity_at, parse_as_of
+from apps.core.services.history import ahistory_page
+from apps.core.services.snapshot_cache import snapshot_cache
+
+_renderer = ORJSONRenderer()
+
+HISTORY_PAGE_SIZE = 500
+HISTORY_MAX_PAGE_SIZE = 5000
+
+
+def json_response(data: Any, status: int = 200, etag: Optional[str] = None) -> HttpResponse:
+    response = HttpResponse(_renderer.render(data), status=status, content_type="application/json")
+    if etag:
+        response["ETag"] = etag
+    return response
+
+
+def not_modified(etag: str) -> HttpResponse:
+    response = HttpResponse(status=304)
+    response["ETag"] = etag
+    return response
+
+
+async def _aload_snapshot(entity_uid):
+    """Cacheable current-state document for an entity (None if unknown)."""
+    obj = await EntityCurrent.objects.filter(entity_uid=entity_uid).afirst()
+    if obj is None:
+        return None
+    return {
+        "is_current": obj.is_current,
+        "etag": make_etag(obj.version),
+        "snapshot": dict(EntityCurrentSerializer(obj).data),
+    }
+
+
+async def _snapshot(entity_uid):
+    return await snapshot_cache.aget_or_load(entity_uid, lambda: _aload_snapshot(entity_uid))
+
+
+async def entity_retrieve(request, entity_uid) -> HttpResponse:
+    """Current snapshot of one entity (404 if none); honours `fields` / `include`.
+
+    With `as_of` the entity's state at that instant is read from history instead.
+    """
+    try:
+        fieldset = parse_fieldset(request.GET)
+        as_of = parse_as_of(request.GET["as_of"]) if "as_of" in request.GET else None
+    except ValueError as exc:
+        return json_response({"detail": str(exc)}, status=400)
+    if as_of is not None:
+        state = await aentity_at(entity_uid, as_of)
+        if state is None:
+            return json_response({"detail": "not found"}, status=404)
+        return json_response(shape(state, fieldset))
+    doc = await _snapshot(entity_uid)
+    if not doc or not doc["is_current"]:
+        return json_response({"detail": "not found"}, status=404)
+    if is_not_modified(request, doc["etag"]):
+        return not_modified(doc["etag"])
+    return json_response(shape(doc["snapshot"], fieldset), etag=doc["etag"])
+
+
+async def entity_details(request, entity_uid) -> HttpResponse:
+    """Flat `{code: value}` map of the entity's current details (or those at `as_of`)."""
+    if "as_of" in request.GET:
+        try:
+            as_of = parse_as_of(request.GET["as_of"])
+        except ValueError as exc:
+            return json_response({"detail": str(exc)}, status=400)
+        return json_response(await adetails_at(entity_uid, as_of))
+    doc = await _snapshot(entity_uid)
+    if not doc:
+        return json_response({})
+    if is_not_modified(request, doc["etag"]):
+        return not_modified(doc["etag"])
+    return json_response(doc["snapshot"]["details"], etag=doc["etag"])
+
+
+def _history_params(query) -> Dict[str, Any]:
+    """Parse `from`/`to`/`detail_code`/`cursor`/`limit`/`compact` for `entity_history`."""
+    params: Dict[str, Any] = {"detail_code": query.get("detail_code") or None}
+    for name, key in (("from", "start"), ("to", "end")):
+        raw = query.get(name)
+        try:
+            params[key] = parse_as_of(raw) if raw else None
+        except ValueError:
+            raise ValueError(f"invalid {name}") from None
+    params["limit"] = page_size(query.get("limit"), HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE)
+    params["compact"] = query.get("compact", "").lower() in ("1", "true", "yes")
+    cursor = decode_cursor(query.get("cursor"), 3)
+    if cursor is not None:
+        ts, kind, pk = cursor
+        if not isinstance(kind, int) or not isinstance(pk, int):
+            raise InvalidCursor("invalid cursor")
+        params["after"] = (cursor_datetime(ts), kind, pk)
+    return params
+
+
+async def entity_history(request, entity_uid) -> HttpResponse:
+    """Entity and detail versions of one entity, oldest first, one keyset page at a time.
+
+    `from`/`to` bound `valid_from`; `detail_code` keeps only that detail's
+    versions; `compact=1` drops internal columns. `next` resumes the listing.
+    """
+    try:
+        params = _history_params(request.GET)
+    except ValueError as exc:
+        return json_response({"detail": str(exc)}, status=400)
+    etag = await aentity_etag(entity_uid)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    ent, det, next_key = await ahistory_page(entity_uid, **params)
+    if not ent and not det and etag is None:
+        return json_response({"detail": "not found"}, status=404)
+    return json_response(
+        {
+            "entity": ent,
+            "details": det,
+            "next": encode_cursor(*next_key) if next_key else None,
+        },
+        etag=etag,
+    )
+
+
+def async_reads(view_cls, handler: Callable) -> Callable:
+    """URL callback: GET/HEAD via the async `handler`, other methods via `view_cls`.
+
+    Keeps `cls`/`initkwargs` so schema generation still documents `view_cls`.
+    """
+    sync_view = view_cls.as_view()
+    sync_view_async = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            return await handler(request, *args, **kwargs)
+        return await sync_view_async(request, *args, **kwargs)
+
+    view.cls = view_cls
+    view.initkwargs = getattr(sync_view, "initkwargs", {})
+    view.__name__ = view.__qualname__ = view_cls.__name__
+    view.__doc__ = view_cls.__doc__
+    return csrf_exempt(view)
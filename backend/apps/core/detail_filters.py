@@ -0,0 +1,207 @@
+"""Typed filters on EntityDetail JSON values.
+
+Query syntax (entity list)::
+
+    detail[EMAIL]=a@b.com              exact (JSON containment on PostgreSQL)
+    detail[EMAIL__icontains]=@b.com    substring of the text value
+    detail[SCORE__gte]=10              numeric/string comparison
+    detail[ADDR.city]=Berlin           nested key inside value_json
+    detail[ADDR.zip__in]=10115,10117   any of the values
+    detail[ADDR.city__exists]=1        key present
+
+The part before the first dot is the detail code, the rest is a key path into
+`value_json`. Values are parsed as JSON when possible (`10` -> number, `true` ->
+boolean), otherwise taken as plain strings.
+
+`exact`/`ne`/`in` compare the value at the path as a whole: a sub-object or
+an array element equal to the filter value does not match.
+
+On PostgreSQL `exact` and `in` compile to a `@>` containment test, which the
+partial GIN `jsonb_path_ops` index `entity_detail_value_json_path_idx`
+(current rows only) can serve, ANDed with an equality check on the extracted
+value. `ne`, the range operators (`@?` jsonpath), `exists` and
+`contains`/`icontains` (`#>> ... LIKE`) are not index-assisted; they are
+evaluated on the current rows of the requested detail code. Other backends
+use JSON_EXTRACT equivalents; SQLite compares scalars by SQL value (`true`
+also matches `1`) and objects by their stored text, key order included.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from django.db.models import BooleanField, Expression, F
+
+OPS = ("exact", "ne", "contains", "icontains", "gt", "gte", "lt", "lte", "in", "exists")
+
+_PARAM_RE = re.compile(r"^detail\[(?P<key>[^\]]+)\]$")
+_RANGE_SQL = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+@dataclass(frozen=True)
+class DetailPredicate:
+    """One condition on the current value of a detail."""
+
+    detail_code: str
+    path: Tuple[str, ...] = ()
+    op: str = "exact"
+    value: Any = None
+
+
+def parse_value(raw: str) -> Any:
+    """Parse a query-string value as JSON, falling back to the raw string."""
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        return raw
+
+
+def parse_key(key: str, raw: str) -> DetailPredicate:
+    """Parse `CODE.path.to.key__op` plus its raw value into a predicate."""
+    op = "exact"
+    if "__" in key:
+        key, op = key.rsplit("__", 1)
+    if op not in OPS:
+        raise ValueError(f"unsupported operator '{op}' (use one of: {', '.join(OPS)})")
+    code, *path = key.split(".")
+    if not code or any(not p for p in path):
+        raise ValueError(f"invalid detail key '{key}'")
+    if op == "in":
+        value: Any = [parse_value(v) for v in raw.split(",")]
+    elif op in ("contains", "icontains"):
+        value = raw
+    elif op == "exists":
+        value = str(raw).lower() not in ("0", "false", "no")
+    else:
+        value = parse_value(raw)
+    return DetailPredicate(detail_code=code, path=tuple(path), op=op, value=value)
+
+
+def parse_detail_params(query_params) -> List[DetailPredicate]:
+    """Collect all `detail[...]` query parameters; raises ValueError on bad input."""
+    out = []
+    for name in query_params:
+        m = _PARAM_RE.match(name)
+        if m:
+            for raw in query_params.getlist(name):
+                out.append(parse_key(m.group("key"), raw))
+    return out
+
+
+def _nest(path: Tuple[str, ...], value: Any) -> Any:
+    for key in reversed(path):
+        value = {key: value}
+    return value
+
+
+def _jsonpath(path: Tuple[str, ...]) -> str:
+    return "$" + "".join(f".{json.dumps(k)}" for k in path)
+
+
+def _like_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _pg_equals(col: str, params: tuple, path: Tuple[str, ...], value: Any):
+    """`value_json #> path = value`, behind a `@>` test the GIN index can serve."""
+    sql = f"({col} @> %s::jsonb AND {col} #> %s = %s::jsonb)"
+    nested = json.dumps(_nest(path, value))
+    return sql, (*params, nested, *params, list(path), json.dumps(value))
+
+
+class DetailValueMatch(Expression):
+    """Boolean SQL condition `predicate(value_json)` for one DetailPredicate.
+
+    Compiles the `value_json` column through the query compiler, so it stays
+    correct when the EntityDetail table is aliased inside subqueries.
+    """
+
+    output_field = BooleanField()
+
+    def __init__(self, predicate: DetailPredicate, column: Optional[Expression] = None):
+        super().__init__()
+        self.predicate = predicate
+        self.column = column if column is not None else F("value_json")
+
+    def get_source_expressions(self):
+        return [self.column]
+
+    def set_source_expressions(self, exprs):
+        (self.column,) = exprs
+
+    def resolve_expression(
+        self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False
+    ):
+        c = self.copy()
+        c.is_summary = summarize
+        c.column = self.column.resolve_expression(query, allow_joins, reuse, summarize, for_save)
+        return c
+
+    def as_postgresql(self, compiler, connection):
+        col, params = compiler.compile(self.column)
+        p = self.predicate
+        if p.op in ("exact", "ne"):
+            sql, args = _pg_equals(col, params, p.path, p.value)
+            return (f"NOT {sql}" if p.op == "ne" else sql), args
+        if p.op == "in":
+            parts, args = [], []
+            for v in p.value:
+                sql, part_args = _pg_equals(col, params, p.path, v)
+                parts.append(sql)
+                args.extend(part_args)
+            return "(" + " OR ".join(parts or ["FALSE"]) + ")", tuple(args)
+        if p.op == "exists":
+            sql = f"{col} @? %s::jsonpath"
+            params = (*params, _jsonpath(p.path))
+            return (sql if p.value else f"NOT ({sql})"), params
+        if p.op in _RANGE_SQL:
+            expr = f"{_jsonpath(p.path)} ? (@ {_RANGE_SQL[p.op]} {json.dumps(p.value)})"
+            return f"{col} @? %s::jsonpath", (*params, expr)
+        like = "ILIKE" if p.op == "icontains" else "LIKE"
+        return (
+            f"({col} #>> %s) {like} %s",
+            (*params, list(p.path), f"%{_like_escape(p.value)}%"),
+        )
+
+    def as_sql(self, compiler, connection):
+        col, params = compiler.compile(self.column)
+        p = self.predicate
+        path = _jsonpath(p.path)
+        extracted = f"JSON_EXTRACT({col}, %s)"
+        params = (*params, path)
+
+        def scalar(v):
+            return json.dumps(v, separators=(",", ":")) if isinstance(v, (dict, list)) else v
+
+        if p.op == "exact":
+            return f"{extracted} = %s", (*params, scalar(p.value))
+        if p.op == "ne":
+            return f"{extracted} IS NOT %s", (*params, scalar(p.value))
+        if p.op == "in":
+            marks = ", ".join(["%s"] * len(p.value))
+            return f"{extracted} IN ({marks})", (*params, *[scalar(v) for v in p.value])
+        if p.op == "exists":
+            op = "IS NOT NULL" if p.value else "IS NULL"
+            return f"JSON_TYPE({col}, %s) {op}", params
+        if p.op in _RANGE_SQL:
+            return f"{extracted} {_RANGE_SQL[p.op]} %s", (*params, p.value)
+        if p.op == "contains":
+            return f"INSTR(CAST({extracted} AS TEXT), %s) > 0", (*params, p.value)
+        return (
+            f"LOWER(CAST({extracted} AS TEXT)) LIKE LOWER(%s) ESCAPE '\\'",
+            (*params, f"%{_like_escape(p.value)}%"),
+        )
+
+
+def matching_entity_uids(predicate: DetailPredicate):
+    """`entity_uid`s whose current `predicate.detail_code` detail satisfies the predicate."""
+    from apps.core.models import EntityDetail
+
+    return (
+        EntityDetail.objects.filter(detail_code=predicate.detail_code, is_current=True)
+        .filter(DetailValueMatch(predicate))
+        .values("entity_uid")
+    )
@@ -0,0 +1,183 @@
+"""Boolean entity/detail query language compiled to a single SQL statement.
+
+A query is a JSON tree::
+
+    {"and": [
+        {"field": "type", "value": "PERSON"},
+        {"has": "EMAIL"},
+        {"or": [
+            {"detail": "COUNTRY", "value": "DE"},
+            {"detail": "COUNTRY", "value": "AT"}
+        ]},
+        {"not": {"has": "CHURNED"}}
+    ]}
+
+Nodes:
+    - `{"and": [...]}`, `{"or": [...]}`, `{"not": node}`
+    - `{"field": "type" | "display_name", "op": ..., "value": ...}`
+      (ops: exact, ne, in, contains, icontains)
+    - `{"detail": CODE, "path": "a.b", "op": ..., "value": ...}`
+      (ops: see `apps.core.detail_filters.OPS`)
+    - `{"has": CODE}`: the entity has a detail with that code
+
+Detail nodes become correlated `EXISTS` semi-joins on `entity_detail` keyed by
+`(entity_uid, detail_code)`, restricted to current rows or to rows alive at
+`as_of`, so the whole tree is one statement the planner can drive from the
+`(entity_uid, detail_code, valid_from)` and partial current-row indexes.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from django.db.models import Exists, OuterRef, Q, QuerySet
+
+from apps.core.detail_filters import OPS as DETAIL_OPS, DetailPredicate, DetailValueMatch
+from apps.core.fieldsets import FULL, Fieldset, apply_to_current, shape
+from apps.core.models import Entity, EntityCurrent, EntityDetail
+
+FIELD_OPS = ("exact", "ne", "in", "contains", "icontains")
+MAX_NODES = 100
+
+
+class QueryError(ValueError):
+    """Raised for malformed query trees (reported to clients as 400)."""
+
+
+def _alive_q(as_of: Optional[datetime]) -> Q:
+    if as_of is None:
+        return Q(is_current=True)
+    return Q(valid_from__lte=as_of) & (Q(valid_to__isnull=True) | Q(valid_to__gt=as_of))
+
+
+class _Compiler:
+    def __init__(self, as_of: Optional[datetime]):
+        self.as_of = as_of
+        self.fields = {
+            "type": "entity_type_code" if as_of is None else "entity_type__code",
+            "display_name": "display_name",
+        }
+        self.nodes = 0
+
+    def compile(self, node: Any) -> Q:
+        self.nodes += 1
+        if self.nodes > MAX_NODES:
+            raise QueryError(f"query has more than {MAX_NODES} nodes")
+        if not isinstance(node, dict) or not node:
+            raise QueryError("each node must be a non-empty object")
+
+        if "and" in node or "or" in node:
+            key = "and" if "and" in node else "or"
+            children = node[key]
+            if not isinstance(children, list) or not children:
+                raise QueryError(f"'{key}' expects a non-empty list")
+            out = self.compile(children[0])
+            for child in children[1:]:
+                out = (out & self.compile(child)) if key == "and" else (out | self.compile(child))
+            return out
+        if "not" in node:
+            return ~self.compile(node["not"])
+        if "has" in node:
+            return self._detail(
+                DetailPredicate(detail_code=str(node["has"]), op="exists", value=True)
+            )
+        if "detail" in node:
+            op = node.get("op", "exact")
+            if op not in DETAIL_OPS:
+                raise QueryError(f"unsupported detail op '{op}'")
+            path = node.get("path") or ""
+            if "value" not in node and op != "exists":
+                raise QueryError("detail node requires 'value'")
+            value = node.get("value", True)
+            if op == "in" and not isinstance(value, list):
+                raise QueryError("'in' expects a list value")
+            return self._detail(
+                DetailPredicate(
+                    detail_code=str(node["detail"]),
+                    path=tuple(p for p in str(path).split(".") if p),
+                    op=op,
+                    value=value,
+                )
+            )
+        if "field" in node:
+            return self._field(node)
+        raise QueryError(f"unknown node keys: {', '.join(sorted(node))}")
+
+    def _detail(self, predicate: DetailPredicate) -> Q:
+        rows = EntityDetail.objects.filter(
+            _alive_q(self.as_of),
+            entity_uid=OuterRef("entity_uid"),
+            detail_code=predicate.detail_code,
+        )
+        if not (predicate.op == "exists" and not predicate.path and predicate.value):
+            rows = rows.filter(DetailValueMatch(predicate))
+        return Q(Exists(rows))
+
+    def _field(self, node: Dict[str, Any]) -> Q:
+        name, op, value = node["field"], node.get("op", "exact"), node.get("value")
+        if name not in self.fields:
+            raise QueryError(f"unknown field '{name}'")
+        if op not in FIELD_OPS:
+            raise QueryError(f"unsupported field op '{op}'")
+        column = self.fields[name]
+        if op == "ne":
+            return ~Q(**{column: value})
+        if op == "in":
+            if not isinstance(value, list):
+                raise QueryError("'in' expects a list value")
+            return Q(**{f"{column}__in": value})
+        if op == "icontains" and name == "display_name":
+            return Q(display_name__trgm_icontains=value)
+        if op == "exact":
+            return Q(**{column: value})
+        return Q(**{f"{column}__{op}": value})
+
+
+def compile_query(where: Any, as_of: Optional[datetime] = None) -> QuerySet:
+    """Compile a query tree to a queryset of matching entities (not yet evaluated).
+
+    Without `as_of` the base is `entity_current`; with it, Entity versions alive
+    at `as_of`.
+    """
+    q = _Compiler(as_of).compile(where)
+    if as_of is None:
+        return EntityCurrent.objects.filter(is_current=True).filter(q)
+    return Entity.objects.filter(_alive_q(as_of)).filter(q).select_related("entity_type")
+
+
+def run_query(
+    where: Any, as_of: Optional[datetime] = None, limit: int = 200, fieldset: Fieldset = FULL
+) -> List[Any]:
+    """Evaluate a query; returns `EntityCurrent` rows, or as-of dicts when `as_of` is set.
+
+    `fieldset` narrows what is read: details are skipped or limited to its codes.
+    """
+    qs = compile_query(where, as_of)
+    if as_of is None:
+        return list(apply_to_current(qs, fieldset).order_by("display_name")[:limit])
+
+    entities = list(qs.order_by("display_name", "entity_uid")[:limit])
+    details: Dict[Any, Dict[str, Any]] = {}
+    if fieldset.wants_details and entities:
+        rows = EntityDetail.objects.filter(
+            _alive_q(as_of), entity_uid__any=[e.entity_uid for e in entities]
+        )
+        if fieldset.detail_codes is not None:
+            rows = rows.filter(detail_code__in=fieldset.detail_codes)
+        for uid, code, value in rows.values_list("entity_uid", "detail_code", "value_json"):
+            details.setdefault(uid, {})[code] = value
+    return [
+        shape(
+            {
+                "entity_uid": e.entity_uid,
+                "display_name": e.display_name,
+                "entity_type": e.entity_type.code,
+                "valid_from": e.valid_from,
+                "valid_to": e.valid_to,
+                "details": details.get(e.entity_uid, {}),
+            },
+            fieldset,
+        )
+        for e in entities
+    ]
@@ -0,0 +1,50 @@
+"""Entity-level validators for conditional GET (ETag / If-None-Match)."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from django.utils.http import parse_etags, quote_etag
+
+from apps.core.models import EntityCurrent
+
+
+def make_etag(version: int) -> str:
+    """Build a strong ETag from the `entity_current` version counter.
+
+    The counter only ever increases for an entity (rebuilds carry it over), so a
+    validator is never reissued for different content.
+    """
+    return quote_etag(str(version))
+
+
+def entity_etag(entity_uid) -> Optional[str]:
+    """Return the current validator for an entity, or None if it has no document."""
+    version = (
+        EntityCurrent.objects.filter(entity_uid=entity_uid)
+        .values_list("version", flat=True)
+        .first()
+    )
+    return make_etag(version) if version is not None else None
+
+
+async def aentity_etag(entity_uid) -> Optional[str]:
+    """Async variant of `entity_etag`."""
+    version = await (
+        EntityCurrent.objects.filter(entity_uid=entity_uid)
+        .values_list("version", flat=True)
+        .afirst()
+    )
+    return make_etag(version) if version is not None else None
+
+
+def is_not_modified(request, etag: Optional[str]) -> bool:
+    """True if the request's If-None-Match matches `etag` (weak comparison)."""
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not etag or not header:
+        return False
+    tags = parse_etags(header)
+    if "*" in tags:
+        return True
+    bare = etag.removeprefix("W/")
+    return any(t.removeprefix("W/") == bare for t in tags)
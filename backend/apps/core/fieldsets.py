@@ -0,0 +1,101 @@
+"""Sparse fieldsets for entity snapshot responses.
+
+Query syntax::
+
+    ?fields=entity_uid,display_name        only these keys
+    ?include=details                       all details (default without `fields`)
+    ?include=details:EMAIL,PHONE           only these detail codes
+
+Without `details` in the response the detail column/query is skipped; with a
+code list only those keys are read.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from django.db.models import QuerySet
+from django.db.models.fields.json import KeyTransform
+from django.db.models.functions import JSONObject
+
+SNAPSHOT_FIELDS = (
+    "entity_uid",
+    "display_name",
+    "entity_type",
+    "valid_from",
+    "valid_to",
+    "is_current",
+    "details",
+)
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    """Requested response shape; `None` means "everything"."""
+
+    fields: Optional[FrozenSet[str]] = None
+    detail_codes: Optional[Tuple[str, ...]] = None
+
+    @property
+    def wants_details(self) -> bool:
+        return self.fields is None or "details" in self.fields
+
+    @property
+    def is_full(self) -> bool:
+        return self.fields is None and self.detail_codes is None
+
+
+FULL = Fieldset()
+
+
+def parse_fieldset(query_params) -> Fieldset:
+    """Parse `fields` / `include`; raises ValueError on unknown names."""
+    fields: Optional[set] = None
+    raw_fields = query_params.get("fields")
+    if raw_fields:
+        fields = {f.strip() for f in raw_fields.split(",") if f.strip()}
+        unknown = fields - set(SNAPSHOT_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+
+    codes: Optional[Tuple[str, ...]] = None
+    raw_include = query_params.get("include")
+    if raw_include:
+        name, _, rest = raw_include.partition(":")
+        if name != "details":
+            raise ValueError("include supports only 'details[:CODE,...]'")
+        if rest:
+            codes = tuple(dict.fromkeys(c.strip() for c in rest.split(",") if c.strip()))
+        if fields is not None:
+            fields.add("details")
+
+    return Fieldset(frozenset(fields) if fields is not None else None, codes)
+
+
+def apply_to_current(queryset: QuerySet, fieldset: Fieldset) -> QuerySet:
+    """Restrict an `EntityCurrent` queryset to what `fieldset` will render.
+
+    The `details` document is deferred when unused, and narrowed to the selected
+    keys in SQL (`details_subset`) when codes are given.
+    """
+    if fieldset.is_full:
+        return queryset
+    if not fieldset.wants_details:
+        return queryset.defer("details")
+    if fieldset.detail_codes is not None:
+        subset = {code: KeyTransform(code, "details") for code in fieldset.detail_codes}
+        return queryset.defer("details").annotate(details_subset=JSONObject(**subset))
+    return queryset
+
+
+def shape(data: Dict[str, Any], fieldset: Fieldset) -> Dict[str, Any]:
+    """Apply `fieldset` to an already-rendered snapshot dict (e.g. from cache)."""
+    if fieldset.is_full:
+        return data
+    out = {k: v for k, v in data.items() if fieldset.fields is None or k in fieldset.fields}
+    if "details" in out and fieldset.detail_codes is not None:
+        out["details"] = {
+            c: data["details"][c] for c in fieldset.detail_codes if c in data["details"]
+        }
+    return out
@@ -0,0 +1,157 @@
+"""`Idempotency-Key` handling for the SCD2 write endpoints.
+
+A client that retries a write with the same key gets the stored response of
+the first attempt, without another pass through the SCD2 lock-and-compare
+path. The key is reserved (committed) before the write runs, so a concurrent
+duplicate is answered with 409 instead of racing it; the response is stored
+in the write's own transaction. Keys are scoped per user and expire after
+`IDEMPOTENCY["TTL"]` seconds.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.core.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# Client errors that retrying the same request cannot change; other 4xx (409,
+# 423, 429, 404, ...) depend on state that may have moved by the next attempt.
+FINAL_CLIENT_ERRORS = frozenset({400, 422})
+
+IDEMPOTENCY_PARAMETER = OpenApiParameter(
+    HEADER,
+    OpenApiTypes.STR,
+    OpenApiParameter.HEADER,
+    description="Retries with the same key replay the first response",
+)
+
+
+def idempotency_settings() -> Dict[str, Any]:
+    """Return the effective `IDEMPOTENCY` configuration with defaults applied."""
+    conf = {"TTL": 24 * 3600, "LOCK_TIMEOUT": 60}
+    conf.update(getattr(settings, "IDEMPOTENCY", {}) or {})
+    return conf
+
+
+def request_fingerprint(request) -> str:
+    """SHA-256 over method, path, query string and the canonical JSON body."""
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(",", ":"))
+    raw = "\n".join([request.method, request.path, request.META.get("QUERY_STRING", ""), body])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _owner(request) -> str:
+    user = request.user
+    return str(user.pk) if user.is_authenticated else "anonymous"
+
+
+def _reserve(owner: str, key: str, fingerprint: str, conf: Dict[str, Any]):
+    """Claim `key`, or return the existing record that holds it."""
+    now = timezone.now()
+    stale_lock = now - timedelta(seconds=conf["LOCK_TIMEOUT"])
+    with transaction.atomic():
+        existing = IdempotencyKey.objects.select_for_update().filter(owner=owner, key=key).first()
+        if existing is not None:
+            expired = existing.expires_at <= now
+            abandoned = existing.response_status is None and existing.created_at < stale_lock
+            if not (expired or abandoned):
+                return existing, False
+            existing.delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    owner=owner,
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=conf["TTL"]),
+                )
+        except IntegrityError:
+            return IdempotencyKey.objects.filter(owner=owner, key=key).first(), False
+    return record, True
+
+
+def _is_final(status_code: int) -> bool:
+    """Whether a response may be stored and replayed for the key's lifetime."""
+    return 200 <= status_code < 300 or status_code in FINAL_CLIENT_ERRORS
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    response = Response(record.response_body, status=record.response_status)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(method):
+    """Decorate an `APIView` write method to honour the `Idempotency-Key` header.
+
+    - same key, same request, completed: the stored response is replayed;
+    - same key, same request, still running: 409;
+    - same key, different request: 422.
+
+    Only 2xx responses and 400/422 are stored. Raised errors (including
+    validation errors), 5xx and state-dependent 4xx such as a 409 batch
+    conflict release the key, so a retry with it runs the write again.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({"detail": f"{HEADER} is too long"}, status=400)
+
+        fingerprint = request_fingerprint(request)
+        record, claimed = _reserve(_owner(request), key, fingerprint, idempotency_settings())
+        if record is None:
+            return Response({"detail": f"{HEADER} is being processed"}, status=409)
+        if not claimed:
+            if record.fingerprint != fingerprint:
+                return Response(
+                    {"detail": f"{HEADER} was already used for a different request"},
+                    status=422,
+                )
+            if record.response_status is None:
+                return Response({"detail": f"{HEADER} is being processed"}, status=409)
+            return _replay(record)
+
+        try:
+            with transaction.atomic():
+                response = method(self, request, *args, **kwargs)
+                if _is_final(response.status_code):
+                    record.response_status = response.status_code
+                    # Same encoding as the renderer, so a replay is byte-identical.
+                    record.response_body = json.loads(json.dumps(response.data, cls=JSONEncoder))
+                    record.save(update_fields=["response_status", "response_body"])
+        except Exception:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            raise
+        if not _is_final(response.status_code):
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+        return response
+
+    return wrapper
+
+
+def purge_expired() -> int:
+    """Delete expired keys; returns how many were removed."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
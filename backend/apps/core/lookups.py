@@ -0,0 +1,58 @@
+"""Custom lookups: pg_trgm operators and array membership (with portable fallbacks)."""
+
+from __future__ import annotations
+
+from django.db.models import CharField, Lookup, UUIDField
+from django.db.models.lookups import IContains, In
+
+
+@CharField.register_lookup
+class TrigramIContains(IContains):
+    """`icontains` that a `gin_trgm_ops` index can serve on PostgreSQL.
+
+    Django compiles `icontains` to `UPPER(col::text) LIKE UPPER(%s)`, which a
+    trigram index on `col` cannot answer; `col ILIKE %s` can. Other backends use
+    the regular `icontains` SQL.
+    """
+
+    lookup_name = "trgm_icontains"
+
+    def as_sql(self, compiler, connection):
+        return IContains(self.lhs, self.rhs).as_sql(compiler, connection)
+
+    def as_postgresql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs_sql} ILIKE {rhs_sql}", (*lhs_params, *rhs_params)
+
+
+@CharField.register_lookup
+class TrigramSimilar(Lookup):
+    """pg_trgm `%` operator (similarity above `pg_trgm.similarity_threshold`).
+
+    PostgreSQL only; callers provide their own fallback elsewhere.
+    """
+
+    lookup_name = "trgm_similar"
+
+    def as_sql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs_sql} %% {rhs_sql}", (*lhs_params, *rhs_params)
+
+
+@UUIDField.register_lookup
+class UUIDAny(In):
+    """`col = ANY(%s::uuid[])` on PostgreSQL, `IN (...)` elsewhere.
+
+    The whole list travels as one array parameter, so the statement text (and its
+    cached plan) does not grow with the number of ids.
+    """
+
+    lookup_name = "any"
+
+    def as_postgresql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        field = self.lhs.output_field
+        values = [field.get_db_prep_value(v, connection) for v in self.rhs]
+        return f"{lhs_sql} = ANY(%s::uuid[])", (*lhs_params, values)
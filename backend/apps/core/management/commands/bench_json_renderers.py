@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import io
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.common.renderers import ORJSONParser, ORJSONRenderer, orjson
+
+
+def snapshot_payload(entities: int, details: int):
+    """Synthetic as-of payload shaped like `EntitiesAsOf` responses."""
+    now = timezone.now()
+    return [
+        {
+            "entity_uid": uuid.uuid4(),
+            "display_name": f"Entity {i}",
+            "entity_type": "PERSON",
+            "valid_from": now - timedelta(days=i % 400, seconds=i),
+            "valid_to": None,
+            "details": {
+                f"CODE_{j}": {"value": f"value-{i}-{j}", "score": Decimal("12.50"), "rank": j}
+                for j in range(details)
+            },
+        }
+        for i in range(entities)
+    ]
+
+
+class Command(BaseCommand):
+    """Compare the stdlib DRF JSON renderer/parser with the orjson ones.
+
+    Usage:
+      manage.py bench_json_renderers --entities 5000 --details 8 --repeat 5
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--entities", type=int, default=5000)
+        parser.add_argument("--details", type=int, default=8)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def _best(self, fn, repeat: int) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    def handle(self, *args, **opts):
+        data = snapshot_payload(opts["entities"], opts["details"])
+        repeat = opts["repeat"]
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; both rows use stdlib"))
+
+        rows = []
+        for label, renderer, parser in (
+            ("stdlib", JSONRenderer(), JSONParser()),
+            ("orjson", ORJSONRenderer(), ORJSONParser()),
+        ):
+            body = renderer.render(data)
+            render_s = self._best(lambda r=renderer: r.render(data), repeat)
+            parse_s = self._best(lambda p=parser, b=body: p.parse(io.BytesIO(b)), repeat)
+            rows.append((label, len(body), render_s, parse_s))
+
+        base = rows[0]
+        for label, size, render_s, parse_s in rows:
+            self.stdout.write(
+                f"{label:7} bytes={size:>10} render={render_s * 1000:8.1f}ms "
+                f"({base[2] / render_s:4.1f}x) parse={parse_s * 1000:8.1f}ms "
+                f"({base[3] / parse_s:4.1f}x)"
+            )
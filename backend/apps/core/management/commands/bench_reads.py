@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from typing import List, Tuple
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from apps.core.models import EntityCurrent
+
+
+async def _get(host: str, port: int, path: str) -> Tuple[int, float]:
+    """One HTTP/1.1 GET on a fresh connection; returns (status, seconds)."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\n"
+            "Connection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    status = int(status_line.split()[1]) if status_line else 0
+    return status, time.perf_counter() - start
+
+
+async def _run(base_url: str, paths: List[str], total: int, concurrency: int):
+    url = urlsplit(base_url)
+    host, port = url.hostname or "localhost", url.port or 80
+    prefix = url.path.rstrip("/")
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            try:
+                status, elapsed = await _get(host, port, prefix + paths[i % len(paths)])
+            except OSError:
+                errors += 1
+                continue
+            if status >= 400:
+                errors += 1
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    """Load-test the entity read endpoints against a running server.
+
+    Requests cycle over snapshot, details and history URLs of existing entities,
+    so the same run can be pointed at a WSGI and an ASGI deployment.
+
+    Usage:
+      manage.py bench_reads --base-url http://localhost:8000/api --requests 5000 --concurrency 200
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--base-url", default="http://localhost:8000/api")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--entities", type=int, default=200)
+
+    def handle(self, *args, **opts):
+        uids = list(
+            EntityCurrent.objects.filter(is_current=True).values_list("entity_uid", flat=True)[
+                : opts["entities"]
+            ]
+        )
+        if not uids:
+            raise CommandError("no current entities to read; seed some data first")
+        paths = []
+        for uid in uids:
+            paths += [f"/entities/{uid}", f"/entities/{uid}/details", f"/entities/{uid}/history"]
+
+        latencies, errors, wall = asyncio.run(
+            _run(opts["base_url"], paths, opts["requests"], opts["concurrency"])
+        )
+        if not latencies:
+            raise CommandError("no successful requests; is the server running?")
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"requests={len(latencies)} errors={errors} concurrency={opts['concurrency']} "
+            f"rps={len(latencies) / wall:.1f} p50={statistics.median(latencies) * 1000:.1f}ms "
+            f"p95={p95 * 1000:.1f}ms"
+        )
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.models import AsOfSnapshot, Entity
+from apps.core.services.asof import (
+    boundaries,
+    build_snapshot,
+    prune_snapshots,
+    purge_stale_snapshots,
+    snapshot_settings,
+)
+
+
+class Command(BaseCommand):
+    """Build missing as-of snapshots at configured boundaries and prune expired ones.
+
+    Snapshots marked stale by back-dated changes are deleted first and rebuilt.
+    Boundaries are aligned to 00:00 UTC every `ASOF_SNAPSHOTS["INTERVAL_HOURS"]`.
+    Each snapshot is rolled forward from the previous one, so a scheduled run only
+    processes the changes made since the last boundary.
+
+    Usage:
+      manage.py build_asof_snapshots
+      manage.py build_asof_snapshots --since 2025-01-01T00:00:00Z --no-prune
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--since", default=None, help="ISO-8601 start (default: last snapshot)."
+        )
+        parser.add_argument("--until", default=None, help="ISO-8601 end (default: now).")
+        parser.add_argument("--no-prune", action="store_true", help="Keep expired snapshots.")
+
+    def _parse(self, raw):
+        if raw is None:
+            return None
+        dt = parse_datetime(raw)
+        if dt is None:
+            raise CommandError(f"Invalid datetime: {raw!r}")
+        return dt if not timezone.is_naive(dt) else timezone.make_aware(dt)
+
+    def handle(self, *args, **opts):
+        conf = snapshot_settings()
+        interval = timedelta(hours=conf["INTERVAL_HOURS"])
+        now = timezone.now()
+        until = self._parse(opts["until"]) or now
+        earliest = now - timedelta(days=conf["RETENTION_DAYS"])
+
+        purged = purge_stale_snapshots(conf["BATCH_SIZE"])
+        since = self._parse(opts["since"])
+        if since is None:
+            last = AsOfSnapshot.objects.order_by("-as_of").first()
+            since = (
+                last.as_of if last else Entity.objects.aggregate(m=Min("valid_from"))["m"] or until
+            )
+        since = max(since, earliest)
+
+        built = 0
+        for as_of in boundaries(since, until, interval):
+            if not AsOfSnapshot.objects.filter(as_of=as_of).exists():
+                build_snapshot(as_of, batch_size=conf["BATCH_SIZE"])
+                built += 1
+
+        pruned = 0 if opts["no_prune"] else prune_snapshots(now, conf["RETENTION_DAYS"])
+        self.stdout.write(
+            self.style.SUCCESS(f"As-of snapshots: built={built} pruned={pruned} stale={purged}")
+        )
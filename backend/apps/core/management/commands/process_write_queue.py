@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from apps.core.services.write_queue import drain, purge_processed, queue_settings
+
+
+class Command(BaseCommand):
+    """Apply writes queued with `Prefer: respond-async`.
+
+    Several workers may run side by side: rows are claimed with
+    `SELECT ... FOR UPDATE SKIP LOCKED` and each entity's writes are applied in
+    the order they were accepted. Processed rows older than
+    `WRITE_QUEUE["RETENTION_DAYS"]` are purged after every pass.
+
+    Usage:
+      manage.py process_write_queue
+      manage.py process_write_queue --once --batch-size 500
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows per transaction.")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit.")
+
+    def handle(self, *args, **opts):
+        conf = queue_settings()
+        batch_size = opts["batch_size"] or conf["BATCH_SIZE"]
+        while True:
+            processed = drain(batch_size)
+            purged = purge_processed()
+            if opts["once"]:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Write queue: processed={processed} purged={purged}")
+                )
+                return
+            if not processed:
+                time.sleep(conf["POLL_INTERVAL"])
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from apps.core.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    """Delete expired `Idempotency-Key` records (run periodically, e.g. hourly).
+
+    Usage:
+      manage.py purge_idempotency_keys
+    """
+
+    help = __doc__
+
+    def handle(self, *args, **opts):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Purged idempotency keys: deleted={deleted}"))
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from apps.core.services.current import rebuild_entity_current
+
+
+class Command(BaseCommand):
+    """Resynchronize the denormalized `entity_current` table from the SCD2 tables.
+
+    Usage:
+      manage.py rebuild_entity_current
+      manage.py rebuild_entity_current --batch-size 5000
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=1000, help="Entities per batch.")
+
+    def handle(self, *args, **opts):
+        with transaction.atomic():
+            written = rebuild_entity_current(batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt entity_current: documents={written}"))
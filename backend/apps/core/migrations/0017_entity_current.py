@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    """Populate entity_current from the current SCD2 rows."""
+    Entity = apps.get_model("core", "Entity")
+    EntityDetail = apps.get_model("core", "EntityDetail")
+    EntityCurrent = apps.get_model("core", "EntityCurrent")
+
+    docs = {}
+    for e in Entity.objects.filter(is_current=True).select_related("entity_type"):
+        docs[e.entity_uid] = EntityCurrent(
+            entity_uid=e.entity_uid,
+            display_name=e.display_name,
+            entity_type_code=e.entity_type.code,
+            valid_from=e.valid_from,
+            is_current=True,
+            details={},
+        )
+    for uid, code, value in EntityDetail.objects.filter(is_current=True).values_list(
+        "entity_uid", "detail_code", "value_json"
+    ):
+        doc = docs.setdefault(uid, EntityCurrent(entity_uid=uid, is_current=False, details={}))
+        doc.details[code] = value
+    EntityCurrent.objects.bulk_create(docs.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_safe_constraints_postgres"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EntityCurrent",
+            fields=[
+                ("entity_uid", models.UUIDField(primary_key=True, serialize=False)),
+                ("display_name", models.CharField(blank=True, default="", max_length=500)),
+                ("entity_type_code", models.CharField(blank=True, default="", max_length=50)),
+                ("valid_from", models.DateTimeField(blank=True, null=True)),
+                ("is_current", models.BooleanField(default=False)),
+                ("details", models.JSONField(default=dict)),
+                ("version", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={"db_table": "entity_current"},
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_entity_current"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="entity",
+            index=models.Index(fields=["valid_from"], name="entity_valid_from_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="entitydetail",
+            index=models.Index(fields=["valid_from"], name="entity_detail_valid_from_idx"),
+        ),
+        migrations.CreateModel(
+            name="AsOfSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("as_of", models.DateTimeField(unique=True)),
+                ("entity_count", models.PositiveIntegerField(default=0)),
+                ("stale", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={"db_table": "asof_snapshot"},
+        ),
+        migrations.CreateModel(
+            name="AsOfSnapshotItem",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("entity", "Entity"), ("detail", "Entity detail")],
+                        max_length=10,
+                    ),
+                ),
+                ("version_id", models.BigIntegerField()),
+                (
+                    "snapshot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="items",
+                        to="core.asofsnapshot",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "asof_snapshot_item",
+                "indexes": [
+                    models.Index(fields=["snapshot", "kind"], name="asof_snapshot_item_kind_idx")
+                ],
+            },
+        ),
+    ]
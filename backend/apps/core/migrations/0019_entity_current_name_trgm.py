@@ -0,0 +1,43 @@
+from django.db import migrations
+
+FORWARD_SQL = r"""
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS entity_current_name_trgm_idx
+ON public.entity_current USING gin (display_name gin_trgm_ops)
+WHERE is_current;
+"""
+
+REVERSE_SQL = r"""
+DROP INDEX IF EXISTS entity_current_name_trgm_idx;
+"""
+
+
+def forwards(apps, schema_editor):
+    """Create the trigram index only on PostgreSQL."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(FORWARD_SQL)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+    """
+    Partial GIN trigram index on current display names (entity_current).
+
+    Serves `ILIKE '%q%'` (entity list `q`) and the pg_trgm `%` operator used by
+    fuzzy search. Executed only on PostgreSQL.
+    """
+
+    dependencies = [
+        ("core", "0018_asof_snapshots"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
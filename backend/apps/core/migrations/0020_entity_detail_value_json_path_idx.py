@@ -0,0 +1,42 @@
+from django.db import migrations
+
+FORWARD_SQL = r"""
+CREATE INDEX IF NOT EXISTS entity_detail_value_json_path_idx
+ON public.entity_detail USING gin (value_json jsonb_path_ops)
+WHERE is_current;
+"""
+
+REVERSE_SQL = r"""
+DROP INDEX IF EXISTS entity_detail_value_json_path_idx;
+"""
+
+
+def forwards(apps, schema_editor):
+    """Create the JSONB index only on PostgreSQL."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(FORWARD_SQL)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+    """
+    Partial GIN `jsonb_path_ops` index on current EntityDetail values.
+
+    Serves the `@>` containment test that `apps.core.detail_filters` compiles
+    for `exact` / `in`; restricting it to `is_current` rows keeps it
+    proportional to live data rather than history. Executed only on PostgreSQL.
+    """
+
+    dependencies = [
+        ("core", "0019_entity_current_name_trgm"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
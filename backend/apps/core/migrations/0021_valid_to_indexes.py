@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0020_entity_detail_value_json_path_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="entity",
+            index=models.Index(
+                condition=models.Q(("valid_to__isnull", False)),
+                fields=["valid_to"],
+                name="entity_valid_to_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="entitydetail",
+            index=models.Index(
+                condition=models.Q(("valid_to__isnull", False)),
+                fields=["valid_to"],
+                name="entity_detail_valid_to_idx",
+            ),
+        ),
+    ]
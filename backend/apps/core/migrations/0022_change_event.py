@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0021_valid_to_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeEvent",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("seq", models.BigIntegerField(blank=True, null=True, unique=True)),
+                ("change_ts", models.DateTimeField()),
+                ("action", models.CharField(max_length=10)),
+                ("entity_uid", models.UUIDField()),
+                (
+                    "entity_type_code",
+                    models.CharField(blank=True, default="", max_length=50),
+                ),
+                ("detail_code", models.CharField(blank=True, max_length=100, null=True)),
+                ("recorded_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "change_event",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("seq__isnull", True)),
+                        fields=["id"],
+                        name="change_event_unsequenced_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:36
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0023_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueuedWrite",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("ticket", models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ("entity_uid", models.UUIDField()),
+                ("payload", models.JSONField()),
+                ("actor", models.CharField(default="api", max_length=200)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("applied", "Applied"),
+                            ("failed", "Failed"),
+                            ("skipped", "Skipped"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("result", models.JSONField(blank=True, null=True)),
+                ("error", models.TextField(blank=True, default="")),
+                ("enqueued_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                ("not_before", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "write_queue",
+                "indexes": [
+                    models.Index(fields=["status", "id"], name="write_queue_status_id_idx"),
+                    models.Index(fields=["entity_uid", "id"], name="write_queue_entity_id_idx"),
+                    models.Index(fields=["processed_at"], name="write_queue_processed_idx"),
+                ],
+            },
+        ),
+    ]
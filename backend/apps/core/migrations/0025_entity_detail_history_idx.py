@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0024_write_queue"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="entitydetail",
+            index=models.Index(
+                fields=["entity_uid", "valid_from", "id"],
+                name="entity_detail_history_idx",
+            ),
+        ),
+    ]
@@ -41,6 +41,8 @@ class Entity(models.Model):
     Indexes:
         - (entity_uid, valid_from): efficient version lookups.
         - (entity_type, is_current): efficient filtering by type for current rows.
+        - (valid_from): versions opened within a time window (as-of roll-forward).
+        - (valid_to) WHERE valid_to IS NOT NULL: versions closed within a window.
     """
 
     id = models.BigAutoField(primary_key=True)
@@ -49,7 +51,7 @@ class Entity(models.Model):
     valid_from = models.DateTimeField()
     valid_to = models.DateTimeField(null=True, blank=True)
     is_current = models.BooleanField(default=True)
-    hashdiff = models.CharField(max_length=64)  
+    hashdiff = models.CharField(max_length=64)
     entity_type = models.ForeignKey(EntityType, on_delete=models.PROTECT)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -59,6 +61,12 @@ class Entity(models.Model):
         indexes = [
             models.Index(fields=["entity_uid", "valid_from"], name="entity_entity__d227b0_idx"),
             models.Index(fields=["entity_type", "is_current"], name="entity_entity__df9f7a_idx"),
+            models.Index(fields=["valid_from"], name="entity_valid_from_idx"),
+            models.Index(
+                fields=["valid_to"],
+                name="entity_valid_to_idx",
+                condition=models.Q(valid_to__isnull=False),
+            ),
         ]
 
     def __str__(self) -> str:
@@ -75,6 +83,9 @@ class EntityDetail(models.Model):
         valid_from/valid_to/is_current/hashdiff: Same SCD2 semantics as `Entity`.
     Indexes:
         - (entity_uid, detail_code, valid_from): version scans per attribute.
+        - (entity_uid, valid_from, id): an entity's detail history in time order.
+        - (valid_from): versions opened within a time window (as-of roll-forward).
+        - (valid_to) WHERE valid_to IS NOT NULL: versions closed within a window.
     """
 
     id = models.BigAutoField(primary_key=True)
@@ -95,7 +106,249 @@ class EntityDetail(models.Model):
                 fields=["entity_uid", "detail_code", "valid_from"],
                 name="entity_deta_entity__b35e2e_idx",
             ),
+            models.Index(
+                fields=["entity_uid", "valid_from", "id"],
+                name="entity_detail_history_idx",
+            ),
+            models.Index(fields=["valid_from"], name="entity_detail_valid_from_idx"),
+            models.Index(
+                fields=["valid_to"],
+                name="entity_detail_valid_to_idx",
+                condition=models.Q(valid_to__isnull=False),
+            ),
         ]
 
     def __str__(self) -> str:
         return f"{self.entity_uid}::{self.detail_code}"
+
+
+class EntityCurrent(models.Model):
+    """Denormalized current-state document (one row per logical entity).
+
+    Maintained by the SCD2 service in the same transaction as every transition,
+    so current-state reads are a single primary-key lookup instead of a join of
+    `Entity` with all open `EntityDetail` rows. `rebuild_entity_current`
+    resynchronizes the table from the SCD2 tables.
+
+    Attributes:
+        entity_uid: Logical entity UUID (primary key).
+        display_name: Display name of the open Entity version.
+        entity_type_code: `EntityType.code` of the open Entity version.
+        valid_from: Start of the open Entity version.
+        is_current: Whether an open Entity version exists (False once closed).
+        details: Map `{detail_code: value_json}` of all open EntityDetail versions.
+        version: Per-entity counter bumped by every SCD2 transition (ETag validator).
+        updated_at: Last time the document was rewritten.
+    """
+
+    entity_uid = models.UUIDField(primary_key=True)
+    display_name = models.CharField(max_length=500, blank=True, default="")
+    entity_type_code = models.CharField(max_length=50, blank=True, default="")
+    valid_from = models.DateTimeField(null=True, blank=True)
+    is_current = models.BooleanField(default=False)
+    details = models.JSONField(default=dict)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "entity_current"
+
+    def __str__(self) -> str:
+        return f"{self.display_name} ({self.entity_uid})"
+
+
+class AsOfSnapshot(models.Model):
+    """Materialized as-of state at a configured boundary (e.g. daily 00:00 UTC).
+
+    The state is stored as the set of Entity/EntityDetail version ids alive at
+    `as_of`, so an arbitrary later instant can be answered by rolling forward
+    only the versions opened or closed since the snapshot.
+
+    Attributes:
+        as_of: Boundary instant the snapshot represents.
+        entity_count: Number of entity versions alive at `as_of`.
+        stale: Set when a back-dated change invalidated the snapshot; stale
+            snapshots are ignored by readers and rebuilt by `build_asof_snapshots`.
+        created_at: When the snapshot was built.
+    """
+
+    as_of = models.DateTimeField(unique=True)
+    entity_count = models.PositiveIntegerField(default=0)
+    stale = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "asof_snapshot"
+
+    def __str__(self) -> str:
+        return f"snapshot@{self.as_of.isoformat()}"
+
+
+class AsOfSnapshotItem(models.Model):
+    """A single Entity or EntityDetail version alive at the snapshot instant.
+
+    Attributes:
+        snapshot: Owning `AsOfSnapshot`.
+        kind: "entity" or "detail" (which SCD2 table `version_id` refers to).
+        version_id: Primary key of the alive version row.
+    """
+
+    KIND_ENTITY = "entity"
+    KIND_DETAIL = "detail"
+    KIND_CHOICES = [(KIND_ENTITY, "Entity"), (KIND_DETAIL, "Entity detail")]
+
+    id = models.BigAutoField(primary_key=True)
+    snapshot = models.ForeignKey(AsOfSnapshot, on_delete=models.CASCADE, related_name="items")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    version_id = models.BigIntegerField()
+
+    class Meta:
+        db_table = "asof_snapshot_item"
+        indexes = [
+            models.Index(fields=["snapshot", "kind"], name="asof_snapshot_item_kind_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind}#{self.version_id}"
+
+
+class ChangeEvent(models.Model):
+    """One SCD2 transition in commit order (the change feed).
+
+    Rows are inserted by the SCD2 transaction without a `seq`. After it
+    commits, `assign_sequence` stamps them in a short transaction of its own
+    under a database-wide lock, so sequence order is commit order and a
+    consumer that resumes from its last `seq` never skips an event that
+    became visible later with a lower one.
+
+    Attributes:
+        id: Insertion order (primary key).
+        seq: Feed position; NULL until assigned after commit. Gaps are allowed.
+        change_ts: Business time of the transition.
+        action: "created", "updated" or "closed".
+        entity_uid: Affected logical entity.
+        entity_type_code: Type code of the entity at the time of the change.
+        detail_code: Affected detail code; NULL for entity-level transitions.
+        recorded_at: When the event was written.
+    """
+
+    ACTION_CREATED = "created"
+    ACTION_UPDATED = "updated"
+    ACTION_CLOSED = "closed"
+
+    id = models.BigAutoField(primary_key=True)
+    seq = models.BigIntegerField(null=True, blank=True, unique=True)
+    change_ts = models.DateTimeField()
+    action = models.CharField(max_length=10)
+    entity_uid = models.UUIDField()
+    entity_type_code = models.CharField(max_length=50, blank=True, default="")
+    detail_code = models.CharField(max_length=100, null=True, blank=True)
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "change_event"
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="change_event_unsequenced_idx",
+                condition=models.Q(seq__isnull=True),
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.seq} {self.action} {self.entity_uid}"
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a write request sent with an `Idempotency-Key` header.
+
+    A row is inserted (without a response) before the write runs, so concurrent
+    duplicates see it, and completed in the write's transaction. Repeats with
+    the same key replay `response_status`/`response_body`; a different
+    `fingerprint` under the same key is rejected.
+
+    Attributes:
+        owner: Authenticated user id (or "anonymous") the key is scoped to.
+        key: Client-supplied key.
+        fingerprint: SHA-256 of method, path, query string and body.
+        response_status: HTTP status of the stored response; NULL while in flight.
+        response_body: Stored response payload.
+        created_at: When the key was first seen.
+        expires_at: After this the key may be reused.
+    """
+
+    owner = models.CharField(max_length=64)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "idempotency_key"
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "key"], name="idempotency_key_owner_key_uniq"),
+        ]
+        indexes = [models.Index(fields=["expires_at"], name="idempotency_key_expires_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.owner}:{self.key}"
+
+
+class QueuedWrite(models.Model):
+    """A validated entity change set waiting to be applied by the write worker.
+
+    Rows are appended by the write endpoints in async mode and drained in `id`
+    order by `manage.py process_write_queue`; per `entity_uid` they are applied
+    strictly in the order they were accepted. `ticket` is handed to the client
+    to poll the outcome.
+
+    Attributes:
+        ticket: Public identifier returned with the 202 response.
+        entity_uid: Target logical entity.
+        payload: Serialized change set (entity and detail changes).
+        actor: Who submitted the change (recorded in the audit log).
+        status: "pending", "applied", "failed", or "skipped" when every change
+            was superseded by a later write within its coalescing window.
+        result: Per-change outcome once applied.
+        error: Failure reason when `status` is "failed".
+        enqueued_at: When the write was accepted.
+        not_before: Earliest claim time; set for coalescable writes so later
+            updates to the same key can still be merged.
+        processed_at: When the worker applied or rejected it.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_APPLIED = "applied"
+    STATUS_FAILED = "failed"
+    STATUS_SKIPPED = "skipped"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_APPLIED, "Applied"),
+        (STATUS_FAILED, "Failed"),
+        (STATUS_SKIPPED, "Skipped"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    ticket = models.UUIDField(default=uuidlib.uuid4, unique=True, editable=False)
+    entity_uid = models.UUIDField()
+    payload = models.JSONField()
+    actor = models.CharField(max_length=200, default="api")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    enqueued_at = models.DateTimeField(auto_now_add=True)
+    not_before = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "write_queue"
+        indexes = [
+            models.Index(fields=["status", "id"], name="write_queue_status_id_idx"),
+            models.Index(fields=["entity_uid", "id"], name="write_queue_entity_id_idx"),
+            models.Index(fields=["processed_at"], name="write_queue_processed_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.ticket} {self.status}"
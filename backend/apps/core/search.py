@@ -0,0 +1,76 @@
+"""Display-name search for the entity list.
+
+Two modes:
+    - "contains": substring match; on PostgreSQL compiled to `ILIKE` so the
+      `entity_current_name_trgm_idx` GIN index serves it.
+    - "fuzzy": pg_trgm similarity above a threshold, ranked best-first. On other
+      backends (SQLite in tests/dev) the same trigram similarity is computed in
+      Python over the filtered rows.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List, Set
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet
+
+MODES = ("contains", "fuzzy")
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def default_threshold() -> float:
+    return float(getattr(settings, "ENTITY_SEARCH_MIN_SIMILARITY", 0.3))
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigram set as built by pg_trgm (lower-cased words padded with blanks)."""
+    out: Set[str] = set()
+    for word in _WORD_RE.findall((text or "").lower()):
+        padded = f"  {word} "
+        out.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return out
+
+
+def similarity(a: str, b: str) -> float:
+    """Python equivalent of pg_trgm `similarity(a, b)`."""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def filter_contains(queryset: QuerySet, q: str) -> QuerySet:
+    """Case-insensitive substring filter on `display_name` (index-backed on PostgreSQL)."""
+    return queryset.filter(display_name__trgm_icontains=q)
+
+
+def fuzzy_search(queryset: QuerySet, q: str, threshold: float, limit: int) -> List:
+    """Return up to `limit` rows whose name similarity to `q` is >= `threshold`, best first."""
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        ranked = (
+            queryset.filter(display_name__trgm_similar=q)
+            .annotate(similarity=TrigramSimilarity("display_name", q))
+            .filter(similarity__gte=threshold)
+            .order_by("-similarity", "display_name")
+        )
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('pg_trgm.similarity_threshold', %s, true)", [str(threshold)]
+                )
+            return list(ranked[:limit])
+
+    scored = []
+    for obj in queryset.iterator():
+        score = similarity(obj.display_name, q)
+        if score >= threshold:
+            obj.similarity = score
+            scored.append(obj)
+    scored.sort(key=lambda o: (-o.similarity, o.display_name))
+    return scored[:limit]
@@ -1,11 +1,24 @@
 from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from apps.core.models import Entity, EntityDetail, EntityType
+from apps.core.models import Entity, EntityCurrent, EntityDetail, EntityType
 from apps.core.services.scd2 import UpsertResult, update_entity, update_entity_detail
 
 
-class EntitySnapshotSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Drop fields that the `fieldset` in the serializer context did not request."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fieldset = self.context.get("fieldset")
+        if fieldset is not None and fieldset.fields is not None:
+            for name in set(self.fields) - fieldset.fields:
+                self.fields.pop(name)
+
+
+class EntitySnapshotSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     details = serializers.SerializerMethodField()
     entity_type = serializers.SlugRelatedField(slug_field="code", read_only=True)
@@ -26,9 +39,42 @@ class EntitySnapshotSerializer(serializers.ModelSerializer):
         qs = EntityDetail.objects.filter(entity_uid=obj.entity_uid, is_current=True).values(
             "detail_code", "value_json"
         )
+        codes = getattr(self.context.get("fieldset"), "detail_codes", None)
+        if codes is not None:
+            qs = qs.filter(detail_code__in=codes)
         return {r["detail_code"]: r["value_json"] for r in qs}
 
 
+class EntityCurrentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Snapshot shape of `EntitySnapshotSerializer`, served from `entity_current`."""
+
+    entity_type = serializers.CharField(source="entity_type_code", read_only=True)
+    valid_to = serializers.SerializerMethodField()
+    details = serializers.SerializerMethodField()
+
+    class Meta:
+        model = EntityCurrent
+        fields = [
+            "entity_uid",
+            "display_name",
+            "entity_type",
+            "valid_from",
+            "valid_to",
+            "is_current",
+            "details",
+        ]
+
+    def get_valid_to(self, obj):
+        return None
+
+    @extend_schema_field(OpenApiTypes.OBJECT)
+    def get_details(self, obj):
+        subset = getattr(obj, "details_subset", None)
+        if subset is not None:
+            return {code: value for code, value in subset.items() if value is not None}
+        return obj.details
+
+
 class EntityUpsertSerializer(serializers.Serializer):
 
 
@@ -83,3 +129,11 @@ class EntityDetailUpsertSerializer(serializers.Serializer):
 
     def update(self, instance, validated_data):
         return self.create(validated_data)
+
+
+class EntityPatchSerializer(serializers.Serializer):
+    """Entity fields of a PATCH; omitted fields keep their current value."""
+
+    display_name = serializers.CharField(max_length=500, required=False)
+    entity_type = serializers.CharField(max_length=100, required=False)
+    change_ts = serializers.DateTimeField(required=False, allow_null=True)
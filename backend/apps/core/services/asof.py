@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.models import AsOfSnapshot, AsOfSnapshotItem, Entity, EntityDetail
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def snapshot_settings() -> Dict[str, int]:
+    """Return the effective `ASOF_SNAPSHOTS` configuration with defaults applied."""
+    conf = {"INTERVAL_HOURS": 24, "RETENTION_DAYS": 400, "BATCH_SIZE": 5000}
+    conf.update(getattr(settings, "ASOF_SNAPSHOTS", {}) or {})
+    return conf
+
+
+def floor_boundary(ts: datetime, interval: timedelta) -> datetime:
+    """Return the latest snapshot boundary at or before `ts` (aligned to 00:00 UTC)."""
+    steps = (ts - _EPOCH) // interval
+    return _EPOCH + steps * interval
+
+
+def boundaries(start: datetime, end: datetime, interval: timedelta) -> Iterator[datetime]:
+    """Yield aligned boundaries in `[start, end]`."""
+    b = floor_boundary(start, interval)
+    if b < start:
+        b += interval
+    while b <= end:
+        yield b
+        b += interval
+
+
+def nearest_snapshot(as_of: datetime, strict: bool = False) -> Optional[AsOfSnapshot]:
+    """Return the latest usable snapshot at (or, with `strict`, before) `as_of`."""
+    lookup = "as_of__lt" if strict else "as_of__lte"
+    return AsOfSnapshot.objects.filter(stale=False, **{lookup: as_of}).order_by("-as_of").first()
+
+
+def _alive(model, kind: str, as_of: datetime, base: Optional[AsOfSnapshot], **filters) -> QuerySet:
+    """Versions of `model` alive at `as_of`, narrowed by `filters`.
+
+    Without a base snapshot this scans history (`valid_from <= as_of`). With one,
+    it is the UNION ALL of the versions stored in the snapshot (a primary-key
+    semi-join on its items) and those opened in `(base.as_of, as_of]` (a
+    `valid_from` range scan); both drop versions closed since on `valid_to`.
+    The parts are disjoint, and keeping them separate lets each use its own
+    index instead of an OR that PostgreSQL can only answer by scanning history.
+    """
+    qs = model.objects.filter(Q(valid_to__isnull=True) | Q(valid_to__gt=as_of), **filters)
+    if base is None:
+        return qs.filter(valid_from__lte=as_of)
+    ids = AsOfSnapshotItem.objects.filter(snapshot=base, kind=kind).values("version_id")
+    return qs.filter(id__in=ids).union(
+        qs.filter(valid_from__gt=base.as_of, valid_from__lte=as_of), all=True
+    )
+
+
+def entities_as_of(
+    as_of: datetime, entity_uids: Optional[Sequence[Any]] = None
+) -> List[Dict[str, Any]]:
+    """Return the state of entities (with details) alive at `as_of`.
+
+    `entity_uids` restricts the result to those entities (still three queries).
+    """
+    base = nearest_snapshot(as_of)
+    only = {} if entity_uids is None else {"entity_uid__any": list(entity_uids)}
+
+    latest: Dict[Any, Dict[str, Any]] = {}
+    entities = (
+        _alive(Entity, AsOfSnapshotItem.KIND_ENTITY, as_of, base, **only)
+        .values_list("entity_uid", "display_name", "entity_type__code", "valid_from", "valid_to")
+        .order_by("entity_uid", "-valid_from")
+    )
+    for uid, name, type_code, valid_from, valid_to in entities:
+        latest.setdefault(
+            uid,
+            {
+                "entity_uid": uid,
+                "display_name": name,
+                "entity_type": type_code,
+                "valid_from": valid_from,
+                "valid_to": valid_to,
+                "details": {},
+            },
+        )
+
+    for uid, code, value in _alive(
+        EntityDetail, AsOfSnapshotItem.KIND_DETAIL, as_of, base, **only
+    ).values_list("entity_uid", "detail_code", "value_json"):
+        if uid in latest:
+            latest[uid]["details"][code] = value
+
+    return list(latest.values())
+
+
+def parse_as_of(raw: str) -> datetime:
+    """Parse an `as_of` query value (naive values use the current timezone)."""
+    dt = parse_datetime(raw)
+    if dt is None:
+        raise ValueError("invalid as_of")
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def _alive_row(valid_to: Optional[datetime], as_of: datetime) -> bool:
+    return valid_to is None or valid_to > as_of
+
+
+def _entity_probe(entity_uid, as_of: datetime) -> QuerySet:
+    return (
+        Entity.objects.filter(entity_uid=entity_uid, valid_from__lte=as_of)
+        .select_related("entity_type")
+        .order_by("-valid_from")
+    )
+
+
+def _entity_state(e: Optional[Entity], as_of: datetime) -> Optional[Dict[str, Any]]:
+    if e is None or not _alive_row(e.valid_to, as_of):
+        return None
+    return {
+        "entity_uid": e.entity_uid,
+        "display_name": e.display_name,
+        "entity_type": e.entity_type.code,
+        "valid_from": e.valid_from,
+        "valid_to": e.valid_to,
+        "is_current": e.valid_to is None,
+    }
+
+
+def entity_at(entity_uid, as_of: datetime) -> Optional[Dict[str, Any]]:
+    """State of one entity at `as_of` (None if it was not alive).
+
+    One backward probe on `(entity_uid, valid_from)`: SCD2 versions do not
+    overlap, so the latest version opened at or before `as_of` is the only
+    candidate.
+    """
+    state = _entity_state(_entity_probe(entity_uid, as_of).first(), as_of)
+    if state is not None:
+        state["details"] = details_at(entity_uid, as_of)
+    return state
+
+
+async def aentity_at(entity_uid, as_of: datetime) -> Optional[Dict[str, Any]]:
+    """Async variant of `entity_at`."""
+    state = _entity_state(await _entity_probe(entity_uid, as_of).afirst(), as_of)
+    if state is not None:
+        state["details"] = await adetails_at(entity_uid, as_of)
+    return state
+
+
+# Loose index scan on (entity_uid, detail_code, valid_from): the recursive part
+# steps from one detail code to the next with a single probe each, and every
+# code's latest version at or before `as_of` is one more backward probe.
+_LATEST_DETAIL_IDS_SQL = """
+WITH RECURSIVE codes (code) AS (
+    SELECT MIN(detail_code) FROM {table} WHERE entity_uid = %s
+    UNION ALL
+    SELECT (
+        SELECT MIN(detail_code) FROM {table}
+        WHERE entity_uid = %s AND detail_code > codes.code
+    )
+    FROM codes
+    WHERE codes.code IS NOT NULL
+)
+SELECT (
+    SELECT id FROM {table}
+    WHERE entity_uid = %s AND detail_code = codes.code AND valid_from <= %s
+    ORDER BY valid_from DESC
+    LIMIT 1
+)
+FROM codes
+WHERE codes.code IS NOT NULL
+"""
+
+
+def _latest_detail_ids(entity_uid, as_of: datetime) -> RawSQL:
+    """Ids of the latest version per detail code opened at or before `as_of`."""
+    uid = EntityDetail._meta.get_field("entity_uid").get_db_prep_value(entity_uid, connection)
+    ts = EntityDetail._meta.get_field("valid_from").get_db_prep_value(as_of, connection)
+    sql = _LATEST_DETAIL_IDS_SQL.format(table=EntityDetail._meta.db_table)
+    return RawSQL(sql, (uid, uid, uid, ts))
+
+
+def _detail_rows(entity_uid, as_of: datetime, detail_code: Optional[str]) -> QuerySet:
+    if detail_code is not None:
+        qs = EntityDetail.objects.filter(
+            entity_uid=entity_uid, detail_code=detail_code, valid_from__lte=as_of
+        ).order_by("-valid_from")[:1]
+    else:
+        qs = EntityDetail.objects.filter(id__in=_latest_detail_ids(entity_uid, as_of))
+    return qs.values_list("detail_code", "value_json", "valid_to")
+
+
+def _latest_alive(rows, as_of: datetime) -> Dict[str, Any]:
+    return {code: value for code, value, valid_to in rows if _alive_row(valid_to, as_of)}
+
+
+def details_at(entity_uid, as_of: datetime, detail_code: Optional[str] = None) -> Dict[str, Any]:
+    """`{code: value}` of the entity's details alive at `as_of`.
+
+    Probes `(entity_uid, detail_code, valid_from)` once per code for its latest
+    version, skipping from code to code rather than reading every version;
+    closed codes are dropped.
+    """
+    return _latest_alive(_detail_rows(entity_uid, as_of, detail_code), as_of)
+
+
+async def adetails_at(
+    entity_uid, as_of: datetime, detail_code: Optional[str] = None
+) -> Dict[str, Any]:
+    """Async variant of `details_at`."""
+    rows = [row async for row in _detail_rows(entity_uid, as_of, detail_code)]
+    return _latest_alive(rows, as_of)
+
+
+@transaction.atomic
+def build_snapshot(as_of: datetime, batch_size: Optional[int] = None) -> AsOfSnapshot:
+    """Materialize the state at `as_of`, rolling forward from the previous snapshot.
+
+    Idempotent: an existing snapshot for `as_of` is returned unchanged, unless
+    it was marked stale, in which case it is replaced.
+    """
+    existing = AsOfSnapshot.objects.filter(as_of=as_of).first()
+    if existing and not existing.stale:
+        return existing
+    if existing:
+        _delete_snapshot(existing, batch_size or snapshot_settings()["BATCH_SIZE"])
+    batch_size = batch_size or snapshot_settings()["BATCH_SIZE"]
+    base = nearest_snapshot(as_of, strict=True)
+    snap = AsOfSnapshot.objects.create(as_of=as_of)
+
+    counts = {}
+    for model, kind in (
+        (Entity, AsOfSnapshotItem.KIND_ENTITY),
+        (EntityDetail, AsOfSnapshotItem.KIND_DETAIL),
+    ):
+        ids = _alive(model, kind, as_of, base).values_list("id", flat=True)
+        buf: List[AsOfSnapshotItem] = []
+        counts[kind] = 0
+        for version_id in ids.iterator(chunk_size=batch_size):
+            buf.append(AsOfSnapshotItem(snapshot=snap, kind=kind, version_id=version_id))
+            if len(buf) >= batch_size:
+                AsOfSnapshotItem.objects.bulk_create(buf)
+                counts[kind] += len(buf)
+                buf = []
+        if buf:
+            AsOfSnapshotItem.objects.bulk_create(buf)
+            counts[kind] += len(buf)
+
+    snap.entity_count = counts[AsOfSnapshotItem.KIND_ENTITY]
+    snap.save(update_fields=["entity_count"])
+    return snap
+
+
+def prune_snapshots(now: datetime, retention_days: Optional[int] = None) -> int:
+    """Delete snapshots older than the retention window; return how many were removed."""
+    days = retention_days if retention_days is not None else snapshot_settings()["RETENTION_DAYS"]
+    _, per_model = AsOfSnapshot.objects.filter(as_of__lt=now - timedelta(days=days)).delete()
+    return per_model.get(AsOfSnapshot._meta.label, 0)
+
+
+def _delete_snapshot(snap: AsOfSnapshot, batch_size: int) -> None:
+    items = AsOfSnapshotItem.objects.filter(snapshot=snap)
+    while True:
+        ids = list(items.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        AsOfSnapshotItem.objects.filter(id__in=ids).delete()
+    snap.delete()
+
+
+def purge_stale_snapshots(batch_size: Optional[int] = None) -> int:
+    """Delete snapshots marked stale, items in batches; return how many were removed."""
+    batch_size = batch_size or snapshot_settings()["BATCH_SIZE"]
+    stale = list(AsOfSnapshot.objects.filter(stale=True))
+    for snap in stale:
+        with transaction.atomic():
+            _delete_snapshot(snap, batch_size)
+    return len(stale)
+
+
+def invalidate_snapshots(change_ts: datetime) -> None:
+    """Mark snapshots that a (back-dated) SCD2 transition at `change_ts` made stale.
+
+    Runs inside the write transaction, so it only flags the snapshot rows; their
+    items are deleted later by `purge_stale_snapshots` (`build_asof_snapshots`).
+    """
+    AsOfSnapshot.objects.filter(as_of__gte=change_ts, stale=False).update(stale=True)
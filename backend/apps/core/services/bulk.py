@@ -0,0 +1,205 @@
+"""Streaming NDJSON bulk upsert.
+
+The request body is read one line at a time (optionally through gzip), each
+line is turned into a `ChangeSet`, and change sets are applied in batches of
+`BATCH_SIZE` distinct entities with `apply_changes` (one transaction per
+batch). Results are yielded as each batch commits and sent on by
+`ndjson_response` one line at a time under both WSGI and ASGI, so memory use
+is bounded by the batch, not by the body.
+
+Line format (one JSON object per line)::
+
+    {"entity_uid": "...", "display_name": "...", "entity_type": "PERSON",
+     "change_ts": "...", "details": [{"detail_code": "EMAIL", "value_json": "..."}]}
+    {"entity_uid": "...", "detail_code": "EMAIL", "value_json": "...", "change_ts": "..."}
+
+A top-level `change_ts` is the default for the line's details. When a batch
+fails as a whole (e.g. one line names an unknown entity type), its lines are
+retried one by one so only the offending lines are reported as errors.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils.dateparse import parse_datetime
+
+from apps.common.renderers import orjson
+from apps.core.services.scd2 import (
+    BatchError,
+    BatchResult,
+    ChangeSet,
+    DetailChange,
+    EntityChange,
+    apply_changes,
+)
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def bulk_settings() -> Dict[str, Any]:
+    """Return the effective `BULK_UPSERT` configuration with defaults applied."""
+    conf = {"BATCH_SIZE": 500, "MAX_BATCH_SIZE": 5000, "MAX_LINE_BYTES": 1024 * 1024}
+    conf.update(getattr(settings, "BULK_UPSERT", {}) or {})
+    return conf
+
+
+def read_lines(stream, gzipped: bool = False, max_bytes: int = 1024 * 1024):
+    """Yield `(line_no, raw_line)` for non-blank lines; oversized lines yield `None`.
+
+    Raises ValueError if a gzip body is corrupt or truncated.
+    """
+    if gzipped:
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+    line_no = 0
+    while True:
+        try:
+            raw = stream.readline(max_bytes + 1)
+        except (OSError, EOFError) as exc:
+            raise ValueError("invalid gzip body") from exc
+        if not raw:
+            return
+        line_no += 1
+        if len(raw) > max_bytes and not raw.endswith(b"\n"):
+            while raw and not raw.endswith(b"\n"):
+                try:
+                    raw = stream.readline(max_bytes + 1)
+                except (OSError, EOFError) as exc:
+                    raise ValueError("invalid gzip body") from exc
+            yield line_no, None
+            continue
+        if raw.strip():
+            yield line_no, raw
+
+
+def _timestamp(value: Any, name: str):
+    if value in (None, ""):
+        return None
+    ts = parse_datetime(value) if isinstance(value, str) else None
+    if ts is None:
+        raise ValueError(f"invalid {name}")
+    return ts
+
+
+def _detail(item: Any, default_ts) -> DetailChange:
+    if not isinstance(item, dict):
+        raise ValueError("details must be objects")
+    code = item.get("detail_code")
+    if not isinstance(code, str) or not code or len(code) > 100:
+        raise ValueError("invalid detail_code")
+    if "value_json" not in item:
+        raise ValueError("value_json is required")
+    return DetailChange(
+        code, item["value_json"], _timestamp(item.get("change_ts"), "change_ts") or default_ts
+    )
+
+
+def parse_line(raw: bytes) -> ChangeSet:
+    """Validate one NDJSON line; raises ValueError with a client-facing message."""
+    try:
+        doc = _loads(raw)
+    except ValueError as exc:
+        raise ValueError("invalid JSON") from exc
+    if not isinstance(doc, dict):
+        raise ValueError("line must be a JSON object")
+    try:
+        uid = uuid.UUID(str(doc.get("entity_uid")))
+    except ValueError as exc:
+        raise ValueError("invalid entity_uid") from exc
+    change_ts = _timestamp(doc.get("change_ts"), "change_ts")
+
+    if "detail_code" in doc:
+        return ChangeSet(uid, details=[_detail(doc, change_ts)])
+
+    entity = None
+    if "display_name" in doc or "entity_type" in doc:
+        name, type_code = doc.get("display_name"), doc.get("entity_type")
+        if name is not None and (not isinstance(name, str) or len(name) > 500):
+            raise ValueError("invalid display_name")
+        if type_code is not None and not isinstance(type_code, str):
+            raise ValueError("invalid entity_type")
+        entity = EntityChange(name, type_code, change_ts)
+    details = doc.get("details") or []
+    if not isinstance(details, list):
+        raise ValueError("details must be a list")
+    if entity is None and not details:
+        raise ValueError("nothing to apply")
+    return ChangeSet(uid, entity, [_detail(d, change_ts) for d in details])
+
+
+def _result(line_no: int, cs: ChangeSet, result: BatchResult) -> Dict[str, Any]:
+    entity_result, detail_results = result
+    return {
+        "line": line_no,
+        "entity_uid": str(cs.entity_uid),
+        "entity": entity_result.status if entity_result else None,
+        "details": {r.detail_code: r.status for r in detail_results},
+    }
+
+
+def _apply(batch: List[Tuple[int, ChangeSet]], actor: str) -> Iterator[Dict[str, Any]]:
+    try:
+        results = apply_changes([cs for _, cs in batch], actor=actor)
+    except (BatchError, DatabaseError) as exc:
+        if len(batch) == 1:
+            line_no, cs = batch[0]
+            yield {"line": line_no, "entity_uid": str(cs.entity_uid), "error": str(exc)}
+            return
+        for item in batch:
+            yield from _apply([item], actor)
+        return
+    for (line_no, cs), result in zip(batch, results):
+        yield _result(line_no, cs, result)
+
+
+def bulk_upsert(
+    lines: Iterable[Tuple[int, Optional[bytes]]],
+    actor: str = "api",
+    batch_size: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Apply NDJSON lines in batches; yield one result per line, then a summary.
+
+    Invalid lines are reported as they are read. A batch is flushed when it
+    reaches `batch_size` entities or when an entity repeats, so later lines
+    for the same entity see the earlier ones applied.
+    """
+    batch_size = batch_size or bulk_settings()["BATCH_SIZE"]
+    batch: List[Tuple[int, ChangeSet]] = []
+    seen = set()
+    counts = {"lines": 0, "errors": 0}
+
+    def flush():
+        for row in _apply(batch, actor):
+            counts["errors"] += "error" in row
+            yield row
+        batch.clear()
+        seen.clear()
+
+    try:
+        for line_no, raw in lines:
+            counts["lines"] += 1
+            try:
+                if raw is None:
+                    raise ValueError("line too long")
+                cs = parse_line(raw)
+            except ValueError as exc:
+                counts["errors"] += 1
+                yield {"line": line_no, "error": str(exc)}
+                continue
+            if cs.entity_uid in seen:
+                yield from flush()
+            batch.append((line_no, cs))
+            seen.add(cs.entity_uid)
+            if len(batch) >= batch_size:
+                yield from flush()
+    except ValueError as exc:  # unreadable body; lines read so far are still applied
+        counts["errors"] += 1
+        yield {"error": str(exc)}
+    if batch:
+        yield from flush()
+    yield {"summary": counts}
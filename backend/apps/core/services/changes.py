@@ -0,0 +1,159 @@
+"""Change feed: a monotonic sequence of SCD2 transitions.
+
+`record_change` runs inside the SCD2 transaction and inserts events without a
+`seq`, taking no lock, so writers never wait on each other for the feed. Once
+the transaction commits, `assign_sequence` stamps every committed unsequenced
+event in a short transaction of its own that holds a database-wide advisory
+lock (PostgreSQL) until it commits; a `seq` therefore becomes visible only
+after every lower one has, and readers paging with `seq > since ORDER BY seq
+LIMIT n` never skip an event.
+
+The cost is one extra small transaction per write commit, and those are
+serialized: feed throughput is bounded by how fast that UPDATE commits (a
+few milliseconds), not by the length of the writers' transactions. Events
+whose writer died between commit and stamping are picked up by the next
+`assign_sequence` call from any process.
+
+Long-polling waits on an in-process condition that is notified after commit,
+with a periodic re-check of the table for events written by other processes.
+Committed events are also pushed to `event_hub` for SSE subscribers.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Max
+
+from apps.core.models import ChangeEvent
+from apps.core.services.event_hub import publish_committed
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_advisory_xact_lock.
+CHANGE_SEQ_LOCK = 0x43484E47
+SEQUENCE_BATCH = 5000
+
+_new_events = threading.Condition()
+
+
+def feed_settings() -> Dict[str, Any]:
+    """Return the effective `CHANGE_FEED` configuration with defaults applied."""
+    conf = {"MAX_LIMIT": 1000, "MAX_WAIT": 30, "POLL_INTERVAL": 1.0}
+    conf.update(getattr(settings, "CHANGE_FEED", {}) or {})
+    return conf
+
+
+def _notify() -> None:
+    with _new_events:
+        _new_events.notify_all()
+
+
+def record_change(
+    *,
+    action: str,
+    entity_uid,
+    change_ts,
+    entity_type_code: str = "",
+    detail_code: Optional[str] = None,
+) -> ChangeEvent:
+    """Append one transition to the feed (call inside the SCD2 transaction)."""
+    return record_changes(
+        [
+            {
+                "action": action,
+                "entity_uid": entity_uid,
+                "change_ts": change_ts,
+                "entity_type_code": entity_type_code,
+                "detail_code": detail_code,
+            }
+        ]
+    )[0]
+
+
+def record_changes(changes: List[Dict[str, Any]]) -> List[ChangeEvent]:
+    """Append several transitions with one insert; same fields as `record_change`.
+
+    The events get their `seq` after the surrounding transaction commits.
+    """
+    events = ChangeEvent.objects.bulk_create(
+        ChangeEvent(
+            action=c["action"],
+            entity_uid=c["entity_uid"],
+            change_ts=c["change_ts"],
+            entity_type_code=c.get("entity_type_code") or "",
+            detail_code=c.get("detail_code"),
+        )
+        for c in changes
+    )
+    transaction.on_commit(_sequence_and_publish)
+    return events
+
+
+def _sequence_and_publish() -> None:
+    try:
+        stamped = assign_sequence()
+    except DatabaseError:  # the next writer stamps them
+        logger.exception("could not assign change feed sequence numbers")
+        return
+    _notify()
+    for payload in stamped:
+        publish_committed(payload)
+
+
+def assign_sequence(batch_size: int = SEQUENCE_BATCH) -> List[Dict[str, Any]]:
+    """Stamp committed events that have no `seq` yet, in insertion order.
+
+    Each batch is one transaction: take the advisory lock, read the highest
+    `seq`, and set `seq = id + offset` for the pending rows (ids only grow, so
+    the order is kept; gaps are harmless). Returns the stamped events.
+    """
+    stamped: List[Dict[str, Any]] = []
+    while True:
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cur:
+                    cur.execute("SELECT pg_advisory_xact_lock(%s)", [CHANGE_SEQ_LOCK])
+            pending = list(
+                ChangeEvent.objects.filter(seq__isnull=True)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not pending:
+                return stamped
+            top = ChangeEvent.objects.aggregate(top=Max("seq"))["top"] or 0
+            ChangeEvent.objects.filter(id__in=pending).update(seq=F("id") + (top + 1 - pending[0]))
+            stamped += _rows(ChangeEvent.objects.filter(id__in=pending).order_by("seq"))
+        if len(pending) < batch_size:
+            return stamped
+
+
+def _rows(qs) -> List[Dict[str, Any]]:
+    return list(
+        qs.values("seq", "change_ts", "action", "entity_uid", "entity_type_code", "detail_code")
+    )
+
+
+def changes_since(since: int, limit: int) -> List[Dict[str, Any]]:
+    """Events with `seq > since`, oldest first."""
+    return _rows(ChangeEvent.objects.filter(seq__gt=since).order_by("seq")[:limit])
+
+
+def wait_for_changes(since: int, limit: int, wait: float) -> List[Dict[str, Any]]:
+    """Like `changes_since`, but block up to `wait` seconds while the feed is empty."""
+    rows = changes_since(since, limit)
+    deadline = time.monotonic() + wait
+    poll = feed_settings()["POLL_INTERVAL"]
+    while not rows:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        with _new_events:
+            _new_events.wait(min(poll, remaining))
+        rows = changes_since(since, limit)
+    return rows
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Optional
+
+from apps.core.models import Entity, EntityCurrent, EntityDetail
+
+
+def _document(entity: Optional[Entity], details: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the `EntityCurrent` field values for an entity and its open details."""
+    if entity is None:
+        return {
+            "display_name": "",
+            "entity_type_code": "",
+            "valid_from": None,
+            "is_current": False,
+            "details": details,
+        }
+    return {
+        "display_name": entity.display_name,
+        "entity_type_code": entity.entity_type.code if entity.entity_type_id else "",
+        "valid_from": entity.valid_from,
+        "is_current": True,
+        "details": details,
+    }
+
+
+def sync_entity_current(entity_uid) -> Dict[str, Any]:
+    """Rewrite the `entity_current` document for one entity; return its field values.
+
+    Must be called inside the transaction that performed the SCD2 transition so
+    the document commits (or rolls back) together with it. Every call bumps
+    `version`; the row is kept (with `is_current=False`) after the entity is
+    closed so its validator never goes backwards.
+    """
+    return sync_entities_current([entity_uid])[entity_uid]
+
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def rebuild_entity_current(batch_size: int = 1000) -> int:
+    """Rewrite every `entity_current` document from the SCD2 tables.
+
+    Covers all entities with an open version or open detail plus every existing
+    document, and goes through `sync_entities_current` per batch, so versions
+    keep counting up and validators handed out before the rebuild never match
+    again. Returns the number of documents written. Callers are expected to
+    wrap it in a transaction.
+    """
+    entity_uids = set(Entity.objects.filter(is_current=True).values_list("entity_uid", flat=True))
+    entity_uids.update(
+        EntityDetail.objects.filter(is_current=True).values_list("entity_uid", flat=True)
+    )
+    entity_uids.update(EntityCurrent.objects.values_list("entity_uid", flat=True))
+    written = 0
+    for chunk in _chunks(sorted(entity_uids, key=str), batch_size):
+        written += len(sync_entities_current(chunk))
+    return written
+
+
+def _documents(entity_uids: Iterable[Any]) -> Dict[Any, Dict[str, Any]]:
+    """`EntityCurrent` field values for many entities: one query per SCD2 table."""
+    entity_uids = list(entity_uids)
+    entities = {
+        e.entity_uid: e
+        for e in Entity.objects.filter(entity_uid__in=entity_uids, is_current=True).select_related(
+            "entity_type"
+        )
+    }
+    details: Dict[Any, Dict[str, Any]] = {}
+    for uid, code, value in EntityDetail.objects.filter(
+        entity_uid__in=entity_uids, is_current=True
+    ).values_list("entity_uid", "detail_code", "value_json"):
+        details.setdefault(uid, {})[code] = value
+    return {uid: _document(entities.get(uid), details.get(uid, {})) for uid in entity_uids}
+
+
+_DOCUMENT_FIELDS = ["display_name", "entity_type_code", "valid_from", "is_current", "details"]
+
+
+def _lock_documents(entity_uids: Iterable[Any]) -> Dict[Any, int]:
+    """Lock the `entity_current` rows of `entity_uids`; return their versions.
+
+    Missing rows are inserted first (version 0) so there is always a row to
+    lock. Rows are locked in key order, which keeps batches that share entities
+    from deadlocking.
+    """
+    uids = sorted(set(entity_uids), key=str)
+    EntityCurrent.objects.bulk_create(
+        [EntityCurrent(entity_uid=uid) for uid in uids], ignore_conflicts=True
+    )
+    return dict(
+        EntityCurrent.objects.select_for_update()
+        .filter(entity_uid__in=uids)
+        .order_by("entity_uid")
+        .values_list("entity_uid", "version")
+    )
+
+
+def sync_entities_current(entity_uids: Iterable[Any]) -> Dict[Any, Dict[str, Any]]:
+    """Set-based `sync_entity_current` for many entities; returns their field values.
+
+    Locks the documents before reading the SCD2 rows: a concurrent transition of
+    the same entity waits here and then rebuilds the document from rows that
+    include the first one's commit, instead of overwriting its details with an
+    older snapshot. The documents are read with two queries and written with one
+    upsert.
+    """
+    versions = _lock_documents(entity_uids)
+    docs = _documents(versions)
+    EntityCurrent.objects.bulk_create(
+        [
+            EntityCurrent(entity_uid=uid, version=versions[uid] + 1, **doc)
+            for uid, doc in docs.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["entity_uid"],
+        update_fields=[*_DOCUMENT_FIELDS, "version", "updated_at"],
+    )
+    return docs
@@ -0,0 +1,173 @@
+"""In-process fan-out of committed SCD2 change events to async subscribers.
+
+Each subscriber is an `asyncio.Queue` plus its filters; an idle subscriber is
+just that object, so thousands per process are cheap. Events enter the hub
+from the SCD2 post-commit hook (`publish_committed`), which delivers locally
+and forwards the event with PostgreSQL `NOTIFY`. A per-process listener task
+(`LISTEN`, driven by the event loop's reader callback rather than a thread)
+feeds events committed by other workers into the local hub, skipping its own.
+
+Slow consumers whose queue is full lose the event and get a `lagged` flag, so
+they can resync from the change feed; publishers never block.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Optional, Set
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "scd2_changes"
+QUEUE_SIZE = 1000
+
+# Identifies this process in NOTIFY payloads so the listener can drop echoes.
+ORIGIN = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+@dataclass(eq=False)
+class Subscription:
+    """A subscriber's queue and filters (empty filter set = everything)."""
+
+    loop: asyncio.AbstractEventLoop
+    entity_types: FrozenSet[str] = frozenset()
+    detail_codes: FrozenSet[str] = frozenset()
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(QUEUE_SIZE))
+    lagged: bool = False
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if self.entity_types and event.get("entity_type_code") not in self.entity_types:
+            return False
+        if self.detail_codes and event.get("detail_code") not in self.detail_codes:
+            return False
+        return True
+
+    def _offer(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+
+class EventHub:
+    """Thread-safe publish, asyncio-side consume."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs: Set[Subscription] = set()
+        self._listeners: Dict[asyncio.AbstractEventLoop, "_PgListener"] = {}
+
+    def subscribe(
+        self, entity_types: FrozenSet[str] = frozenset(), detail_codes: FrozenSet[str] = frozenset()
+    ) -> Subscription:
+        """Register a subscriber on the running event loop."""
+        loop = asyncio.get_running_loop()
+        sub = Subscription(loop, frozenset(entity_types), frozenset(detail_codes))
+        with self._lock:
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subs.discard(sub)
+
+    def subscriber_count(self) -> int:
+        return len(self._subs)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Deliver to matching local subscribers; safe from any thread."""
+        with self._lock:
+            subs = [s for s in self._subs if s.matches(event)]
+        for sub in subs:
+            if sub.loop.is_closed():
+                self.unsubscribe(sub)
+                continue
+            sub.loop.call_soon_threadsafe(sub._offer, event)
+
+    def ensure_listener(self) -> None:
+        """Start the cross-worker LISTEN task for the running loop (PostgreSQL only)."""
+        if connection.vendor != "postgresql":
+            return
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop in self._listeners:
+                return
+            listener = self._listeners[loop] = _PgListener(self, loop)
+        try:
+            listener.start()
+        except Exception:  # noqa: BLE001 - local delivery still works without it
+            logger.exception("change event listener failed to start")
+            with self._lock:
+                self._listeners.pop(loop, None)
+
+
+class _PgListener:
+    """`LISTEN` on a dedicated autocommit connection, polled from the event loop."""
+
+    def __init__(self, hub: EventHub, loop: asyncio.AbstractEventLoop):
+        self.hub = hub
+        self.loop = loop
+        self.conn = None
+
+    def start(self) -> None:
+        import psycopg2
+
+        self.conn = psycopg2.connect(**connection.get_connection_params())
+        self.conn.autocommit = True
+        with self.conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        self.loop.add_reader(self.conn.fileno(), self._drain)
+
+    def _drain(self) -> None:
+        try:
+            self.conn.poll()
+        except Exception:  # noqa: BLE001
+            logger.exception("change event listener lost its connection")
+            self.loop.remove_reader(self.conn.fileno())
+            with self.hub._lock:
+                self.hub._listeners.pop(self.loop, None)
+            return
+        while self.conn.notifies:
+            note = self.conn.notifies.pop(0)
+            try:
+                message = json.loads(note.payload)
+            except ValueError:
+                continue
+            if message.get("origin") != ORIGIN:
+                self.hub.publish(message["event"])
+
+
+def encode_event(event: Dict[str, Any]) -> str:
+    return json.dumps(event, cls=DjangoJSONEncoder, separators=(",", ":"))
+
+
+def publish_committed(event: Dict[str, Any]) -> None:
+    """Post-commit hook: fan out locally and to other workers via NOTIFY."""
+    event = json.loads(encode_event(event))
+    hub.publish(event)
+    if connection.vendor == "postgresql":
+        payload = json.dumps({"origin": ORIGIN, "event": event}, separators=(",", ":"))
+        try:
+            with connection.cursor() as cur:
+                cur.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+        except Exception:  # noqa: BLE001 - the change feed remains the source of truth
+            logger.exception("could not NOTIFY change event %s", event.get("seq"))
+
+
+hub = EventHub()
+
+
+def format_sse(event: Dict[str, Any], name: str = "change") -> str:
+    """Render one Server-Sent Events frame."""
+    seq: Optional[Any] = event.get("seq")
+    head = f"id: {seq}\n" if seq is not None else ""
+    return f"{head}event: {name}\ndata: {encode_event(event)}\n\n"
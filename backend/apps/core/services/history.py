@@ -0,0 +1,137 @@
+"""Windowed, keyset-paginated version history of one entity.
+
+Entity and detail versions are two streams merged on `(valid_from, kind, id)`
+(`kind` 0 = entity, 1 = detail). A page reads at most `limit + 1` rows from
+each stream with a range scan in `(valid_from, id)` order: on
+`(entity_uid, valid_from)` for entities and on `(entity_uid, valid_from, id)`,
+or `(entity_uid, detail_code, valid_from)` for a single code, for details. Its
+cost is therefore bounded by the page size rather than by the entity's history.
+"""
+
+from __future__ import annotations
+
+import heapq
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+from apps.core.models import Entity, EntityDetail
+
+KIND_ENTITY, KIND_DETAIL = 0, 1
+
+# Bookkeeping columns left out of compact responses.
+INTERNAL_COLUMNS = ("id", "entity_uid", "created_at", "updated_at", "hashdiff")
+
+Key = Tuple[datetime, int, int]
+
+
+def _after_key(kind: int, after: Optional[Key]) -> Q:
+    """Rows of stream `kind` strictly after the merged keyset `after`."""
+    if after is None:
+        return Q()
+    ts, after_kind, pk = after
+    if kind > after_kind:
+        return Q(valid_from__gte=ts)
+    if kind < after_kind:
+        return Q(valid_from__gt=ts)
+    return Q(valid_from__gt=ts) | Q(valid_from=ts, id__gt=pk)
+
+
+def _page_queries(
+    entity_uid,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    detail_code: Optional[str],
+    after: Optional[Key],
+    limit: int,
+) -> List[Tuple[int, QuerySet]]:
+    """Per-stream queries reading at most `limit + 1` rows past `after`."""
+    window = Q(entity_uid=entity_uid)
+    if start is not None:
+        window &= Q(valid_from__gte=start)
+    if end is not None:
+        window &= Q(valid_from__lt=end)
+
+    streams = []
+    if detail_code is None:
+        streams.append((KIND_ENTITY, Entity.objects.all()))
+    streams.append(
+        (
+            KIND_DETAIL,
+            EntityDetail.objects.filter(
+                **({"detail_code": detail_code} if detail_code is not None else {})
+            ),
+        )
+    )
+    return [
+        (
+            kind,
+            qs.filter(window, _after_key(kind, after))
+            .order_by("valid_from", "id")
+            .values()[: limit + 1],
+        )
+        for kind, qs in streams
+    ]
+
+
+def _merge_page(
+    results: List[Tuple[int, List[Dict[str, Any]]]], limit: int, compact: bool
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[Key]]:
+    merged = heapq.merge(
+        *(
+            [((row["valid_from"], kind, row["id"]), kind, row) for row in rows]
+            for kind, rows in results
+        ),
+        key=lambda item: item[0],
+    )
+    page = [item for _, item in zip(range(limit + 1), merged)]
+
+    next_key = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_key = page[-1][0]
+
+    entity_rows: List[Dict[str, Any]] = []
+    detail_rows: List[Dict[str, Any]] = []
+    for _, kind, row in page:
+        if compact:
+            for col in INTERNAL_COLUMNS:
+                row.pop(col, None)
+        (entity_rows if kind == KIND_ENTITY else detail_rows).append(row)
+    return entity_rows, detail_rows, next_key
+
+
+def history_page(
+    entity_uid,
+    *,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    detail_code: Optional[str] = None,
+    after: Optional[Key] = None,
+    limit: int = 500,
+    compact: bool = False,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[Key]]:
+    """One page of versions opened in `[start, end)`.
+
+    Returns `(entity_rows, detail_rows, next_key)`; `next_key` is None on the
+    last page. With `detail_code` only that detail's versions are returned.
+    """
+    queries = _page_queries(entity_uid, start, end, detail_code, after, limit)
+    return _merge_page([(kind, list(qs)) for kind, qs in queries], limit, compact)
+
+
+async def ahistory_page(
+    entity_uid,
+    *,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    detail_code: Optional[str] = None,
+    after: Optional[Key] = None,
+    limit: int = 500,
+    compact: bool = False,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[Key]]:
+    """Async variant of `history_page`."""
+    queries = _page_queries(entity_uid, start, end, detail_code, after, limit)
+    results = [(kind, [row async for row in qs]) for kind, qs in queries]
+    return _merge_page(results, limit, compact)
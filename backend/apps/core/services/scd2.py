@@ -1,23 +1,27 @@
 from __future__ import annotations
 
+import uuid
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Literal, Optional, Tuple
+from typing import Any, Dict, List, Literal, Optional, Sequence, Set, Tuple
 
 from django.db import IntegrityError, transaction
-from django.db.models import BinaryField, CharField
+from django.db.models import BinaryField, Case, CharField, DateTimeField, Value, When
 from django.utils import timezone
 
 from apps.core.models import Entity, EntityDetail, EntityType
+from apps.core.services.asof import invalidate_snapshots
+from apps.core.services.changes import record_changes
+from apps.core.services.current import sync_entities_current
+from apps.core.services.snapshot_cache import snapshot_cache
 from apps.core.utils.hashdiff import norm_json, norm_str, sha256_str
 
 try:
-    from apps.audit.models import AuditLog  
-except Exception:  
+    from apps.audit.models import AuditLog
+except Exception:
     AuditLog = None
 
 
-
 def _ensure_aware(ts: Optional[datetime]) -> datetime:
     """Return an aware timestamp in the current timezone."""
     if ts is None:
@@ -78,6 +82,49 @@ def _audit_log(
     )
 
 
+def _after_transition(
+    entity_uid,
+    change_ts: datetime,
+    action: str,
+    detail_code: Optional[str] = None,
+    entity_type_code: Optional[str] = None,
+) -> None:
+    """Keep derived read models and the change feed in step with an SCD2 transition.
+
+    Tables are updated in the caller's transaction; caches are only invalidated
+    once it commits.
+    """
+    _after_transitions([(entity_uid, action, change_ts, detail_code)], entity_type_code)
+
+
+def _after_transitions(
+    transitions: List[Tuple[Any, str, datetime, Optional[str]]],
+    entity_type_code: Optional[str] = None,
+) -> None:
+    """`_after_transition` for many `(entity_uid, action, change_ts, detail_code)`.
+
+    Each touched entity's current-state document is rewritten once.
+    """
+    if not transitions:
+        return
+    uids = list(dict.fromkeys(uid for uid, _, _, _ in transitions))
+    docs = sync_entities_current(uids)
+    invalidate_snapshots(min(ts for _, _, ts, _ in transitions))
+    record_changes(
+        [
+            {
+                "action": action,
+                "entity_uid": uid,
+                "change_ts": change_ts,
+                "entity_type_code": entity_type_code or docs[uid]["entity_type_code"],
+                "detail_code": detail_code,
+            }
+            for uid, action, change_ts, detail_code in transitions
+        ]
+    )
+    transaction.on_commit(lambda: [snapshot_cache.invalidate(uid) for uid in uids])
+
+
 @dataclass
 class UpsertResult:
     """Result of an SCD2 operation.
@@ -126,7 +173,6 @@ def update_entity(
                 status="noop", entity_uid=str(entity_uid), valid_from=current.valid_from
             )
 
-    
         before = {
             "display_name": current.display_name,
             "entity_type": current.entity_type.code if current.entity_type_id else None,
@@ -172,6 +218,7 @@ def update_entity(
             after={"display_name": display_name, "entity_type": et.code},
             change_ts=change_ts,
         )
+        _after_transition(entity_uid, change_ts, "updated")
         return UpsertResult(status="updated", entity_uid=str(entity_uid), valid_from=obj.valid_from)
 
     obj = Entity.objects.create(
@@ -191,6 +238,7 @@ def update_entity(
         after={"display_name": display_name, "entity_type": et.code},
         change_ts=change_ts,
     )
+    _after_transition(entity_uid, change_ts, "created")
     return UpsertResult(status="created", entity_uid=str(entity_uid), valid_from=obj.valid_from)
 
 
@@ -220,6 +268,7 @@ def close_entity(
         return "noop", None
 
     _audit_log(actor, "CLOSE_ENTITY", entity_uid, before=before, after=None, change_ts=change_ts)
+    _after_transition(entity_uid, change_ts, "closed", entity_type_code=before["entity_type"])
     return "closed", current.valid_from
 
 
@@ -307,6 +356,7 @@ def update_entity_detail(
             after={"value_json": value_json},
             change_ts=change_ts,
         )
+        _after_transition(entity_uid, change_ts, "updated", detail_code=detail_code)
         return UpsertResult(
             status="updated",
             entity_uid=str(entity_uid),
@@ -331,6 +381,7 @@ def update_entity_detail(
         after={"value_json": value_json},
         change_ts=change_ts,
     )
+    _after_transition(entity_uid, change_ts, "created", detail_code=detail_code)
     return UpsertResult(
         status="created",
         entity_uid=str(entity_uid),
@@ -373,4 +424,271 @@ def close_entity_detail(
         after=None,
         change_ts=change_ts,
     )
+    _after_transition(entity_uid, change_ts, "closed", detail_code=detail_code)
     return "closed", current.valid_from
+
+
+class BatchError(ValueError):
+    """Raised when an entity batch cannot be applied; nothing has been written."""
+
+
+class BatchConflict(BatchError):
+    """Raised when concurrent writers kept conflicting with a batch; nothing has been written."""
+
+
+# Re-diffs of a batch after a concurrent insert won a unique constraint.
+CONFLICT_RETRIES = 2
+
+
+@dataclass
+class EntityChange:
+    """Entity part of a change set; omitted fields keep their current value."""
+
+    display_name: Optional[str] = None
+    entity_type: Optional[str] = None
+    change_ts: Optional[datetime] = None
+
+
+@dataclass
+class DetailChange:
+    """One detail upsert within a change set."""
+
+    detail_code: str
+    value_json: Any
+    change_ts: Optional[datetime] = None
+
+
+@dataclass
+class ChangeSet:
+    """Entity upsert and/or detail upserts for one entity, applied together."""
+
+    entity_uid: Any
+    entity: Optional[EntityChange] = None
+    details: Sequence[DetailChange] = ()
+
+
+BatchResult = Tuple[Optional[UpsertResult], List[UpsertResult]]
+
+
+def apply_entity_changes(
+    *,
+    entity_uid,
+    entity: Optional[EntityChange] = None,
+    details: Sequence[DetailChange] = (),
+    actor: str = "api",
+) -> BatchResult:
+    """Apply an entity upsert and any number of detail upserts as one SCD2 batch.
+
+    Returns `(entity_result, detail_results)`; `entity_result` is None when no
+    entity change was requested. See `apply_changes`.
+    """
+    return apply_changes([ChangeSet(entity_uid, entity, details)], actor=actor)[0]
+
+
+def _lock_current(
+    uids: Sequence[Any], codes: Set[str]
+) -> Tuple[Dict[Any, Entity], Dict[Tuple[Any, str], EntityDetail]]:
+    """Lock the current entity rows and the current `codes` detail rows of `uids`."""
+    currents: Dict[Any, Entity] = {
+        e.entity_uid: e
+        for e in Entity.objects.filter(entity_uid__in=uids, is_current=True)
+        .select_related("entity_type")
+        .select_for_update(of=("self",))
+    }
+    open_details: Dict[Tuple[Any, str], EntityDetail] = {}
+    if codes:
+        open_details = {
+            (d.entity_uid, d.detail_code): d
+            for d in EntityDetail.objects.filter(
+                entity_uid__in=uids, is_current=True, detail_code__in=codes
+            ).select_for_update()
+        }
+    return currents, open_details
+
+
+def _close_versions(model, by_ts: Dict[datetime, List[int]]) -> None:
+    """Close the given versions of `model` with one UPDATE, whatever their timestamps.
+
+    `valid_to` is a CASE over the ids, one branch per distinct timestamp, so a
+    batch where every row carries its own `change_ts` is still a single statement.
+    """
+    if not by_ts:
+        return
+    pks = [pk for ids in by_ts.values() for pk in ids]
+    model.objects.filter(id__in=pks, is_current=True).update(
+        valid_to=Case(
+            *(When(id__in=ids, then=Value(ts)) for ts, ids in by_ts.items()),
+            output_field=DateTimeField(),
+        ),
+        is_current=False,
+    )
+
+
+def _apply_locked(
+    changesets: Sequence[ChangeSet], uids: List[Any], now: datetime, actor: str
+) -> List[BatchResult]:
+    """Lock, diff and write one attempt of `apply_changes`."""
+    currents, open_details = _lock_current(
+        uids, {d.detail_code for cs in changesets for d in cs.details}
+    )
+    type_codes = {cs.entity.entity_type for cs in changesets if cs.entity and cs.entity.entity_type}
+    types = {et.code: et for et in EntityType.objects.filter(code__in=type_codes)}
+
+    closes: Dict[Any, Dict[datetime, List[int]]] = {Entity: {}, EntityDetail: {}}
+    opens: List[Any] = []
+    audit: List[AuditLog] = []
+    transitions: List[Tuple[Any, str, datetime, Optional[str]]] = []
+    results: List[BatchResult] = []
+
+    def log(uid, action, code, before, after, change_ts):
+        if AuditLog is not None:
+            audit.append(
+                AuditLog(
+                    actor=str(actor),
+                    action=action,
+                    entity_uid=uid,
+                    detail_code=code,
+                    before=before,
+                    after=after,
+                    change_ts=change_ts,
+                )
+            )
+
+    for uid, cs in zip(uids, changesets):
+        current = currents.get(uid)
+        entity_result = None
+        if cs.entity is not None:
+            change_ts = _ensure_aware(cs.entity.change_ts) if cs.entity.change_ts else now
+            display_name = cs.entity.display_name
+            type_code = cs.entity.entity_type
+            if current is not None:
+                display_name = display_name if display_name is not None else current.display_name
+                type_code = type_code or current.entity_type.code
+            if display_name is None or not type_code:
+                raise BatchError("display_name and entity_type are required for a new entity")
+            et = types.get(type_code) or (
+                current.entity_type if current and current.entity_type.code == type_code else None
+            )
+            if et is None:
+                raise BatchError("invalid entity_type")
+
+            new_hash = _adapt_hash_for_field(Entity, "hashdiff", _entity_hash(display_name, et.id))
+            if current is not None and current.hashdiff == new_hash:
+                entity_result = UpsertResult(
+                    status="noop", entity_uid=str(uid), valid_from=current.valid_from
+                )
+            else:
+                if current is not None:
+                    closes[Entity].setdefault(change_ts, []).append(current.id)
+                    before = {
+                        "display_name": current.display_name,
+                        "entity_type": current.entity_type.code,
+                    }
+                    log(uid, "CLOSE_ENTITY", None, before, None, change_ts)
+                opens.append(
+                    Entity(
+                        entity_uid=uid,
+                        display_name=display_name,
+                        entity_type=et,
+                        valid_from=change_ts,
+                        valid_to=None,
+                        is_current=True,
+                        hashdiff=new_hash,
+                    )
+                )
+                after = {"display_name": display_name, "entity_type": et.code}
+                log(uid, "OPEN_ENTITY", None, None, after, change_ts)
+                action = "updated" if current is not None else "created"
+                transitions.append((uid, action, change_ts, None))
+                entity_result = UpsertResult(
+                    status=action, entity_uid=str(uid), valid_from=change_ts
+                )
+
+        detail_results: List[UpsertResult] = []
+        for change in cs.details:
+            code = change.detail_code
+            change_ts = _ensure_aware(change.change_ts) if change.change_ts else now
+            new_hash = _adapt_hash_for_field(
+                EntityDetail, "hashdiff", _detail_hash(change.value_json)
+            )
+            prev = open_details.get((uid, code))
+            if prev is not None and prev.hashdiff == new_hash:
+                detail_results.append(
+                    UpsertResult(
+                        status="noop",
+                        entity_uid=str(uid),
+                        detail_code=code,
+                        valid_from=prev.valid_from,
+                    )
+                )
+                continue
+            if prev is not None:
+                closes[EntityDetail].setdefault(change_ts, []).append(prev.id)
+                log(uid, "CLOSE_DETAIL", code, {"value_json": prev.value_json}, None, change_ts)
+            opens.append(
+                EntityDetail(
+                    entity_uid=uid,
+                    detail_code=code,
+                    value_json=change.value_json,
+                    valid_from=change_ts,
+                    valid_to=None,
+                    is_current=True,
+                    hashdiff=new_hash,
+                )
+            )
+            log(uid, "OPEN_DETAIL", code, None, {"value_json": change.value_json}, change_ts)
+            action = "updated" if prev is not None else "created"
+            transitions.append((uid, action, change_ts, code))
+            detail_results.append(
+                UpsertResult(
+                    status=action, entity_uid=str(uid), detail_code=code, valid_from=change_ts
+                )
+            )
+        results.append((entity_result, detail_results))
+
+    for model, by_ts in closes.items():
+        _close_versions(model, by_ts)
+    for model in (Entity, EntityDetail):
+        batch = [obj for obj in opens if isinstance(obj, model)]
+        if batch:
+            model.objects.bulk_create(batch)
+    if audit:
+        AuditLog.objects.bulk_create(audit)
+    _after_transitions(transitions)
+    return results
+
+
+@transaction.atomic
+def apply_changes(changesets: Sequence[ChangeSet], actor: str = "api") -> List[BatchResult]:
+    """Apply change sets for distinct entities with set-based SCD2 operations.
+
+    Current entity rows and the affected current detail rows are locked with
+    two `SELECT ... FOR UPDATE` queries; versions are closed with one `UPDATE`
+    per distinct `change_ts`, opened and audited with `bulk_create`, and the
+    `entity_current` documents are rewritten once per entity. Either every
+    transition commits or none does; `BatchError` is raised before any write.
+
+    A row that does not exist yet cannot be locked, so two first writes for
+    the same entity or detail can race; the loser's insert fails a unique
+    constraint, its savepoint is rolled back and the batch is re-locked and
+    re-diffed against the winner's rows (`BatchConflict` after
+    `CONFLICT_RETRIES` attempts).
+    """
+    now = timezone.now()
+    uids = [uuid.UUID(str(cs.entity_uid)) for cs in changesets]
+    if len(set(uids)) != len(uids):
+        raise BatchError("duplicate entity_uid in batch")
+    for cs in changesets:
+        codes = [d.detail_code for d in cs.details]
+        if len(set(codes)) != len(codes):
+            raise BatchError("duplicate detail_code in batch")
+
+    for attempt in range(CONFLICT_RETRIES + 1):
+        try:
+            with transaction.atomic():
+                return _apply_locked(changesets, uids, now, actor)
+        except IntegrityError as exc:
+            # A concurrent first write inserted a row that did not exist to be
+            # locked; it has committed by now, so re-lock and diff against it.
+            if attempt == CONFLICT_RETRIES:
+                raise BatchConflict("concurrent write conflict; retry the request") from exc
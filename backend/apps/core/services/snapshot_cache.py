@@ -0,0 +1,363 @@
+"""Read-through cache for current entity snapshots.
+
+Two tiers:
+    - an in-process LRU (bounded, short TTL) that answers hot entities without I/O;
+    - an optional shared Django cache alias (e.g. Redis) used across workers.
+
+Entries are invalidated by the SCD2 service via `transaction.on_commit`, so a
+write is visible to the next read in this process and in the shared tier. Other
+processes' LRUs converge within `LRU_TTL` seconds. A load that raced the write
+(started before it committed) is never served afterwards: locally it is not
+cached, and in the shared tier its entry carries an outdated epoch.
+
+Concurrent misses for the same key are coalesced: one caller loads, the others
+wait for its result (in-process, per thread or event loop), or briefly poll the
+shared tier while another worker holds the load lock (cross-process).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+_DEFAULTS = {
+    "ENABLED": True,
+    "LRU_MAXSIZE": 10000,
+    "LRU_TTL": 5,
+    "SHARED_ALIAS": None,
+    "SHARED_TTL": 300,
+    "LOAD_TIMEOUT": 2.0,
+    "KEY_PREFIX": "entity-snapshot",
+}
+
+
+def cache_settings() -> Dict[str, Any]:
+    """Return the effective `ENTITY_SNAPSHOT_CACHE` configuration with defaults applied."""
+    conf = dict(_DEFAULTS)
+    conf.update(getattr(settings, "ENTITY_SNAPSHOT_CACHE", {}) or {})
+    return conf
+
+
+class _LRU:
+    """Thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return False, None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _Load:
+    """An in-flight load; `stale` is set when the key is invalidated meanwhile."""
+
+    __slots__ = ("stale",)
+
+    def __init__(self):
+        self.stale = False
+
+
+class SnapshotCache:
+    """Read-through snapshot cache keyed by `entity_uid`.
+
+    Staleness of in-flight loads is tracked per load rather than with a
+    per-key counter, so nothing grows with the number of distinct keys.
+    Shared-tier entries are stamped with the key's shared epoch (read before
+    loading) and only served while the epoch is unchanged: `invalidate`
+    bumps it, so a load that started before a write committed can still
+    publish, but its entry is never served.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lru: Optional[_LRU] = None
+        self._inflight: Dict[str, threading.Event] = {}
+        self._afutures: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+        self._loads: Dict[str, List[_Load]] = {}
+        self._stats: Counter = Counter()
+
+    def _local(self, conf: Dict[str, Any]) -> _LRU:
+        lru = self._lru
+        if lru is None or lru.maxsize != conf["LRU_MAXSIZE"] or lru.ttl != conf["LRU_TTL"]:
+            lru = self._lru = _LRU(conf["LRU_MAXSIZE"], conf["LRU_TTL"])
+        return lru
+
+    @staticmethod
+    def _shared(conf: Dict[str, Any]):
+        alias = conf["SHARED_ALIAS"]
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def _keys(conf: Dict[str, Any], key: str) -> Tuple[str, str]:
+        base = f"{conf['KEY_PREFIX']}:{key}"
+        return base, f"{base}:epoch"
+
+    @staticmethod
+    def _epoch_ttl(conf: Dict[str, Any]) -> float:
+        # Outlives every entry stamped with an older epoch, so a reset to 0 is safe.
+        return 2 * conf["SHARED_TTL"] + conf["LOAD_TIMEOUT"]
+
+    @staticmethod
+    def _valid(got: Dict[str, Any], value_key: str, epoch_key: str) -> Any:
+        entry = got.get(value_key)
+        if not isinstance(entry, tuple) or len(entry) != 2:
+            return None
+        stamp, value = entry
+        return value if stamp == got.get(epoch_key, 0) else None
+
+    def _begin(self, key: str) -> _Load:
+        load = _Load()
+        with self._lock:
+            self._loads.setdefault(key, []).append(load)
+        return load
+
+    def _finish(self, key: str, load: _Load) -> bool:
+        """Unregister `load`; True when no invalidation happened while it ran."""
+        with self._lock:
+            loads = self._loads.get(key, [])
+            if load in loads:
+                loads.remove(load)
+            if not loads:
+                self._loads.pop(key, None)
+        return not load.stale
+
+    def get_or_load(self, entity_uid, loader: Callable[[], Any]) -> Any:
+        """Return the cached snapshot for `entity_uid`, calling `loader` on a miss.
+
+        `loader` returning None (unknown entity) is not cached.
+        """
+        conf = cache_settings()
+        if not conf["ENABLED"]:
+            return loader()
+
+        key = str(entity_uid)
+        lru = self._local(conf)
+        found, value = lru.get(key)
+        if found:
+            self._stats["hits_local"] += 1
+            return value
+
+        shared = self._shared(conf)
+        value_key, epoch_key = self._keys(conf, key)
+        if shared is not None:
+            value = self._valid(shared.get_many([value_key, epoch_key]), value_key, epoch_key)
+            if value is not None:
+                self._stats["hits_shared"] += 1
+                lru.set(key, value)
+                return value
+
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait(conf["LOAD_TIMEOUT"])
+            found, value = lru.get(key)
+            if found:
+                self._stats["hits_coalesced"] += 1
+                return value
+            self._stats["misses"] += 1
+            return loader()
+
+        load = self._begin(key)
+        try:
+            stamp = 0
+            if shared is not None:
+                value, stamp = self._await_shared(shared, value_key, epoch_key, conf)
+                if value is not None:
+                    self._stats["hits_shared"] += 1
+                    lru.set(key, value)
+                    return value
+            self._stats["misses"] += 1
+            value = loader()
+            if self._finish(key, load) and value is not None:
+                lru.set(key, value)
+                if shared is not None:
+                    shared.set(value_key, (stamp, value), conf["SHARED_TTL"])
+            return value
+        finally:
+            self._finish(key, load)
+            if shared is not None:
+                shared.delete(f"{value_key}:lock")
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    async def aget_or_load(self, entity_uid, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of `get_or_load` for async views.
+
+        Concurrent misses on the same event loop share one load through a
+        per-key `asyncio.Future`; the shared tier is used through the cache
+        backend's async API.
+        """
+        conf = cache_settings()
+        if not conf["ENABLED"]:
+            return await loader()
+
+        key = str(entity_uid)
+        lru = self._local(conf)
+        found, value = lru.get(key)
+        if found:
+            self._stats["hits_local"] += 1
+            return value
+
+        shared = self._shared(conf)
+        value_key, epoch_key = self._keys(conf, key)
+        if shared is not None:
+            got = await shared.aget_many([value_key, epoch_key])
+            value = self._valid(got, value_key, epoch_key)
+            if value is not None:
+                self._stats["hits_shared"] += 1
+                lru.set(key, value)
+                return value
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._afutures.get((loop, key))
+            leader = future is None
+            if leader:
+                future = self._afutures[(loop, key)] = loop.create_future()
+
+        if not leader:
+            try:
+                fresh, value = await asyncio.wait_for(asyncio.shield(future), conf["LOAD_TIMEOUT"])
+            except asyncio.TimeoutError:
+                fresh = False
+            if fresh:
+                self._stats["hits_coalesced"] += 1
+                return value
+            self._stats["misses"] += 1
+            return await loader()
+
+        load = self._begin(key)
+        fresh, value = False, None
+        try:
+            stamp = 0
+            if shared is not None:
+                value, stamp = await self._aawait_shared(shared, value_key, epoch_key, conf)
+                if value is not None:
+                    self._stats["hits_shared"] += 1
+                    lru.set(key, value)
+                    fresh = True
+                    return value
+            self._stats["misses"] += 1
+            value = await loader()
+            fresh = self._finish(key, load)
+            if fresh and value is not None:
+                lru.set(key, value)
+                if shared is not None:
+                    await shared.aset(value_key, (stamp, value), conf["SHARED_TTL"])
+            return value
+        finally:
+            self._finish(key, load)
+            with self._lock:
+                self._afutures.pop((loop, key), None)
+            future.set_result((fresh, value))
+            if shared is not None:
+                await shared.adelete(f"{value_key}:lock")
+
+    def _await_shared(
+        self, shared, value_key: str, epoch_key: str, conf: Dict[str, Any]
+    ) -> Tuple[Any, Any]:
+        """Take the cross-process load lock, or wait for its holder to publish a value.
+
+        Returns `(value, epoch)`; `value` is None when the caller must load,
+        stamping what it publishes with `epoch` (read before loading).
+        """
+        if not shared.add(f"{value_key}:lock", 1, conf["LOAD_TIMEOUT"]):
+            deadline = time.monotonic() + conf["LOAD_TIMEOUT"]
+            while time.monotonic() < deadline:
+                time.sleep(0.01)
+                value = self._valid(shared.get_many([value_key, epoch_key]), value_key, epoch_key)
+                if value is not None:
+                    return value, None
+        return None, shared.get(epoch_key, 0)
+
+    async def _aawait_shared(
+        self, shared, value_key: str, epoch_key: str, conf: Dict[str, Any]
+    ) -> Tuple[Any, Any]:
+        """Async variant of `_await_shared`."""
+        if not await shared.aadd(f"{value_key}:lock", 1, conf["LOAD_TIMEOUT"]):
+            deadline = time.monotonic() + conf["LOAD_TIMEOUT"]
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+                got = await shared.aget_many([value_key, epoch_key])
+                value = self._valid(got, value_key, epoch_key)
+                if value is not None:
+                    return value, None
+        return None, await shared.aget(epoch_key, 0)
+
+    def invalidate(self, entity_uid) -> None:
+        """Drop `entity_uid` from both tiers and discard in-flight loads for it."""
+        conf = cache_settings()
+        key = str(entity_uid)
+        with self._lock:
+            for load in self._loads.get(key, ()):
+                load.stale = True
+        if self._lru is not None:
+            self._lru.pop(key)
+        shared = self._shared(conf)
+        if shared is not None:
+            value_key, epoch_key = self._keys(conf, key)
+            ttl = self._epoch_ttl(conf)
+            shared.add(epoch_key, 0, ttl)
+            try:
+                shared.incr(epoch_key)
+            except ValueError:  # expired between add and incr
+                shared.set(epoch_key, 1, ttl)
+            shared.touch(epoch_key, ttl)
+            shared.delete(value_key)
+        self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this process."""
+        out = {
+            name: self._stats.get(name, 0)
+            for name in ("hits_local", "hits_shared", "hits_coalesced", "misses", "invalidations")
+        }
+        out["size"] = len(self._lru) if self._lru is not None else 0
+        return out
+
+    def clear(self) -> None:
+        """Reset the local tier and counters (tests, admin tooling)."""
+        with self._lock:
+            self._lru = None
+            self._loads.clear()
+            self._stats.clear()
+
+
+snapshot_cache = SnapshotCache()
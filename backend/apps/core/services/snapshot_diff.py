@@ -0,0 +1,142 @@
+"""Net change between two as-of states.
+
+Only logical entities and details touched by a version opened or closed in
+`(t1, t2]` can differ, so candidates are found with the `valid_from` /
+`valid_to` range indexes (entity candidates as a UNION of one range query per
+index and table). For each candidate the version alive at `t1` and
+at `t2` is looked up with correlated subqueries and compared by `hashdiff` in
+SQL; anything whose hash is the same on both sides (including churn that was
+reverted inside the window) is dropped by the database.
+
+Two result streams (entities, details), both ordered by `entity_uid`, are
+merged lazily, so memory is bounded by `chunk_size` rather than the window.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+from django.db.models import F, OuterRef, Q, QuerySet, Subquery
+
+from apps.core.models import Entity, EntityDetail
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+def _touched(t1: datetime, t2: datetime) -> Q:
+    return Q(valid_from__gt=t1, valid_from__lte=t2) | Q(valid_to__gt=t1, valid_to__lte=t2)
+
+
+def _alive_at(qs: QuerySet, ts: datetime, column: str) -> Subquery:
+    return Subquery(
+        qs.filter(valid_from__lte=ts)
+        .filter(Q(valid_to__isnull=True) | Q(valid_to__gt=ts))
+        .order_by("-valid_from")
+        .values(column)[:1]
+    )
+
+
+def _differs() -> Q:
+    """`h1 IS DISTINCT FROM h2`, written portably."""
+    return (
+        Q(h1__isnull=True, h2__isnull=False)
+        | Q(h1__isnull=False, h2__isnull=True)
+        | (Q(h1__isnull=False, h2__isnull=False) & ~Q(h1=F("h2")))
+    )
+
+
+def _candidates(t1: datetime, t2: datetime) -> QuerySet:
+    """`entity_uid`s with an entity or detail version opened or closed in `(t1, t2]`.
+
+    A UNION of one range query per index: OR-ing the detail side in as an
+    IN-subquery would leave PostgreSQL no index to drive the entity scan with.
+    """
+    opened = Q(valid_from__gt=t1, valid_from__lte=t2)
+    closed = Q(valid_to__gt=t1, valid_to__lte=t2)
+    entities = Entity.objects.values("entity_uid")
+    details = EntityDetail.objects.values("entity_uid")
+    return entities.filter(opened).union(
+        entities.filter(closed), details.filter(opened), details.filter(closed)
+    )
+
+
+def entity_changes(t1: datetime, t2: datetime) -> QuerySet:
+    """Logical entities whose entity row or any detail changed in `(t1, t2]`."""
+    versions = Entity.objects.filter(entity_uid=OuterRef("entity_uid"))
+    # One row per candidate (its latest version by t2) instead of DISTINCT over
+    # all versions; an entity with none has no state at t1 or t2 either.
+    anchor = Subquery(versions.filter(valid_from__lte=t2).order_by("-valid_from").values("id")[:1])
+    return (
+        Entity.objects.filter(entity_uid__in=_candidates(t1, t2), id=anchor)
+        .values("entity_uid")
+        .annotate(
+            h1=_alive_at(versions, t1, "hashdiff"),
+            h2=_alive_at(versions, t2, "hashdiff"),
+            name1=_alive_at(versions, t1, "display_name"),
+            name2=_alive_at(versions, t2, "display_name"),
+            type1=_alive_at(versions, t1, "entity_type__code"),
+            type2=_alive_at(versions, t2, "entity_type__code"),
+        )
+        .exclude(h1__isnull=True, h2__isnull=True)
+        .order_by("entity_uid")
+    )
+
+
+def detail_changes(t1: datetime, t2: datetime) -> QuerySet:
+    """`(entity_uid, detail_code)` pairs whose alive version differs between t1 and t2."""
+    versions = EntityDetail.objects.filter(
+        entity_uid=OuterRef("entity_uid"), detail_code=OuterRef("detail_code")
+    )
+    return (
+        EntityDetail.objects.filter(_touched(t1, t2))
+        .values("entity_uid", "detail_code")
+        .distinct()
+        .annotate(h1=_alive_at(versions, t1, "hashdiff"), h2=_alive_at(versions, t2, "hashdiff"))
+        .filter(_differs())
+        .order_by("entity_uid", "detail_code")
+    )
+
+
+def _change(h1: Any, h2: Any) -> str:
+    if h1 is None:
+        return ADDED
+    if h2 is None:
+        return REMOVED
+    return CHANGED
+
+
+def net_changes(t1: datetime, t2: datetime, chunk_size: int = 2000) -> Iterator[Dict[str, Any]]:
+    """Yield one record per entity whose state at `t2` differs from `t1`, by `entity_uid`.
+
+    Record: `{"entity_uid", "status": added|removed|changed, "fields": [...],
+    "details": [{"detail_code", "change"}]}`.
+    """
+    details = detail_changes(t1, t2).iterator(chunk_size=chunk_size)
+    pending = next(details, None)
+
+    for ent in entity_changes(t1, t2).iterator(chunk_size=chunk_size):
+        uid = ent["entity_uid"]
+        codes: List[Dict[str, str]] = []
+        while pending is not None and pending["entity_uid"] <= uid:
+            if pending["entity_uid"] == uid:
+                codes.append(
+                    {
+                        "detail_code": pending["detail_code"],
+                        "change": _change(pending["h1"], pending["h2"]),
+                    }
+                )
+            pending = next(details, None)
+
+        status = _change(ent["h1"], ent["h2"])
+        fields: List[str] = []
+        if status == CHANGED and ent["h1"] != ent["h2"]:
+            if ent["name1"] != ent["name2"]:
+                fields.append("display_name")
+            if ent["type1"] != ent["type2"]:
+                fields.append("entity_type")
+        if status == CHANGED and not fields and not codes:
+            continue
+        yield {"entity_uid": uid, "status": status, "fields": fields, "details": codes}
@@ -0,0 +1,406 @@
+"""Durable queue for asynchronous SCD2 writes.
+
+In async mode a write endpoint validates the request, appends the change set
+to `write_queue` and answers 202 with a ticket. `drain` (run by
+`manage.py process_write_queue`) claims pending rows with
+`SELECT ... FOR UPDATE SKIP LOCKED` and applies them with `apply_changes`.
+
+Ordering per entity: only the oldest pending row of an entity can be claimed
+(a "head"); once a worker holds a head, the entity's later rows are not heads
+for anyone else until that transaction commits, so the worker may take them
+too and apply them in id order. Rows are applied in rounds (the n-th pending
+change of every claimed entity per round), each round as one set-based batch.
+
+Coalescing (`WRITE_COALESCING`, opt-in per detail code or entity type): a
+write touching a coalescable key is not claimable until its window has
+passed. When the worker then sees several updates to the same key that
+arrived within one window, only the last (with earlier entity fields merged
+in) is applied; the others are reported as "skipped" in their tickets and as
+`SKIP_ENTITY` / `SKIP_DETAIL` rows in the audit log, without opening versions.
+If that last write fails, the batch is redone without letting it supersede
+anything, so the earlier updates still land.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.models import EntityCurrent, QueuedWrite
+from apps.core.services.scd2 import (
+    BatchError,
+    BatchResult,
+    ChangeSet,
+    DetailChange,
+    EntityChange,
+    apply_changes,
+)
+
+try:
+    from apps.audit.models import AuditLog
+except Exception:
+    AuditLog = None
+
+
+def queue_settings() -> Dict[str, Any]:
+    """Return the effective `WRITE_QUEUE` configuration with defaults applied."""
+    conf = {"ENABLED": True, "BATCH_SIZE": 200, "POLL_INTERVAL": 1.0, "RETENTION_DAYS": 7}
+    conf.update(getattr(settings, "WRITE_QUEUE", {}) or {})
+    return conf
+
+
+def coalescing_settings() -> Dict[str, Any]:
+    """Return the effective `WRITE_COALESCING` windows (seconds) with defaults applied."""
+    conf = {"DETAIL_CODES": {}, "ENTITY_TYPES": {}}
+    conf.update(getattr(settings, "WRITE_COALESCING", {}) or {})
+    return conf
+
+
+def coalesce_window(
+    detail_code: Optional[str], entity_type: Optional[str], conf: Optional[Dict] = None
+) -> float:
+    """Window for one key: the detail code's own setting, else its entity type's."""
+    conf = conf or coalescing_settings()
+    if detail_code is not None and detail_code in conf["DETAIL_CODES"]:
+        return float(conf["DETAIL_CODES"][detail_code])
+    return float(conf["ENTITY_TYPES"].get(entity_type or "", 0))
+
+
+def wants_async(request) -> bool:
+    """True when the client sent `Prefer: respond-async` and the queue is enabled."""
+    prefer = request.headers.get("Prefer", "")
+    tokens = {part.split("=")[0].strip().lower() for part in prefer.split(",")}
+    return "respond-async" in tokens and bool(queue_settings()["ENABLED"])
+
+
+def _ts(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def encode(cs: ChangeSet, default_ts) -> Dict[str, Any]:
+    """Serialize a change set; missing `change_ts` values become `default_ts`.
+
+    Business time is fixed when the write is accepted, not when it is applied.
+    """
+    entity = None
+    if cs.entity is not None:
+        entity = {
+            "display_name": cs.entity.display_name,
+            "entity_type": cs.entity.entity_type,
+            "change_ts": _ts(cs.entity.change_ts or default_ts),
+        }
+    details = [
+        {
+            "detail_code": d.detail_code,
+            "value_json": d.value_json,
+            "change_ts": _ts(d.change_ts or default_ts),
+        }
+        for d in cs.details
+    ]
+    return {"entity": entity, "details": details}
+
+
+def decode(entity_uid, payload: Dict[str, Any]) -> ChangeSet:
+    """Inverse of `encode`."""
+    entity = payload.get("entity")
+    return ChangeSet(
+        entity_uid,
+        (
+            EntityChange(
+                entity["display_name"], entity["entity_type"], parse_datetime(entity["change_ts"])
+            )
+            if entity is not None
+            else None
+        ),
+        [
+            DetailChange(d["detail_code"], d["value_json"], parse_datetime(d["change_ts"]))
+            for d in payload.get("details", [])
+        ],
+    )
+
+
+def _entity_types(uids) -> Dict[Any, str]:
+    return dict(
+        EntityCurrent.objects.filter(entity_uid__in=uids).values_list(
+            "entity_uid", "entity_type_code"
+        )
+    )
+
+
+def enqueue(cs: ChangeSet, actor: str = "api") -> QueuedWrite:
+    """Append a validated change set to the queue and return its row.
+
+    A write touching a coalescable key is held back for the longest window
+    among its keys.
+    """
+    now = timezone.now()
+    not_before = None
+    conf = coalescing_settings()
+    if conf["DETAIL_CODES"] or conf["ENTITY_TYPES"]:
+        type_code = (cs.entity and cs.entity.entity_type) or _entity_types([cs.entity_uid]).get(
+            cs.entity_uid
+        )
+        keys = ([None] if cs.entity is not None else []) + [d.detail_code for d in cs.details]
+        window = max((coalesce_window(code, type_code, conf) for code in keys), default=0)
+        if window > 0:
+            not_before = now + timedelta(seconds=window)
+    return QueuedWrite.objects.create(
+        entity_uid=cs.entity_uid,
+        payload=encode(cs, now),
+        actor=str(actor),
+        not_before=not_before,
+    )
+
+
+def describe(write: QueuedWrite) -> Dict[str, Any]:
+    """Client-facing ticket status."""
+    return {
+        "ticket": str(write.ticket),
+        "status": write.status,
+        "entity_uid": str(write.entity_uid),
+        "enqueued_at": write.enqueued_at,
+        "processed_at": write.processed_at,
+        "result": write.result,
+        "error": write.error or None,
+    }
+
+
+def _outcome(result: BatchResult) -> Dict[str, Any]:
+    entity_result, detail_results = result
+    return {
+        "entity": (
+            {"status": entity_result.status, "valid_from": _ts(entity_result.valid_from)}
+            if entity_result
+            else None
+        ),
+        "details": [
+            {"detail_code": r.detail_code, "status": r.status, "valid_from": _ts(r.valid_from)}
+            for r in detail_results
+        ],
+    }
+
+
+def _claim(batch_size: int) -> List[QueuedWrite]:
+    """Lock up to `batch_size` pending rows, whole entity prefixes in id order.
+
+    Heads still inside their coalescing window are left alone (and with them
+    the rest of their entity); followers are taken regardless so they can be
+    merged into the head.
+    """
+    earlier = QueuedWrite.objects.filter(
+        entity_uid=OuterRef("entity_uid"),
+        status=QueuedWrite.STATUS_PENDING,
+        id__lt=OuterRef("id"),
+    )
+    heads = list(
+        QueuedWrite.objects.filter(status=QueuedWrite.STATUS_PENDING)
+        .filter(Q(not_before__isnull=True) | Q(not_before__lte=timezone.now()))
+        .filter(~Exists(earlier))
+        .order_by("id")
+        .select_for_update(skip_locked=True)[:batch_size]
+    )
+    if not heads or len(heads) >= batch_size:
+        return heads
+    followers = list(
+        QueuedWrite.objects.filter(
+            status=QueuedWrite.STATUS_PENDING, entity_uid__in={w.entity_uid for w in heads}
+        )
+        .exclude(id__in=[w.id for w in heads])
+        .order_by("id")
+        .select_for_update()[: batch_size - len(heads)]
+    )
+    return heads + followers
+
+
+def _coalesce(
+    writes: List[QueuedWrite], changesets: Dict[int, ChangeSet], keep: Set[int]
+) -> Dict[int, list]:
+    """Drop changes superseded within their key's window, in place.
+
+    `writes` must be in id order. Writes in `keep` never supersede anything.
+    Returns `{write_id: [skipped entries]}`; entity fields of a dropped entity
+    change are carried into the next one.
+    """
+    conf = coalescing_settings()
+    if not (conf["DETAIL_CODES"] or conf["ENTITY_TYPES"]):
+        return {}
+    types = _entity_types({w.entity_uid for w in writes})
+    keyed: Dict[tuple, list] = defaultdict(list)
+    for w in writes:
+        cs = changesets[w.id]
+        if cs.entity is not None:
+            types[w.entity_uid] = cs.entity.entity_type or types.get(w.entity_uid)
+            keyed[(w.entity_uid, None)].append((w, cs.entity))
+        for change in cs.details:
+            keyed[(w.entity_uid, change.detail_code)].append((w, change))
+
+    skipped: Dict[int, list] = defaultdict(list)
+    for (uid, code), items in keyed.items():
+        window = coalesce_window(code, types.get(uid), conf)
+        if window <= 0 or len(items) < 2:
+            continue
+        start = items[0][0].enqueued_at
+        for (w, change), (later, later_change) in zip(items, items[1:]):
+            if (later.enqueued_at - start).total_seconds() > window:
+                start = later.enqueued_at
+                continue
+            if later.id in keep:
+                continue
+            cs = changesets[w.id]
+            entry = {"status": "skipped", "superseded_by": str(later.ticket)}
+            if code is None:
+                later_change.display_name = later_change.display_name or change.display_name
+                later_change.entity_type = later_change.entity_type or change.entity_type
+                cs.entity = None
+                skipped[w.id].append(("entity", change, entry))
+            else:
+                cs.details = [d for d in cs.details if d is not change]
+                skipped[w.id].append(("detail", change, {"detail_code": code, **entry}))
+    return skipped
+
+
+def _skip_audit(writes: List[QueuedWrite], skipped: Dict[int, list]) -> None:
+    if AuditLog is None:
+        return
+    rows = [
+        AuditLog(
+            actor=w.actor,
+            action="SKIP_ENTITY" if kind == "entity" else "SKIP_DETAIL",
+            entity_uid=w.entity_uid,
+            detail_code=entry.get("detail_code"),
+            after=(
+                {"display_name": change.display_name, "entity_type": change.entity_type}
+                if kind == "entity"
+                else {"value_json": change.value_json}
+            ),
+            change_ts=change.change_ts,
+        )
+        for w in writes
+        for kind, change, entry in skipped.get(w.id, ())
+    ]
+    AuditLog.objects.bulk_create(rows)
+
+
+def _apply(
+    writes: List[QueuedWrite], changesets: Dict[int, ChangeSet], skipped: Dict[int, list], now
+) -> None:
+    """Record coalesced changes, then apply what is left of each write."""
+    for w in writes:
+        w.processed_at = now
+        if skipped.get(w.id):
+            w.result = {"entity": None, "details": []}
+            for kind, _, entry in skipped[w.id]:
+                if kind == "entity":
+                    w.result["entity"] = entry
+                else:
+                    w.result["details"].append(entry)
+        cs = changesets[w.id]
+        if cs.entity is None and not cs.details:
+            w.status = QueuedWrite.STATUS_SKIPPED
+    _apply_group([w for w in writes if w.status != QueuedWrite.STATUS_SKIPPED], changesets)
+
+
+def _apply_group(writes: List[QueuedWrite], changesets: Dict[int, ChangeSet]) -> None:
+    """Apply writes for distinct entities; on failure retry them one by one."""
+    for actor, group in groupby(sorted(writes, key=lambda w: w.actor), key=lambda w: w.actor):
+        group = list(group)
+        try:
+            results = apply_changes([changesets[w.id] for w in group], actor=actor)
+        except (BatchError, DatabaseError) as exc:
+            if len(group) > 1:
+                for w in group:
+                    _apply_group([w], changesets)
+                continue
+            group[0].status, group[0].error = QueuedWrite.STATUS_FAILED, str(exc)
+        else:
+            for w, result in zip(group, results):
+                outcome, prior = _outcome(result), w.result or {"entity": None, "details": []}
+                w.status = QueuedWrite.STATUS_APPLIED
+                w.result = {
+                    "entity": outcome["entity"] or prior["entity"],
+                    "details": outcome["details"] + prior["details"],
+                }
+
+
+def _apply_rounds(writes: List[QueuedWrite], keep: Set[int]) -> Tuple[Dict[int, list], Set[int]]:
+    """Coalesce and apply `writes`; returns the skipped entries and failed survivors.
+
+    A failed survivor is a write that failed after changes of earlier writes
+    were dropped in its favour.
+    """
+    for w in writes:
+        w.status, w.result, w.error, w.processed_at = QueuedWrite.STATUS_PENDING, None, "", None
+    changesets = {w.id: decode(w.entity_uid, w.payload) for w in writes}
+    skipped = _coalesce(writes, changesets, keep)
+    rounds: Dict[int, List[QueuedWrite]] = defaultdict(list)
+    seen: Dict[Any, int] = defaultdict(int)
+    for w in writes:
+        rounds[seen[w.entity_uid]].append(w)
+        seen[w.entity_uid] += 1
+    now = timezone.now()
+    for n in sorted(rounds):
+        _apply(rounds[n], changesets, skipped, now)
+    failed = {str(w.ticket): w.id for w in writes if w.status == QueuedWrite.STATUS_FAILED}
+    survivors = {
+        failed[entry["superseded_by"]]
+        for entries in skipped.values()
+        for _, _, entry in entries
+        if entry["superseded_by"] in failed
+    }
+    return skipped, survivors
+
+
+def process_batch(batch_size: Optional[int] = None) -> int:
+    """Claim and apply one batch in a single transaction; returns rows processed.
+
+    If a write that superseded others fails, the batch is rolled back to a
+    savepoint and applied again with that write excluded from coalescing, so
+    the changes it would have replaced are applied instead of being lost.
+    """
+    batch_size = batch_size or queue_settings()["BATCH_SIZE"]
+    with transaction.atomic():
+        writes = sorted(_claim(batch_size), key=lambda w: w.id)
+        if not writes:
+            return 0
+        keep: Set[int] = set()
+        while True:
+            sid = transaction.savepoint()
+            skipped, failed_survivors = _apply_rounds(writes, keep)
+            if not failed_survivors:
+                transaction.savepoint_commit(sid)
+                break
+            transaction.savepoint_rollback(sid)
+            keep |= failed_survivors
+        _skip_audit(writes, skipped)
+        QueuedWrite.objects.bulk_update(writes, ["status", "result", "error", "processed_at"])
+    return len(writes)
+
+
+def drain(batch_size: Optional[int] = None) -> int:
+    """Process batches until no claimable rows remain; returns rows processed."""
+    total = 0
+    while True:
+        n = process_batch(batch_size)
+        if not n:
+            return total
+        total += n
+
+
+def purge_processed(retention_days: Optional[int] = None) -> int:
+    """Delete processed rows older than the retention window."""
+    days = queue_settings()["RETENTION_DAYS"] if retention_days is None else retention_days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = (
+        QueuedWrite.objects.exclude(status=QueuedWrite.STATUS_PENDING)
+        .filter(processed_at__lt=cutoff)
+        .delete()
+    )
+    return deleted
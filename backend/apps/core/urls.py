@@ -1,24 +1,44 @@
 from django.urls import path
 
+from apps.core.async_views import async_reads, entity_details, entity_history, entity_retrieve
+from apps.core.streams import change_stream
 from apps.core.views import (
+    ChangesFeed,
     DiffView,
     EntitiesAsOf,
+    EntitiesBatchGet,
+    EntitiesBulkUpsert,
     EntitiesListCreate,
+    EntitiesQuery,
     EntityDetailListCreate,
     EntityDetailRetrievePatchDelete,
     EntityHistory,
     EntityRetrievePatch,
+    SnapshotCacheStats,
+    SnapshotDiff,
+    WriteStatus,
 )
 
 app_name = "core"
 
 urlpatterns = [
     path("entities", EntitiesListCreate.as_view(), name="entities_list_create"),
-    path("entities/<uuid:entity_uid>", EntityRetrievePatch.as_view(), name="entity_retrieve_patch"),
-    path("entities/<uuid:entity_uid>/history", EntityHistory.as_view(), name="entities_history"),
+    path("entities/batch", EntitiesBatchGet.as_view(), name="entities_batch_get"),
+    path("entities/bulk", EntitiesBulkUpsert.as_view(), name="entities_bulk_upsert"),
+    path("entities/query", EntitiesQuery.as_view(), name="entities_query"),
+    path(
+        "entities/<uuid:entity_uid>",
+        async_reads(EntityRetrievePatch, entity_retrieve),
+        name="entity_retrieve_patch",
+    ),
+    path(
+        "entities/<uuid:entity_uid>/history",
+        async_reads(EntityHistory, entity_history),
+        name="entities_history",
+    ),
     path(
         "entities/<uuid:entity_uid>/details",
-        EntityDetailListCreate.as_view(),
+        async_reads(EntityDetailListCreate, entity_details),
         name="entity_detail_list_create",
     ),
     path(
@@ -28,4 +48,9 @@ urlpatterns = [
     ),
     path("entities-asof", EntitiesAsOf.as_view(), name="entities_asof"),
     path("diff", DiffView.as_view(), name="diff"),
+    path("snapshot-diff", SnapshotDiff.as_view(), name="snapshot_diff"),
+    path("changes", ChangesFeed.as_view(), name="changes_feed"),
+    path("changes/stream", change_stream, name="changes_stream"),
+    path("writes/<uuid:ticket>", WriteStatus.as_view(), name="write_status"),
+    path("cache/stats", SnapshotCacheStats.as_view(), name="snapshot_cache_stats"),
 ]
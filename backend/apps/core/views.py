@@ -1,4 +1,9 @@
+import io
+import uuid
+
+from asgiref.sync import async_to_sync
 from django.db.models import F, Q
+from django.urls import reverse
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from drf_spectacular.utils import (
@@ -9,22 +14,126 @@ from drf_spectacular.utils import (
     inline_serializer,
 )
 from rest_framework import serializers, status
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAdminUser, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.core.models import Entity, EntityDetail, EntityType
+from apps.common.cursors import (
+    InvalidCursor,
+    cursor_datetime,
+    decode_cursor,
+    encode_cursor,
+    page_size,
+)
+from apps.common.streaming import ndjson_response, wants_stream
+from apps.core import search
+from apps.core.async_views import entity_details, entity_history, entity_retrieve
+from apps.core.detail_filters import (
+    DetailPredicate,
+    matching_entity_uids,
+    parse_detail_params,
+)
+from apps.core.entity_query import QueryError, run_query
+from apps.core.fieldsets import apply_to_current, parse_fieldset, shape
+from apps.core.idempotency import IDEMPOTENCY_PARAMETER, idempotent
+from apps.core.models import EntityCurrent, EntityDetail, QueuedWrite
 from apps.core.serializers import (
+    EntityCurrentSerializer,
     EntityDetailUpsertSerializer,
-    EntitySnapshotSerializer,
+    EntityPatchSerializer,
     EntityUpsertSerializer,
 )
+from apps.core.services.asof import details_at, entities_as_of, parse_as_of
+from apps.core.services.bulk import bulk_settings, bulk_upsert, read_lines
+from apps.core.services.changes import changes_since, feed_settings, wait_for_changes
 from apps.core.services.scd2 import (
+    BatchConflict,
+    BatchError,
+    ChangeSet,
+    DetailChange,
+    EntityChange,
+    apply_entity_changes,
     close_entity,
     close_entity_detail,
-    update_entity,
-    update_entity_detail,
 )
+from apps.core.services.snapshot_cache import snapshot_cache
+from apps.core.services.snapshot_diff import net_changes
+from apps.core.services.write_queue import describe, enqueue, wants_async
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        description="Comma-separated snapshot keys to return, e.g. entity_uid,display_name",
+    ),
+    OpenApiParameter(
+        "include",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        description="details, or details:CODE,... to return only those detail codes",
+    ),
+]
+
+AS_OF_PARAMETER = OpenApiParameter(
+    "as_of",
+    OpenApiTypes.DATETIME,
+    OpenApiParameter.QUERY,
+    description="Return the state at this instant instead of the current one",
+)
+
+PREFER_PARAMETER = OpenApiParameter(
+    "Prefer",
+    OpenApiTypes.STR,
+    OpenApiParameter.HEADER,
+    description="respond-async: validate, queue the write and answer 202 with a ticket",
+)
+
+
+def _actor(request) -> str:
+    return str(request.user if request.user.is_authenticated else "api")
+
+
+def _batch_error(exc: BatchError) -> Response:
+    """400 for an invalid batch, 409 when concurrent writers kept conflicting with it."""
+    return Response({"detail": str(exc)}, status=409 if isinstance(exc, BatchConflict) else 400)
+
+
+def _validated_details(entity_uid, items) -> list:
+    """Validate a list of detail payloads up front; raises ValidationError."""
+    if not isinstance(items, list):
+        raise serializers.ValidationError({"details": "expected a list"})
+    serializer = EntityDetailUpsertSerializer(
+        data=[{**d, "entity_uid": entity_uid} if isinstance(d, dict) else d for d in items],
+        many=True,
+    )
+    serializer.is_valid(raise_exception=True)
+    return [
+        DetailChange(v["detail_code"], v["value_json"], v.get("change_ts"))
+        for v in serializer.validated_data
+    ]
+
+
+def _accepted(request, changeset: ChangeSet) -> Response:
+    """Queue a validated change set and answer 202 with its ticket."""
+    write = enqueue(changeset, actor=_actor(request))
+    response = Response(describe(write), status=status.HTTP_202_ACCEPTED)
+    response["Preference-Applied"] = "respond-async"
+    response["Location"] = reverse("core:write_status", args=[write.ticket])
+    return response
+
+
+def _entity_out(res) -> dict:
+    return {"status": res.status, "entity_uid": res.entity_uid, "valid_from": res.valid_from}
+
+
+def _detail_out(res) -> dict:
+    return {
+        "status": res.status,
+        "entity_uid": res.entity_uid,
+        "detail_code": res.detail_code,
+        "valid_from": res.valid_from,
+    }
 
 
 @extend_schema_view(
@@ -33,24 +142,44 @@ from apps.core.services.scd2 import (
         summary="List current entities",
         parameters=[
             OpenApiParameter("q", OpenApiTypes.STR, OpenApiParameter.QUERY),
+            OpenApiParameter(
+                "match",
+                OpenApiTypes.STR,
+                OpenApiParameter.QUERY,
+                enum=["contains", "fuzzy"],
+                description="contains (default) or fuzzy trigram search ranked by similarity",
+            ),
+            OpenApiParameter("min_similarity", OpenApiTypes.FLOAT, OpenApiParameter.QUERY),
             OpenApiParameter("type", OpenApiTypes.STR, OpenApiParameter.QUERY),
             OpenApiParameter("detail_code", OpenApiTypes.STR, OpenApiParameter.QUERY),
             OpenApiParameter("detail_value", OpenApiTypes.STR, OpenApiParameter.QUERY),
+            OpenApiParameter(
+                "detail[CODE.path__op]",
+                OpenApiTypes.STR,
+                OpenApiParameter.QUERY,
+                description=(
+                    "Typed filter on current detail values; op is one of "
+                    "exact, ne, contains, icontains, gt, gte, lt, lte, in, exists"
+                ),
+            ),
+            *FIELDSET_PARAMETERS,
         ],
-        responses={200: EntitySnapshotSerializer(many=True)},
+        responses={200: EntityCurrentSerializer(many=True)},
     ),
     post=extend_schema(
         tags=["entities"],
         summary="Create entity (SCD2 open)",
+        parameters=[IDEMPOTENCY_PARAMETER, PREFER_PARAMETER],
         request=EntityUpsertSerializer,
-        responses={201: OpenApiTypes.OBJECT},
+        responses={201: OpenApiTypes.OBJECT, 202: OpenApiTypes.OBJECT},
     ),
 )
 class EntitiesListCreate(APIView):
     """Collection endpoint for entities.
 
     GET returns up to 200 current entities with optional filtering by name,
-    type code, and presence/value of a specific detail.
+    type code, and presence/value of a specific detail. `match=fuzzy` ranks
+    names by trigram similarity to `q` instead of substring matching.
 
     POST performs an SCD2 idempotent upsert for the entity and, optionally,
     for a list of details in the `details` array.
@@ -59,14 +188,24 @@ class EntitiesListCreate(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get(self, request):
-        queryset = Entity.objects.filter(is_current=True)
+        try:
+            fieldset = parse_fieldset(request.query_params)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=400)
+        queryset = apply_to_current(EntityCurrent.objects.filter(is_current=True), fieldset)
         q = request.query_params.get("q")
-        if q:
-            queryset = queryset.filter(display_name__icontains=q)
+        match = request.query_params.get("match", "contains")
+        if match not in search.MODES:
+            return Response({"detail": f"match must be one of {', '.join(search.MODES)}"}, 400)
 
         type_code = request.query_params.get("type")
         if type_code:
-            queryset = queryset.filter(entity_type__code=type_code)
+            queryset = queryset.filter(entity_type_code=type_code)
+
+        try:
+            predicates = parse_detail_params(request.query_params)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=400)
 
         detail_code = request.query_params.get("detail_code")
         detail_value = request.query_params.get("detail_value")
@@ -77,45 +216,53 @@ class EntitiesListCreate(APIView):
                 is_current=True,
             ).values("entity_uid")
             if detail_value is not None:
-                queryset = queryset.filter(
-                    entity_uid__in=EntityDetail.objects.filter(
-                        detail_code=detail_code, is_current=True, value_json=detail_value
-                    ).values("entity_uid")
-                )
+                predicates.append(DetailPredicate(detail_code=detail_code, value=detail_value))
             else:
                 queryset = queryset.filter(entity_uid__in=sub)
+        for predicate in predicates:
+            queryset = queryset.filter(entity_uid__in=matching_entity_uids(predicate))
 
-        data = EntitySnapshotSerializer(queryset.order_by("display_name")[:200], many=True).data
+        if q and match == "fuzzy":
+            try:
+                threshold = float(
+                    request.query_params.get("min_similarity", search.default_threshold())
+                )
+            except ValueError:
+                return Response({"detail": "invalid min_similarity"}, status=400)
+            rows = search.fuzzy_search(queryset, q, threshold, limit=200)
+        else:
+            if q:
+                queryset = search.filter_contains(queryset, q)
+            rows = queryset.order_by("display_name")[:200]
+
+        data = EntityCurrentSerializer(rows, many=True, context={"fieldset": fieldset}).data
         return Response(data)
 
+    @idempotent
     def post(self, request):
-        """Create entity and optional details via SCD2 upsert semantics."""
-        serializer = EntityUpsertSerializer(
-            data=request.data,
-            context={"actor": request.user if request.user.is_authenticated else "api"},
-        )
+        """Create entity and optional details in one SCD2 batch."""
+        serializer = EntityUpsertSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        entity_result = serializer.save()
-
+        data = serializer.validated_data
         details = request.data.get("details")
-        detail_results = []
-        if isinstance(details, list):
-            for d in details:
-                detail_serializer = EntityDetailUpsertSerializer(
-                    data={
-                        "entity_uid": serializer.validated_data["entity_uid"],
-                        "detail_code": d["detail_code"],
-                        "value_json": d["value_json"],
-                        "change_ts": d.get("change_ts"),
-                    },
-                    context={"actor": request.user if request.user.is_authenticated else "api"},
-                )
-                detail_serializer.is_valid(raise_exception=True)
-                detail_results.append(detail_serializer.save())
+        changes = [] if details is None else _validated_details(data["entity_uid"], details)
+        entity = EntityChange(data["display_name"], data["entity_type"].code, data.get("change_ts"))
+        if wants_async(request):
+            return _accepted(request, ChangeSet(data["entity_uid"], entity, changes))
+
+        try:
+            entity_result, detail_results = apply_entity_changes(
+                entity_uid=data["entity_uid"],
+                entity=entity,
+                details=changes,
+                actor=_actor(request),
+            )
+        except BatchError as exc:
+            return _batch_error(exc)
 
-        out = {"entity": entity_result}
+        out = {"entity": _entity_out(entity_result)}
         if detail_results:
-            out["details"] = detail_results
+            out["details"] = [_detail_out(r) for r in detail_results]
         return Response(out, status=status.HTTP_201_CREATED)
 
 
@@ -123,18 +270,23 @@ class EntitiesListCreate(APIView):
     get=extend_schema(
         tags=["entities"],
         summary="Get current snapshot by entity_uid",
-        responses={200: EntitySnapshotSerializer},
+        parameters=[*FIELDSET_PARAMETERS, AS_OF_PARAMETER],
+        responses={200: EntityCurrentSerializer},
     ),
     patch=extend_schema(
         tags=["entities"],
         summary="Patch entity with SCD2 transition",
+        parameters=[IDEMPOTENCY_PARAMETER, PREFER_PARAMETER],
         request=EntityUpsertSerializer,
-        responses={200: OpenApiTypes.OBJECT},
+        responses={200: OpenApiTypes.OBJECT, 202: OpenApiTypes.OBJECT},
     ),
     delete=extend_schema(
         tags=["entities"],
         summary="Close current entity version (soft delete)",
-        parameters=[OpenApiParameter("change_ts", OpenApiTypes.DATETIME, OpenApiParameter.QUERY)],
+        parameters=[
+            OpenApiParameter("change_ts", OpenApiTypes.DATETIME, OpenApiParameter.QUERY),
+            IDEMPOTENCY_PARAMETER,
+        ],
         responses={200: OpenApiTypes.OBJECT},
     ),
 )
@@ -145,65 +297,35 @@ class EntityRetrievePatch(APIView):
 
     def get(self, request, entity_uid):
         """Return the current entity snapshot or 404 if none exists."""
-        obj = Entity.objects.filter(entity_uid=entity_uid, is_current=True).first()
-        if not obj:
-            return Response({"detail": "not found"}, status=404)
-        return Response(EntitySnapshotSerializer(obj).data)
+        return async_to_sync(entity_retrieve)(request, entity_uid)
 
+    @idempotent
     def patch(self, request, entity_uid):
-        """Apply SCD2 upsert to entity and optional details."""
-        data = request.data.copy()
-        data["entity_uid"] = str(entity_uid)
-
-        if (
-            "entity_type" in data
-            and not EntityType.objects.filter(code=data["entity_type"]).exists()
-        ):
-            return Response({"detail": "invalid entity_type"}, status=400)
-
-        result = {}
-        entity_result = {}
-
+        """Apply entity and detail changes atomically; everything is validated first."""
+        data = request.data
+        entity = None
         if set(data.keys()) & {"display_name", "entity_type", "change_ts"}:
-            if "entity_type" in data:
-                et = EntityType.objects.get(code=data["entity_type"])
-            else:
-                et = Entity.objects.get(entity_uid=entity_uid, is_current=True).entity_type
-
-            serializer = EntityUpsertSerializer(
-                data={
-                    "entity_uid": entity_uid,
-                    "display_name": data.get("display_name")
-                    or Entity.objects.get(entity_uid=entity_uid, is_current=True).display_name,
-                    "entity_type": et.code,
-                    "change_ts": data.get("change_ts"),
-                },
-                context={"actor": request.user if request.user.is_authenticated else "api"},
-            )
+            serializer = EntityPatchSerializer(data=data)
             serializer.is_valid(raise_exception=True)
-            entity_result = serializer.save()
-
+            entity = EntityChange(**serializer.validated_data)
         details = data.get("details")
-        detail_results = []
-        if isinstance(details, list):
-            for d in details:
-                detail_serializer = EntityDetailUpsertSerializer(
-                    data={
-                        "entity_uid": entity_uid,
-                        "detail_code": d["detail_code"],
-                        "value_json": d["value_json"],
-                        "change_ts": d.get("change_ts"),
-                    },
-                    context={"actor": request.user if request.user.is_authenticated else "api"},
-                )
-                detail_serializer.is_valid(raise_exception=True)
-                detail_results.append(detail_serializer.save())
+        changes = [] if details is None else _validated_details(entity_uid, details)
+        if wants_async(request):
+            return _accepted(request, ChangeSet(entity_uid, entity, changes))
+
+        try:
+            entity_result, detail_results = apply_entity_changes(
+                entity_uid=entity_uid, entity=entity, details=changes, actor=_actor(request)
+            )
+        except BatchError as exc:
+            return _batch_error(exc)
 
-        result["entity"] = entity_result or {"status": "noop"}
+        result = {"entity": _entity_out(entity_result) if entity_result else {"status": "noop"}}
         if detail_results:
-            result["details"] = detail_results
+            result["details"] = [_detail_out(r) for r in detail_results]
         return Response(result)
 
+    @idempotent
     def delete(self, request, entity_uid):
         """Close the current entity version (SCD2 soft delete)."""
         ts_raw = request.query_params.get("change_ts")
@@ -220,13 +342,15 @@ class EntityRetrievePatch(APIView):
     get=extend_schema(
         tags=["details"],
         summary="List current details for entity",
+        parameters=[AS_OF_PARAMETER],
         responses={200: OpenApiTypes.OBJECT},
     ),
     post=extend_schema(
         tags=["details"],
         summary="Create or upsert details (one or list)",
+        parameters=[IDEMPOTENCY_PARAMETER, PREFER_PARAMETER],
         request=EntityDetailUpsertSerializer(many=True),
-        responses={201: EntityDetailUpsertSerializer(many=True)},
+        responses={201: EntityDetailUpsertSerializer(many=True), 202: OpenApiTypes.OBJECT},
     ),
 )
 class EntityDetailListCreate(APIView):
@@ -236,46 +360,45 @@ class EntityDetailListCreate(APIView):
 
     def get(self, request, entity_uid):
         """Return a flat dict of current details `{code: value}` for the entity."""
-        queryset = EntityDetail.objects.filter(entity_uid=entity_uid, is_current=True).values(
-            "detail_code", "value_json"
-        )
-        return Response({r["detail_code"]: r["value_json"] for r in queryset})
+        return async_to_sync(entity_details)(request, entity_uid)
 
+    @idempotent
     def post(self, request, entity_uid):
-        """Create or upsert one or multiple details for the entity."""
+        """Create or upsert one or multiple details for the entity in one SCD2 batch."""
         payloads = request.data if isinstance(request.data, list) else [request.data]
-        out = []
-        for d in payloads:
-            detail_serializer = EntityDetailUpsertSerializer(
-                data={
-                    "entity_uid": entity_uid,
-                    "detail_code": d["detail_code"],
-                    "value_json": d["value_json"],
-                    "change_ts": d.get("change_ts"),
-                },
-                context={"actor": request.user if request.user.is_authenticated else "api"},
+        changes = _validated_details(entity_uid, payloads)
+        if wants_async(request):
+            return _accepted(request, ChangeSet(entity_uid, details=changes))
+        try:
+            _, results = apply_entity_changes(
+                entity_uid=entity_uid, details=changes, actor=_actor(request)
             )
-            detail_serializer.is_valid(raise_exception=True)
-            out.append(detail_serializer.save())
-        return Response(out, status=status.HTTP_201_CREATED)
+        except BatchError as exc:
+            return _batch_error(exc)
+        return Response([_detail_out(r) for r in results], status=status.HTTP_201_CREATED)
 
 
 @extend_schema_view(
     get=extend_schema(
         tags=["details"],
         summary="Get current detail by code",
+        parameters=[AS_OF_PARAMETER],
         responses={200: OpenApiTypes.OBJECT},
     ),
     patch=extend_schema(
         tags=["details"],
         summary="Patch detail with SCD2 transition",
+        parameters=[IDEMPOTENCY_PARAMETER],
         request=EntityDetailUpsertSerializer,
         responses={200: OpenApiTypes.OBJECT},
     ),
     delete=extend_schema(
         tags=["details"],
         summary="Close current detail version (soft delete)",
-        parameters=[OpenApiParameter("change_ts", OpenApiTypes.DATETIME, OpenApiParameter.QUERY)],
+        parameters=[
+            OpenApiParameter("change_ts", OpenApiTypes.DATETIME, OpenApiParameter.QUERY),
+            IDEMPOTENCY_PARAMETER,
+        ],
         responses={200: OpenApiTypes.OBJECT},
     ),
 )
@@ -285,7 +408,16 @@ class EntityDetailRetrievePatchDelete(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get(self, request, entity_uid, detail_code):
-        """Return the current value of the detail or 404 if not present."""
+        """Return the current value of the detail (or its value at `as_of`), else 404."""
+        if "as_of" in request.query_params:
+            try:
+                as_of = parse_as_of(request.query_params["as_of"])
+            except ValueError as exc:
+                return Response({"detail": str(exc)}, status=400)
+            found = details_at(entity_uid, as_of, detail_code=detail_code)
+            if detail_code not in found:
+                return Response({"detail": "not found"}, status=404)
+            return Response({"detail_code": detail_code, "value_json": found[detail_code]})
         obj = EntityDetail.objects.filter(
             entity_uid=entity_uid, detail_code=detail_code, is_current=True
         ).first()
@@ -293,6 +425,7 @@ class EntityDetailRetrievePatchDelete(APIView):
             return Response({"detail": "not found"}, status=404)
         return Response({"detail_code": detail_code, "value_json": obj.value_json})
 
+    @idempotent
     def patch(self, request, entity_uid, detail_code):
         """Apply SCD2 upsert to a single detail."""
         detail_serializer = EntityDetailUpsertSerializer(
@@ -307,6 +440,7 @@ class EntityDetailRetrievePatchDelete(APIView):
         detail_serializer.is_valid(raise_exception=True)
         return Response(detail_serializer.save())
 
+    @idempotent
     def delete(self, request, entity_uid, detail_code):
         """Close the current detail version (SCD2 soft delete)."""
         ts_raw = request.query_params.get("change_ts")
@@ -323,23 +457,32 @@ class EntityDetailRetrievePatchDelete(APIView):
 @extend_schema(
     tags=["entities"],
     summary="Combined history for an entity",
+    parameters=[
+        OpenApiParameter("from", OpenApiTypes.DATETIME, OpenApiParameter.QUERY),
+        OpenApiParameter("to", OpenApiTypes.DATETIME, OpenApiParameter.QUERY),
+        OpenApiParameter("detail_code", OpenApiTypes.STR, OpenApiParameter.QUERY),
+        OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+        OpenApiParameter(
+            "compact",
+            OpenApiTypes.BOOL,
+            OpenApiParameter.QUERY,
+            description="Drop id, entity_uid, created_at, updated_at and hashdiff",
+        ),
+    ],
     responses={200: OpenApiTypes.OBJECT},
 )
 class EntityHistory(APIView):
-    """Return the full version history for an entity and its details."""
+    """Version history for an entity and its details, in keyset pages.
+
+    Versions opened in `[from, to)` are merged across both streams in
+    `valid_from` order; `next` is the cursor for the following page.
+    """
 
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get(self, request, entity_uid):
-        ent = list(Entity.objects.filter(entity_uid=entity_uid).order_by("valid_from").values())
-        det = list(
-            EntityDetail.objects.filter(entity_uid=entity_uid)
-            .order_by("detail_code", "valid_from")
-            .values()
-        )
-        if not ent and not det:
-            return Response({"detail": "not found"}, status=404)
-        return Response({"entity": ent, "details": det})
+        return async_to_sync(entity_history)(request, entity_uid)
 
 
 @extend_schema(
@@ -364,7 +507,11 @@ class EntityHistory(APIView):
     },
 )
 class EntitiesAsOf(APIView):
-    """Return the state of all entities at a given point in time."""
+    """Return the state of all entities at a given point in time.
+
+    Starts from the nearest earlier `AsOfSnapshot` (see `build_asof_snapshots`)
+    and applies only the SCD2 changes since it.
+    """
 
     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -378,35 +525,188 @@ class EntitiesAsOf(APIView):
         if timezone.is_naive(dt):
             dt = timezone.make_aware(dt)
 
-        alive_qs = (
-            Entity.objects.filter(valid_from__lte=dt)
-            .filter(Q(valid_to__gt=dt) | Q(valid_to__isnull=True))
-            .order_by("entity_uid", "-valid_from")
-        )
+        return Response(entities_as_of(dt))
 
-        latest = {}
-        for e in alive_qs:
-            if e.entity_uid not in latest:
-                latest[e.entity_uid] = e
-
-        data = []
-        for e in latest.values():
-            details = (
-                EntityDetail.objects.filter(entity_uid=e.entity_uid, valid_from__lte=dt)
-                .filter(Q(valid_to__gt=dt) | Q(valid_to__isnull=True))
-                .values("detail_code", "value_json")
-            )
-            data.append(
-                {
-                    "entity_uid": e.entity_uid,
-                    "display_name": e.display_name,
-                    "entity_type": e.entity_type.code,
-                    "valid_from": e.valid_from,
-                    "valid_to": e.valid_to,
-                    "details": {r["detail_code"]: r["value_json"] for r in details},
-                }
+
+@extend_schema(
+    tags=["entities"],
+    summary="Query entities with a boolean entity/detail predicate tree",
+    parameters=FIELDSET_PARAMETERS,
+    request=inline_serializer(
+        name="EntityQueryRequest",
+        fields={
+            "where": serializers.JSONField(),
+            "as_of": serializers.DateTimeField(required=False),
+            "limit": serializers.IntegerField(required=False, min_value=1, max_value=1000),
+        },
+    ),
+    responses={200: OpenApiTypes.OBJECT},
+)
+class EntitiesQuery(APIView):
+    """Evaluate a composable AND/OR/NOT query over entities and their details.
+
+    The tree (see `apps.core.entity_query`) is compiled to one SQL statement of
+    `EXISTS` semi-joins on current detail rows, or on rows alive at `as_of`.
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def post(self, request):
+        where = request.data.get("where")
+        if where is None:
+            return Response({"detail": "where required"}, status=400)
+        as_of = None
+        if request.data.get("as_of"):
+            as_of = parse_datetime(str(request.data["as_of"]))
+            if not as_of:
+                return Response({"detail": "invalid datetime"}, status=400)
+            if timezone.is_naive(as_of):
+                as_of = timezone.make_aware(as_of)
+        try:
+            limit = int(request.data.get("limit", 200))
+        except (TypeError, ValueError):
+            return Response({"detail": "invalid limit"}, status=400)
+        if not 1 <= limit <= 1000:
+            return Response({"detail": "limit must be between 1 and 1000"}, status=400)
+
+        try:
+            fieldset = parse_fieldset(request.query_params)
+            rows = run_query(where, as_of=as_of, limit=limit, fieldset=fieldset)
+        except (QueryError, ValueError) as exc:
+            return Response({"detail": str(exc)}, status=400)
+        if as_of is None:
+            rows = EntityCurrentSerializer(rows, many=True, context={"fieldset": fieldset}).data
+        return Response({"results": rows})
+
+
+def _audit_window(df, dt, filters, after=None):
+    """Audit rows in `[df, dt)` matching `filters`, after the keyset `(change_ts, id)`."""
+    from apps.audit.models import AuditLog
+
+    qs = AuditLog.objects.filter(change_ts__gte=df, change_ts__lt=dt, **filters)
+    if after is not None:
+        ts, pk = after
+        qs = qs.filter(Q(change_ts__gt=ts) | Q(change_ts=ts, id__gt=pk))
+    return qs.order_by("change_ts", "id").values()
+
+
+def _stream_audit_window(df, dt, filters, batch_size):
+    """Yield every row of the window, one keyset page per query."""
+    after = None
+    while True:
+        rows = list(_audit_window(df, dt, filters, after)[:batch_size])
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1]["change_ts"], rows[-1]["id"])
+
+
+@extend_schema(
+    tags=["entities"],
+    summary="Bulk upsert entities and details from NDJSON (streamed results)",
+    parameters=[
+        OpenApiParameter("batch_size", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    ],
+    request={"application/x-ndjson": OpenApiTypes.BINARY},
+    responses={(200, "application/x-ndjson"): OpenApiTypes.OBJECT},
+)
+class EntitiesBulkUpsert(APIView):
+    """Apply an NDJSON body of entity/detail upserts in batches.
+
+    The body (optionally `Content-Encoding: gzip`) is parsed line by line and
+    applied through the set-based SCD2 path, `batch_size` entities per
+    transaction. One result line per input line is streamed back as batches
+    commit, followed by a `summary` line.
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def post(self, request):
+        conf = bulk_settings()
+        try:
+            batch_size = page_size(
+                request.query_params.get("batch_size"), conf["BATCH_SIZE"], conf["MAX_BATCH_SIZE"]
             )
-        return Response(data)
+        except ValueError:
+            return Response({"detail": "invalid batch_size"}, status=400)
+        gzipped = "gzip" in request.headers.get("Content-Encoding", "").lower()
+        lines = read_lines(request.stream or io.BytesIO(), gzipped, conf["MAX_LINE_BYTES"])
+        return ndjson_response(bulk_upsert(lines, actor=_actor(request), batch_size=batch_size))
+
+
+@extend_schema(
+    tags=["entities"],
+    summary="Fetch many entity snapshots by uid",
+    parameters=FIELDSET_PARAMETERS,
+    request=inline_serializer(
+        name="EntityBatchGetRequest",
+        fields={
+            "entity_uids": serializers.ListField(child=serializers.UUIDField()),
+            "as_of": serializers.DateTimeField(required=False),
+        },
+    ),
+    responses={
+        200: inline_serializer(
+            name="EntityBatchGetResponse",
+            fields={
+                "results": serializers.ListField(child=serializers.DictField()),
+                "not_found": serializers.ListField(child=serializers.UUIDField()),
+            },
+        )
+    },
+)
+class EntitiesBatchGet(APIView):
+    """Return snapshots (with details) for a list of entity uids.
+
+    Results follow the input order (duplicates collapsed); unknown uids, or uids
+    not alive at `as_of`, are listed in `not_found`. Current snapshots are read
+    from `entity_current` in one `entity_uid = ANY(...)` query; as-of snapshots
+    take a fixed three.
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    max_uids = 10000
+
+    def post(self, request):
+        raw = request.data.get("entity_uids")
+        if not isinstance(raw, list):
+            return Response({"detail": "entity_uids must be a list"}, status=400)
+        if len(raw) > self.max_uids:
+            return Response({"detail": f"at most {self.max_uids} entity_uids"}, status=400)
+        try:
+            uids = list(dict.fromkeys(uuid.UUID(str(v)) for v in raw))
+        except ValueError:
+            return Response({"detail": "invalid entity_uid"}, status=400)
+        try:
+            fieldset = parse_fieldset(request.query_params)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=400)
+
+        as_of = None
+        if request.data.get("as_of"):
+            as_of = parse_datetime(str(request.data["as_of"]))
+            if not as_of:
+                return Response({"detail": "invalid datetime"}, status=400)
+            if timezone.is_naive(as_of):
+                as_of = timezone.make_aware(as_of)
+
+        if as_of is None:
+            queryset = EntityCurrent.objects.filter(entity_uid__any=uids, is_current=True)
+            rows = list(apply_to_current(queryset, fieldset))
+            data = EntityCurrentSerializer(rows, many=True, context={"fieldset": fieldset}).data
+            found = {obj.entity_uid: item for obj, item in zip(rows, data)}
+        else:
+            found = {
+                row["entity_uid"]: shape(row, fieldset)
+                for row in entities_as_of(as_of, entity_uids=uids)
+            }
+
+        return Response(
+            {
+                "results": [found[uid] for uid in uids if uid in found],
+                "not_found": [uid for uid in uids if uid not in found],
+            }
+        )
 
 
 @extend_schema(
@@ -415,13 +715,32 @@ class EntitiesAsOf(APIView):
     parameters=[
         OpenApiParameter("from", OpenApiTypes.DATETIME, OpenApiParameter.QUERY, required=True),
         OpenApiParameter("to", OpenApiTypes.DATETIME, OpenApiParameter.QUERY, required=True),
+        OpenApiParameter("action", OpenApiTypes.STR, OpenApiParameter.QUERY),
+        OpenApiParameter("actor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+        OpenApiParameter("entity_uid", OpenApiTypes.UUID, OpenApiParameter.QUERY),
+        OpenApiParameter("detail_code", OpenApiTypes.STR, OpenApiParameter.QUERY),
+        OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+        OpenApiParameter(
+            "stream",
+            OpenApiTypes.BOOL,
+            OpenApiParameter.QUERY,
+            description="Stream the whole window as NDJSON instead of one page",
+        ),
     ],
     responses={200: OpenApiTypes.OBJECT},
 )
 class DiffView(APIView):
-    """Return audit log entries within the given time window."""
+    """Return audit log entries within the given time window.
+
+    Entries are ordered by `(change_ts, id)` and keyset-paginated: follow
+    `next` until it is null. With `stream=1` the whole window is sent as
+    NDJSON, fetched from the database one page at a time.
+    """
 
     permission_classes = [IsAuthenticatedOrReadOnly]
+    default_limit = 500
+    max_limit = 5000
 
     def get(self, request):
         from_raw = request.query_params.get("from")
@@ -436,11 +755,140 @@ class DiffView(APIView):
             df = timezone.make_aware(df)
         if timezone.is_naive(dt):
             dt = timezone.make_aware(dt)
-        from apps.audit.models import AuditLog
 
-        logs = (
-            AuditLog.objects.filter(change_ts__gte=df, change_ts__lt=dt)
-            .order_by("change_ts")
-            .values()
-        )
-        return Response({"changes": list(logs)})
+        filters = {
+            name: request.query_params[name]
+            for name in ("action", "actor", "entity_uid", "detail_code")
+            if request.query_params.get(name)
+        }
+        if "entity_uid" in filters:
+            try:
+                filters["entity_uid"] = uuid.UUID(filters["entity_uid"])
+            except ValueError:
+                return Response({"detail": "invalid entity_uid"}, status=400)
+        try:
+            limit = page_size(request.query_params.get("limit"), self.default_limit, self.max_limit)
+            after = decode_cursor(request.query_params.get("cursor"), 2)
+            if after is not None:
+                after = (cursor_datetime(after[0]), int(after[1]))
+        except (InvalidCursor, TypeError, ValueError) as exc:
+            return Response({"detail": str(exc)}, status=400)
+
+        if wants_stream(request):
+            return ndjson_response(_stream_audit_window(df, dt, filters, limit))
+
+        logs = list(_audit_window(df, dt, filters, after)[: limit + 1])
+        next_cursor = None
+        if len(logs) > limit:
+            logs = logs[:limit]
+            next_cursor = encode_cursor(logs[-1]["change_ts"], logs[-1]["id"])
+        return Response({"changes": logs, "next": next_cursor})
+
+
+@extend_schema(
+    tags=["diff"],
+    summary="Net entity changes between two as-of states (NDJSON)",
+    parameters=[
+        OpenApiParameter("from", OpenApiTypes.DATETIME, OpenApiParameter.QUERY, required=True),
+        OpenApiParameter("to", OpenApiTypes.DATETIME, OpenApiParameter.QUERY, required=True),
+    ],
+    responses={200: OpenApiTypes.OBJECT},
+)
+class SnapshotDiff(APIView):
+    """Stream, in `entity_uid` order, entities whose state at `to` differs from `from`.
+
+    One NDJSON line per entity: `status` is added, removed or changed, with the
+    entity `fields` and `details` codes that differ. Changes reverted within
+    the window are not reported.
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request):
+        from_raw = request.query_params.get("from")
+        to_raw = request.query_params.get("to")
+        if not from_raw or not to_raw:
+            return Response({"detail": "from/to required"}, status=400)
+        df = parse_datetime(from_raw)
+        dt = parse_datetime(to_raw)
+        if not df or not dt:
+            return Response({"detail": "invalid datetime"}, status=400)
+        if timezone.is_naive(df):
+            df = timezone.make_aware(df)
+        if timezone.is_naive(dt):
+            dt = timezone.make_aware(dt)
+        if dt <= df:
+            return Response({"detail": "to must be after from"}, status=400)
+        return ndjson_response(net_changes(df, dt))
+
+
+@extend_schema(
+    tags=["changes"],
+    summary="Tail the SCD2 change feed",
+    parameters=[
+        OpenApiParameter("since", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+        OpenApiParameter(
+            "wait",
+            OpenApiTypes.FLOAT,
+            OpenApiParameter.QUERY,
+            description="Seconds to long-poll when there is nothing after `since`",
+        ),
+    ],
+    responses={200: OpenApiTypes.OBJECT},
+)
+class ChangesFeed(APIView):
+    """Return SCD2 transitions with `seq > since` in sequence order.
+
+    Clients store `next_since` and pass it back as `since`. With `wait`, an
+    empty response is delayed until an event arrives or the timeout expires.
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request):
+        conf = feed_settings()
+        try:
+            since = max(0, int(request.query_params.get("since", 0)))
+            limit = page_size(request.query_params.get("limit"), 100, conf["MAX_LIMIT"])
+            wait = min(max(0.0, float(request.query_params.get("wait", 0))), conf["MAX_WAIT"])
+        except ValueError:
+            return Response({"detail": "since, limit and wait must be numbers"}, status=400)
+
+        rows = wait_for_changes(since, limit, wait) if wait else changes_since(since, limit)
+        return Response({"changes": rows, "next_since": rows[-1]["seq"] if rows else since})
+
+
+@extend_schema(
+    tags=["ops"],
+    summary="Entity snapshot cache counters (this process)",
+    responses={200: OpenApiTypes.OBJECT},
+)
+class SnapshotCacheStats(APIView):
+    """Expose hit/miss counters of the read-through snapshot cache."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(snapshot_cache.stats())
+
+
+@extend_schema(
+    tags=["entities"],
+    summary="Status of a queued (async) write",
+    responses={200: OpenApiTypes.OBJECT},
+)
+class WriteStatus(APIView):
+    """Outcome of a write accepted with `Prefer: respond-async`.
+
+    `status` is "pending" until the worker has run, then "applied" (with the
+    per-change `result`) or "failed" (with `error`).
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request, ticket):
+        write = QueuedWrite.objects.filter(ticket=ticket).first()
+        if write is None:
+            return Response({"detail": "not found"}, status=404)
+        return Response(describe(write))
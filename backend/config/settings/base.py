@@ -98,6 +98,15 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticatedOrReadOnly",),
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "apps.common.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "apps.common.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 SIMPLE_JWT = {
@@ -108,6 +117,66 @@ SIMPLE_JWT = {
     "ALGORITHM": "HS256",
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "cockpit"),
+    }
+}
+
+ENTITY_SNAPSHOT_CACHE = {
+    "ENABLED": bool(int(os.getenv("ENTITY_SNAPSHOT_CACHE_ENABLED", "1"))),
+    "LRU_MAXSIZE": int(os.getenv("ENTITY_SNAPSHOT_CACHE_LRU_MAXSIZE", "10000")),
+    "LRU_TTL": float(os.getenv("ENTITY_SNAPSHOT_CACHE_LRU_TTL", "5")),
+    "SHARED_ALIAS": os.getenv("ENTITY_SNAPSHOT_CACHE_ALIAS") or None,
+    "SHARED_TTL": int(os.getenv("ENTITY_SNAPSHOT_CACHE_SHARED_TTL", "300")),
+}
+
+ENTITY_SEARCH_MIN_SIMILARITY = float(os.getenv("ENTITY_SEARCH_MIN_SIMILARITY", "0.3"))
+
+ASOF_SNAPSHOTS = {
+    "INTERVAL_HOURS": int(os.getenv("ASOF_SNAPSHOT_INTERVAL_HOURS", "24")),
+    "RETENTION_DAYS": int(os.getenv("ASOF_SNAPSHOT_RETENTION_DAYS", "400")),
+    "BATCH_SIZE": int(os.getenv("ASOF_SNAPSHOT_BATCH_SIZE", "5000")),
+}
+
+CHANGE_FEED = {
+    "MAX_LIMIT": int(os.getenv("CHANGE_FEED_MAX_LIMIT", "1000")),
+    "MAX_WAIT": int(os.getenv("CHANGE_FEED_MAX_WAIT", "30")),
+    "POLL_INTERVAL": float(os.getenv("CHANGE_FEED_POLL_INTERVAL", "1.0")),
+}
+
+IDEMPOTENCY = {
+    "TTL": int(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600))),
+    "LOCK_TIMEOUT": int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "60")),
+}
+
+BULK_UPSERT = {
+    "BATCH_SIZE": int(os.getenv("BULK_UPSERT_BATCH_SIZE", "500")),
+    "MAX_BATCH_SIZE": int(os.getenv("BULK_UPSERT_MAX_BATCH_SIZE", "5000")),
+    "MAX_LINE_BYTES": int(os.getenv("BULK_UPSERT_MAX_LINE_BYTES", str(1024 * 1024))),
+}
+
+WRITE_QUEUE = {
+    "ENABLED": bool(int(os.getenv("WRITE_QUEUE_ENABLED", "1"))),
+    "BATCH_SIZE": int(os.getenv("WRITE_QUEUE_BATCH_SIZE", "200")),
+    "POLL_INTERVAL": float(os.getenv("WRITE_QUEUE_POLL_INTERVAL", "1.0")),
+    "RETENTION_DAYS": int(os.getenv("WRITE_QUEUE_RETENTION_DAYS", "7")),
+}
+
+# Opt-in coalescing of queued writes: seconds per detail code / entity type code,
+# e.g. {"DETAIL_CODES": {"LOCATION": 2.0}, "ENTITY_TYPES": {"DEVICE": 5.0}}.
+WRITE_COALESCING = {
+    "DETAIL_CODES": {},
+    "ENTITY_TYPES": {},
+}
+
+AUDIT_PARTITIONS = {
+    "MONTHS_AHEAD": int(os.getenv("AUDIT_PARTITIONS_MONTHS_AHEAD", "3")),
+    "RETENTION_MONTHS": int(os.getenv("AUDIT_RETENTION_MONTHS", "0")),
+    "EXPIRED_ACTION": os.getenv("AUDIT_EXPIRED_ACTION", "detach"),
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Management Cockpit CRM API",
     "VERSION": "0.1.0",
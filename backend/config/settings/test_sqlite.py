@@ -25,6 +25,7 @@ CACHES = {
         "LOCATION": "cockpit-tests",
     }
 }
+ENTITY_SNAPSHOT_CACHE = {"ENABLED": False}
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
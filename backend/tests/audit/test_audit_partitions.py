@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+from apps.audit.models import AuditLog
+from apps.audit.partitions import (
+    add_months,
+    attached_months,
+    detached_name,
+    ensure_partitions,
+    expire_partitions,
+    expired_months,
+    month_start,
+    parse_partition_name,
+    partition_name,
+)
+
+
+def _month(year, month):
+    return datetime(year, month, 1, tzinfo=dt_timezone.utc)
+
+
+def test_month_arithmetic_and_names():
+    ts = datetime(2025, 12, 31, 23, 30, tzinfo=dt_timezone.utc)
+    assert month_start(ts) == _month(2025, 12)
+    assert add_months(_month(2025, 12), 1) == _month(2026, 1)
+    assert add_months(_month(2025, 1), -13) == _month(2023, 12)
+    assert partition_name(_month(2025, 3)) == "audit_log_y2025m03"
+    assert parse_partition_name("audit_log_y2025m03") == _month(2025, 3)
+    assert parse_partition_name("audit_log_default") is None
+    assert detached_name("audit_log_y2025m03", ts) == "audit_log_y2025m03_detached_20251231233000"
+    assert parse_partition_name(detached_name("audit_log_y2025m03", ts)) is None
+
+
+def test_expired_months_respects_retention():
+    months = [_month(2024, m) for m in range(1, 13)]
+    now = datetime(2025, 1, 15, tzinfo=dt_timezone.utc)
+    assert expired_months(months, now, 0) == []
+    assert expired_months(months, now, 3) == [_month(2024, m) for m in range(1, 10)]
+
+
+@pytest.mark.django_db
+def test_command_requires_partitioned_table():
+    if connection.vendor == "postgresql":
+        pytest.skip("SQLite-only check")
+    with pytest.raises(CommandError):
+        call_command("audit_partitions")
+
+
+@pytest.mark.pg_only
+@pytest.mark.django_db
+def test_partitions_are_created_pruned_and_expired():
+    if connection.vendor != "postgresql":
+        pytest.skip("PostgreSQL-only check")
+    now = datetime(2025, 6, 10, tzinfo=dt_timezone.utc)
+    ensure_partitions(now, months_ahead=2, since=_month(2025, 1))
+    assert {_month(2025, m) for m in range(1, 9)} <= set(attached_months())
+
+    AuditLog.objects.create(
+        change_ts=datetime(2025, 2, 3, tzinfo=dt_timezone.utc),
+        actor="t",
+        action="OPEN_ENTITY",
+        entity_uid=uuid.uuid4(),
+    )
+    qs = AuditLog.objects.filter(change_ts__gte=_month(2025, 2), change_ts__lt=_month(2025, 3))
+    plan = qs.explain()
+    assert "audit_log_y2025m02" in plan and "audit_log_y2025m05" not in plan
+
+    assert "audit_log_y2025m01" in expire_partitions(now, retention_months=4)
+    assert _month(2025, 1) not in attached_months()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [detached_name("audit_log_y2025m01", now)])
+        assert cursor.fetchone()[0] is not None
+
+    assert ensure_partitions(now, months_ahead=2, since=_month(2025, 1)) == ["audit_log_y2025m01"]
@@ -0,0 +1,39 @@
+import io
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from apps.common import renderers
+from apps.common.renderers import ORJSONParser, ORJSONRenderer
+from apps.core.management.commands.bench_json_renderers import snapshot_payload
+
+
+def test_output_matches_stdlib_renderer():
+    data = snapshot_payload(20, 3)
+    assert json.loads(ORJSONRenderer().render(data)) == json.loads(JSONRenderer().render(data))
+
+
+def test_native_types():
+    uid = uuid.uuid4()
+    ts = datetime(2025, 1, 2, 3, 4, 5, 6000, tzinfo=timezone.utc)
+    out = json.loads(ORJSONRenderer().render({"u": uid, "t": ts, "d": Decimal("1.5")}))
+    assert out == {"u": str(uid), "t": "2025-01-02T03:04:05.006000Z", "d": 1.5}
+
+
+def test_indent_and_fallback(monkeypatch):
+    body = ORJSONRenderer().render({"a": 1}, "application/json; indent=4")
+    assert body == JSONRenderer().render({"a": 1}, "application/json; indent=4")
+    monkeypatch.setattr(renderers, "orjson", None)
+    assert ORJSONRenderer().render({"a": [1]}) == JSONRenderer().render({"a": [1]})
+    assert ORJSONParser().parse(io.BytesIO(b'{"a": 1}')) == {"a": 1}
+
+
+def test_parser():
+    assert ORJSONParser().parse(io.BytesIO('{"ä": [1, null]}'.encode())) == {"ä": [1, None]}
+    with pytest.raises(ParseError):
+        ORJSONParser().parse(io.BytesIO(b"{nope"))
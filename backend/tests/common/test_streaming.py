@@ -0,0 +1,29 @@
+import asyncio
+
+from django.core.handlers.asgi import ASGIHandler
+
+from apps.common.streaming import ndjson_response
+
+
+def _counting_rows(produced):
+    for i in range(3):
+        produced.append(i)
+        yield {"i": i}
+
+
+def test_ndjson_response_is_sent_incrementally_over_asgi():
+    produced, sent = [], []
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            sent.append((message["body"], len(produced)))
+
+    response = ndjson_response(_counting_rows(produced))
+    asyncio.run(ASGIHandler().send_response(response, send))
+    # each line goes out before the next row is produced
+    assert sent == [(b'{"i":0}\n', 1), (b'{"i":1}\n', 2), (b'{"i":2}\n', 3)]
+
+
+def test_ndjson_response_still_iterates_synchronously_under_wsgi():
+    response = ndjson_response(_counting_rows([]))
+    assert b"".join(response) == b'{"i":0}\n{"i":1}\n{"i":2}\n'
@@ -0,0 +1,132 @@
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from django.core.management import call_command
+from django.db.backends.postgresql.base import DatabaseWrapper
+
+from apps.core.models import AsOfSnapshot, AsOfSnapshotItem, Entity
+from apps.core.services.asof import (
+    _alive,
+    boundaries,
+    build_snapshot,
+    entities_as_of,
+    purge_stale_snapshots,
+)
+from apps.core.services.scd2 import close_entity, update_entity, update_entity_detail
+
+pytestmark = pytest.mark.django_db
+
+T0 = datetime(2025, 1, 1, 12, tzinfo=dt_timezone.utc)
+
+
+def _by_uid(rows):
+    return {str(r["entity_uid"]): r for r in rows}
+
+
+@pytest.fixture
+def history(person_type):
+    a, b, c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    update_entity(entity_uid=a, display_name="A", entity_type="PERSON", change_ts=T0)
+    update_entity(entity_uid=b, display_name="B", entity_type="PERSON", change_ts=T0)
+    update_entity_detail(entity_uid=a, detail_code="EMAIL", value_json="a@x", change_ts=T0)
+    return a, b, c
+
+
+def test_boundaries_align_to_utc_midnight():
+    start = datetime(2025, 1, 1, 5, tzinfo=dt_timezone.utc)
+    got = list(boundaries(start, start + timedelta(days=2), timedelta(hours=24)))
+    assert got == [
+        datetime(2025, 1, 2, tzinfo=dt_timezone.utc),
+        datetime(2025, 1, 3, tzinfo=dt_timezone.utc),
+    ]
+
+
+def test_roll_forward_matches_full_scan(history):
+    a, b, c = history
+    snap_at = datetime(2025, 1, 2, tzinfo=dt_timezone.utc)
+    t1 = snap_at + timedelta(hours=3)
+    build_snapshot(snap_at)
+
+    update_entity(entity_uid=a, display_name="A2", entity_type="PERSON", change_ts=t1)
+    update_entity_detail(entity_uid=a, detail_code="EMAIL", value_json="a2@x", change_ts=t1)
+    close_entity(entity_uid=b, change_ts=t1)
+    update_entity(entity_uid=c, display_name="C", entity_type="PERSON", change_ts=t1)
+    assert AsOfSnapshot.objects.filter(as_of=snap_at).exists()
+
+    for as_of in (snap_at, t1 - timedelta(seconds=1), t1, t1 + timedelta(days=1)):
+        rolled = _by_uid(entities_as_of(as_of))
+        snapshots = list(AsOfSnapshot.objects.all())
+        AsOfSnapshot.objects.all().delete()
+        scanned = _by_uid(entities_as_of(as_of))
+        for s in snapshots:
+            build_snapshot(s.as_of)
+        assert rolled == scanned
+
+    after = _by_uid(entities_as_of(t1))
+    assert after[str(a)]["display_name"] == "A2"
+    assert after[str(a)]["details"] == {"EMAIL": "a2@x"}
+    assert str(b) not in after and str(c) in after
+
+
+def test_backdated_change_invalidates_later_snapshots(history):
+    a, _, _ = history
+    build_snapshot(datetime(2025, 1, 2, tzinfo=dt_timezone.utc))
+    build_snapshot(datetime(2025, 1, 3, tzinfo=dt_timezone.utc))
+
+    update_entity(
+        entity_uid=a,
+        display_name="A late",
+        entity_type="PERSON",
+        change_ts=datetime(2025, 1, 2, 6, tzinfo=dt_timezone.utc),
+    )
+    assert list(AsOfSnapshot.objects.order_by("as_of").values_list("as_of", "stale")) == [
+        (datetime(2025, 1, 2, tzinfo=dt_timezone.utc), False),
+        (datetime(2025, 1, 3, tzinfo=dt_timezone.utc), True),
+    ]
+    assert (
+        _by_uid(entities_as_of(datetime(2025, 1, 3, 1, tzinfo=dt_timezone.utc)))[str(a)][
+            "display_name"
+        ]
+        == "A late"
+    )
+
+    assert purge_stale_snapshots() == 1
+    assert not AsOfSnapshotItem.objects.filter(snapshot__stale=True).exists()
+    rebuilt = build_snapshot(datetime(2025, 1, 3, tzinfo=dt_timezone.utc))
+    assert (rebuilt.stale, rebuilt.entity_count) == (False, 2)
+
+
+def test_roll_forward_is_a_union_of_index_scans(history):
+    base = build_snapshot(datetime(2025, 1, 2, tzinfo=dt_timezone.utc))
+    qs = _alive(
+        Entity, AsOfSnapshotItem.KIND_ENTITY, datetime(2025, 1, 3, tzinfo=dt_timezone.utc), base
+    )
+    conn = DatabaseWrapper({"NAME": "x", "OPTIONS": {}, "TIME_ZONE": None}, alias="pg")
+    sql, _ = qs.values_list("id").query.get_compiler(connection=conn).as_sql()
+    assert " UNION ALL " in sql
+    assert '"entity"."id" IN (SELECT' in sql
+    assert '"entity"."valid_from" > %s AND "entity"."valid_from" <= %s' in sql
+
+
+def test_command_builds_and_prunes(history, settings):
+    settings.ASOF_SNAPSHOTS = {"INTERVAL_HOURS": 24, "RETENTION_DAYS": 100000}
+    call_command("build_asof_snapshots", since="2025-01-01T00:00:00Z", until="2025-01-04T00:00:00Z")
+    assert AsOfSnapshot.objects.count() == 4
+    assert (
+        AsOfSnapshot.objects.get(as_of=datetime(2025, 1, 2, tzinfo=dt_timezone.utc)).entity_count
+        == 2
+    )
+
+    settings.ASOF_SNAPSHOTS = {"INTERVAL_HOURS": 24, "RETENTION_DAYS": 0}
+    call_command("build_asof_snapshots", until="2025-01-04T00:00:00Z")
+    assert AsOfSnapshot.objects.count() == 0
+
+
+def test_asof_endpoint_uses_snapshot(api, history):
+    a, _, _ = history
+    build_snapshot(datetime(2025, 1, 2, tzinfo=dt_timezone.utc))
+    r = api.get("/api/v1/entities-asof", {"as_of": "2025-01-02T10:00:00Z"})
+    assert r.status_code == 200
+    rows = _by_uid(r.json())
+    assert rows[str(a)]["details"] == {"EMAIL": "a@x"}
@@ -0,0 +1,92 @@
+import asyncio
+import uuid
+
+import pytest
+from django.test import AsyncRequestFactory
+from django.utils import timezone
+
+from apps.core.async_views import async_reads, entity_details, entity_history, entity_retrieve
+from apps.core.services.scd2 import update_entity, update_entity_detail
+from apps.core.services.snapshot_cache import snapshot_cache
+from apps.core.views import EntityRetrievePatch
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def entity_uid(person_type):
+    snapshot_cache.clear()
+    uid = uuid.uuid4()
+    update_entity(entity_uid=uid, display_name="Ada", entity_type="PERSON")
+    update_entity_detail(entity_uid=uid, detail_code="EMAIL", value_json="ada@ex.com")
+    return uid
+
+
+def test_async_retrieve_shapes_and_honours_etag(entity_uid):
+    rf = AsyncRequestFactory()
+
+    r = asyncio.run(entity_retrieve(rf.get("/", {"fields": "display_name"}), entity_uid))
+    assert r.status_code == 200
+    assert r["Content-Type"] == "application/json"
+    assert b'"display_name":"Ada"' in r.content
+    assert b"entity_type" not in r.content
+
+    r2 = asyncio.run(entity_retrieve(rf.get("/", headers={"if-none-match": r["ETag"]}), entity_uid))
+    assert r2.status_code == 304
+
+    assert asyncio.run(entity_retrieve(rf.get("/"), uuid.uuid4())).status_code == 404
+    assert (
+        asyncio.run(entity_retrieve(rf.get("/", {"fields": "nope"}), entity_uid)).status_code == 400
+    )
+
+
+def test_async_history_lists_both_streams(entity_uid):
+    r = asyncio.run(entity_history(AsyncRequestFactory().get("/"), entity_uid))
+    assert r.status_code == 200
+    assert b'"entity":[' in r.content and b'"detail_code":"EMAIL"' in r.content
+
+
+def test_async_as_of_reads_use_the_async_orm(entity_uid):
+    rf = AsyncRequestFactory()
+    as_of = timezone.now().isoformat()
+    update_entity_detail(entity_uid=entity_uid, detail_code="EMAIL", value_json="new@ex.com")
+
+    r = asyncio.run(entity_retrieve(rf.get("/", {"as_of": as_of}), entity_uid))
+    assert r.status_code == 200
+    assert b'"details":{"EMAIL":"ada@ex.com"}' in r.content
+    r = asyncio.run(entity_details(rf.get("/", {"as_of": as_of}), entity_uid))
+    assert r.content == b'{"EMAIL":"ada@ex.com"}'
+    assert asyncio.run(entity_details(rf.get("/", {"as_of": "x"}), entity_uid)).status_code == 400
+
+
+def test_wrapper_routes_reads_async_and_writes_to_drf_view(api, entity_uid):
+    view = async_reads(EntityRetrievePatch, entity_retrieve)
+    assert asyncio.iscoroutinefunction(view)
+    assert view.cls is EntityRetrievePatch
+
+    url = f"/api/v1/entities/{entity_uid}"
+    assert api.get(url).json()["display_name"] == "Ada"
+
+    r = api.patch(url, {"display_name": "Ada L."}, format="json")
+    assert r.status_code == 401
+
+    r = api.get(url)
+    assert r.status_code == 200 and r.json()["display_name"] == "Ada"
+
+
+def test_aget_or_load_caches_locally(settings, entity_uid):
+    settings.ENTITY_SNAPSHOT_CACHE = {"ENABLED": True, "LRU_TTL": 60}
+    snapshot_cache.clear()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return {"v": 1}
+
+    async def twice():
+        first = await snapshot_cache.aget_or_load(entity_uid, loader)
+        second = await snapshot_cache.aget_or_load(entity_uid, loader)
+        return first, second
+
+    assert asyncio.run(twice()) == ({"v": 1}, {"v": 1})
+    assert len(calls) == 1
@@ -0,0 +1,67 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.db.backends.postgresql.base import DatabaseWrapper
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.core.models import EntityCurrent
+from apps.core.services.scd2 import update_entity, update_entity_detail
+
+
+@pytest.fixture
+def three(db, person_type):
+    t0 = timezone.now() - timedelta(days=2)
+    uids = [uuid.uuid4() for _ in range(3)]
+    for i, uid in enumerate(uids):
+        update_entity(entity_uid=uid, display_name=f"e{i}", entity_type="PERSON", change_ts=t0)
+        update_entity_detail(entity_uid=uid, detail_code="EMAIL", value_json=f"{i}@x", change_ts=t0)
+    update_entity(entity_uid=uids[2], display_name="late", entity_type="PERSON")
+    return t0, uids
+
+
+@pytest.mark.django_db
+def test_batch_get_preserves_order_and_reports_missing(api, django_user_model, three):
+    _, uids = three
+    missing = uuid.uuid4()
+    api.force_authenticate(django_user_model.objects.create_user("u", password="p"))
+    body = {"entity_uids": [str(uids[2]), str(missing), str(uids[0]), str(uids[2])]}
+
+    with CaptureQueriesContext(connection) as ctx:
+        r = api.post("/api/v1/entities/batch", body, format="json")
+    assert r.status_code == 200, r.content
+    assert [row["entity_uid"] for row in r.json()["results"]] == [str(uids[2]), str(uids[0])]
+    assert r.json()["results"][1]["details"] == {"EMAIL": "0@x"}
+    assert r.json()["not_found"] == [str(missing)]
+    assert len([q for q in ctx.captured_queries if "entity_current" in q["sql"]]) == 1
+
+
+@pytest.mark.django_db
+def test_batch_get_as_of(api, django_user_model, three):
+    t0, uids = three
+    api.force_authenticate(django_user_model.objects.create_user("u", password="p"))
+    before = (t0 - timedelta(hours=1)).isoformat()
+    after = (t0 + timedelta(hours=1)).isoformat()
+    body = {"entity_uids": [str(uids[2]), str(uids[1])]}
+
+    r = api.post("/api/v1/entities/batch", {**body, "as_of": after}, format="json")
+    assert [row["display_name"] for row in r.json()["results"]] == ["e2", "e1"]
+    assert r.json()["results"][0]["details"] == {"EMAIL": "2@x"}
+
+    r = api.post("/api/v1/entities/batch", {**body, "as_of": before}, format="json")
+    assert r.json()["results"] == []
+    assert r.json()["not_found"] == [str(uids[2]), str(uids[1])]
+
+    bad = api.post("/api/v1/entities/batch", {"entity_uids": ["nope"]}, format="json")
+    assert bad.status_code == 400
+
+
+def test_any_lookup_binds_one_array_parameter_on_postgresql():
+    conn = DatabaseWrapper({"NAME": "x", "OPTIONS": {}, "TIME_ZONE": None}, alias="pg")
+    uids = [uuid.uuid4() for _ in range(3)]
+    qs = EntityCurrent.objects.filter(entity_uid__any=uids)
+    sql, params = qs.query.get_compiler(connection=conn).as_sql()
+    assert '"entity_current"."entity_uid" = ANY(%s::uuid[])' in sql
+    assert list(params) == [uids]
@@ -0,0 +1,183 @@
+import asyncio
+import gzip
+import io
+import json
+import uuid
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.core.models import Entity, EntityCurrent, EntityDetail
+from apps.core.services.bulk import bulk_upsert, read_lines
+
+pytestmark = pytest.mark.django_db
+
+
+def _ndjson(*rows):
+    return b"".join((r if isinstance(r, bytes) else json.dumps(r).encode()) + b"\n" for r in rows)
+
+
+@pytest.fixture
+def authed(api, django_user_model):
+    api.force_authenticate(django_user_model.objects.create_user("loader", password="x"))
+    return api
+
+
+def test_read_lines_handles_gzip_and_oversized_lines():
+    body = b'{"a":1}\n\n' + b"x" * 50 + b"\n" + b'{"b":2}'
+    assert list(read_lines(io.BytesIO(gzip.compress(body)), gzipped=True, max_bytes=20)) == [
+        (1, b'{"a":1}\n'),
+        (3, None),
+        (4, b'{"b":2}'),
+    ]
+    with pytest.raises(ValueError):
+        list(read_lines(io.BytesIO(gzip.compress(body)[:-12]), gzipped=True))
+
+
+def test_bulk_upsert_batches_and_isolates_bad_lines(person_type):
+    a, b = uuid.uuid4(), uuid.uuid4()
+    body = _ndjson(
+        {"entity_uid": str(a), "display_name": "A", "entity_type": "PERSON"},
+        {"entity_uid": str(b), "display_name": "B", "entity_type": "NOPE"},
+        b"not json",
+        {"entity_uid": str(a), "detail_code": "EMAIL", "value_json": "a@x"},
+        {
+            "entity_uid": str(b),
+            "display_name": "B",
+            "entity_type": "PERSON",
+            "details": [{"detail_code": "PHONE", "value_json": 1}],
+        },
+    )
+    rows = list(bulk_upsert(read_lines(io.BytesIO(body)), batch_size=10))
+
+    by_line = {r["line"]: r for r in rows if "line" in r}
+    assert by_line[1]["entity"] == "created"
+    assert by_line[2]["error"] == "invalid entity_type"
+    assert by_line[3]["error"] == "invalid JSON"
+    assert by_line[4]["details"] == {"EMAIL": "created"}
+    assert by_line[5] == {
+        "line": 5,
+        "entity_uid": str(b),
+        "entity": "created",
+        "details": {"PHONE": "created"},
+    }
+    assert rows[-1] == {"summary": {"lines": 5, "errors": 2}}
+    assert EntityCurrent.objects.get(entity_uid=a).details == {"EMAIL": "a@x"}
+    assert EntityCurrent.objects.get(entity_uid=b).display_name == "B"
+
+
+def test_bulk_endpoint_streams_results_for_gzip_body(authed, person_type):
+    uids = [uuid.uuid4() for _ in range(25)]
+    body = _ndjson(
+        *(
+            {
+                "entity_uid": str(u),
+                "display_name": f"E{i}",
+                "entity_type": "PERSON",
+                "details": [{"detail_code": "RANK", "value_json": i}],
+            }
+            for i, u in enumerate(uids)
+        )
+    )
+    r = authed.post(
+        "/api/v1/entities/bulk?batch_size=10",
+        data=gzip.compress(body),
+        content_type="application/x-ndjson",
+        HTTP_CONTENT_ENCODING="gzip",
+    )
+    assert r.status_code == 200
+    assert r["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in b"".join(r.streaming_content).splitlines()]
+    assert rows[-1] == {"summary": {"lines": 25, "errors": 0}}
+    assert {row["entity"] for row in rows[:-1]} == {"created"}
+    assert EntityDetail.objects.filter(detail_code="RANK", is_current=True).count() == 25
+
+    assert (
+        authed.post(
+            "/api/v1/entities/bulk?batch_size=x", data=b"", content_type="application/x-ndjson"
+        ).status_code
+        == 400
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bulk_endpoint_streams_batches_as_they_commit_over_asgi(django_user_model, person_type):
+    token = AccessToken.for_user(django_user_model.objects.create_user("asgi", password="x"))
+    body = _ndjson(
+        *(
+            {"entity_uid": str(uuid.uuid4()), "display_name": f"E{i}", "entity_type": "PERSON"}
+            for i in range(3)
+        )
+    )
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/v1/entities/bulk",
+        "query_string": b"batch_size=1",
+        "headers": [
+            (b"authorization", f"Bearer {token}".encode()),
+            (b"content-type", b"application/x-ndjson"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent.append(message["status"])
+        elif message.get("body"):
+            applied = await sync_to_async(EntityCurrent.objects.count)()
+            sent.append((json.loads(message["body"]), applied))
+
+    asyncio.run(ASGIHandler()(scope, receive, send))
+    assert sent[0] == 200
+    # each batch's result goes out before the next batch is applied
+    assert [applied for _, applied in sent[1:]] == [1, 2, 3, 3]
+    assert sent[-1][0] == {"summary": {"lines": 3, "errors": 0}}
+
+
+def test_bulk_upsert_closes_versions_with_one_update_per_table(person_type):
+    uids = [uuid.uuid4() for _ in range(4)]
+    seed = [
+        {
+            "entity_uid": str(u),
+            "display_name": "v0",
+            "entity_type": "PERSON",
+            "details": [{"detail_code": "EMAIL", "value_json": "old"}],
+        }
+        for u in uids
+    ]
+    list(bulk_upsert(read_lines(io.BytesIO(_ndjson(*seed)))))
+
+    stamps = [timezone.now() + timedelta(minutes=i + 1) for i in range(len(uids))]
+    rows = [
+        {
+            "entity_uid": str(u),
+            "display_name": "v1",
+            "entity_type": "PERSON",
+            "change_ts": ts.isoformat(),
+            "details": [{"detail_code": "EMAIL", "value_json": "new", "change_ts": ts.isoformat()}],
+        }
+        for u, ts in zip(uids, stamps)
+    ]
+    with CaptureQueriesContext(connection) as ctx:
+        list(bulk_upsert(read_lines(io.BytesIO(_ndjson(*rows)))))
+
+    updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+    assert len([q for q in updates if q.startswith('UPDATE "entity" ')]) == 1
+    assert len([q for q in updates if q.startswith('UPDATE "entity_detail" ')]) == 1
+    for u, ts in zip(uids, stamps):
+        assert Entity.objects.get(entity_uid=u, is_current=False).valid_to == ts
+        assert EntityDetail.objects.get(entity_uid=u, is_current=False).valid_to == ts
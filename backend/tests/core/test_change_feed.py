@@ -0,0 +1,96 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from apps.core.models import ChangeEvent
+from apps.core.services import changes
+from apps.core.services.scd2 import (
+    close_entity,
+    close_entity_detail,
+    update_entity,
+    update_entity_detail,
+)
+
+
+@pytest.mark.django_db
+def test_every_transition_gets_a_sequence_number(person_type, django_capture_on_commit_callbacks):
+    uid = uuid.uuid4()
+    with django_capture_on_commit_callbacks(execute=True):
+        update_entity(entity_uid=uid, display_name="A", entity_type="PERSON")
+        update_entity(entity_uid=uid, display_name="A", entity_type="PERSON")  # noop
+        update_entity(entity_uid=uid, display_name="B", entity_type="PERSON")
+        update_entity_detail(entity_uid=uid, detail_code="EMAIL", value_json="a")
+        close_entity_detail(entity_uid=uid, detail_code="EMAIL")
+        close_entity(entity_uid=uid)
+
+    events = list(ChangeEvent.objects.order_by("seq"))
+    assert [(e.action, e.detail_code) for e in events] == [
+        ("created", None),
+        ("updated", None),
+        ("created", "EMAIL"),
+        ("closed", "EMAIL"),
+        ("closed", None),
+    ]
+    assert {e.entity_type_code for e in events} == {"PERSON"}
+    assert [e.seq for e in events] == sorted(e.seq for e in events)
+    assert [e.id for e in events] == sorted(e.id for e in events)
+
+
+@pytest.mark.django_db
+def test_sequence_is_assigned_after_commit_in_insertion_order(
+    person_type, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks() as callbacks:
+        update_entity(entity_uid=uuid.uuid4(), display_name="A", entity_type="PERSON")
+    assert ChangeEvent.objects.get().seq is None  # not visible to feed readers yet
+    assert changes.changes_since(0, 10) == []
+    update_entity(entity_uid=uuid.uuid4(), display_name="B", entity_type="PERSON")
+
+    # the first writer died before stamping; any later commit stamps both
+    stamped = changes.assign_sequence(batch_size=1)
+    assert [row["seq"] for row in stamped] == [1, 2]
+    assert [row["seq"] for row in changes.changes_since(0, 10)] == [1, 2]
+    assert changes.assign_sequence() == []
+    assert changes._sequence_and_publish in callbacks
+
+
+@pytest.mark.django_db
+def test_changes_endpoint_pages_from_since(api, person_type, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        for i in range(5):
+            update_entity(entity_uid=uuid.uuid4(), display_name=f"e{i}", entity_type="PERSON")
+
+    r = api.get("/api/v1/changes", {"since": 0, "limit": 3})
+    body = r.json()
+    assert [c["action"] for c in body["changes"]] == ["created"] * 3
+    r2 = api.get("/api/v1/changes", {"since": body["next_since"], "limit": 3})
+    assert len(r2.json()["changes"]) == 2
+    r3 = api.get("/api/v1/changes", {"since": r2.json()["next_since"]})
+    assert r3.json() == {"changes": [], "next_since": r2.json()["next_since"]}
+    assert api.get("/api/v1/changes", {"since": "x"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_long_poll_returns_empty_after_timeout(api, settings):
+    settings.CHANGE_FEED = {"POLL_INTERVAL": 0.01}
+    start = time.monotonic()
+    r = api.get("/api/v1/changes", {"since": 0, "wait": 0.1})
+    assert r.json()["changes"] == []
+    assert time.monotonic() - start >= 0.1
+
+
+def test_wait_wakes_on_commit_notification(monkeypatch):
+    calls = []
+
+    def fake_changes_since(since, limit):
+        calls.append(since)
+        return [{"seq": 1}] if len(calls) > 1 else []
+
+    monkeypatch.setattr(changes, "changes_since", fake_changes_since)
+    monkeypatch.setattr(changes, "feed_settings", lambda: {"POLL_INTERVAL": 30})
+    threading.Timer(0.05, changes._notify).start()
+    start = time.monotonic()
+    assert changes.wait_for_changes(0, 10, wait=5) == [{"seq": 1}]
+    assert time.monotonic() - start < 2
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+import uuid
+
+import pytest
+
+from apps.core import streams
+from apps.core.services import event_hub
+from apps.core.services.event_hub import EventHub, format_sse
+from apps.core.services.scd2 import update_entity, update_entity_detail
+from apps.core.streams import change_events
+
+
+def _event(seq, entity_type="PERSON", detail_code=None):
+    return {
+        "seq": seq,
+        "action": "created",
+        "entity_uid": str(uuid.uuid4()),
+        "entity_type_code": entity_type,
+        "detail_code": detail_code,
+    }
+
+
+def test_hub_filters_and_accepts_publishes_from_other_threads():
+    hub = EventHub()
+
+    async def scenario():
+        people = hub.subscribe(entity_types={"PERSON"})
+        emails = hub.subscribe(detail_codes={"EMAIL"})
+        for ev in (_event(1), _event(2, "ORG", "EMAIL"), _event(3, "PERSON", "PHONE")):
+            threading.Thread(target=hub.publish, args=(ev,)).start()
+        await asyncio.sleep(0.05)
+        got_people = [people.queue.get_nowait()["seq"] for _ in range(people.queue.qsize())]
+        got_emails = [emails.queue.get_nowait()["seq"] for _ in range(emails.queue.qsize())]
+        hub.unsubscribe(people)
+        hub.unsubscribe(emails)
+        return sorted(got_people), got_emails
+
+    assert asyncio.run(scenario()) == ([1, 3], [2])
+    assert hub.subscriber_count() == 0
+
+
+def test_full_queue_marks_subscriber_lagged(monkeypatch):
+    monkeypatch.setattr(event_hub, "QUEUE_SIZE", 1)
+    hub = EventHub()
+
+    async def scenario():
+        sub = hub.subscribe()
+        hub.publish(_event(1))
+        hub.publish(_event(2))
+        await asyncio.sleep(0)
+        return sub.queue.qsize(), sub.lagged
+
+    assert asyncio.run(scenario()) == (1, True)
+
+
+def test_sse_frame_format():
+    frame = format_sse({"seq": 7, "entity_uid": uuid.UUID(int=1)})
+    head, event, data, *_ = frame.split("\n")
+    assert (head, event) == ("id: 7", "event: change")
+    assert json.loads(data[len("data: ") :])["entity_uid"] == str(uuid.UUID(int=1))
+    assert frame.endswith("\n\n")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_committed_scd2_changes_reach_stream_subscribers(person_type):
+    async def scenario():
+        stream = change_events(frozenset({"PERSON"}), frozenset({"EMAIL"}), heartbeat=0.05)
+        assert await stream.__anext__() == "retry: 3000\n\n"
+
+        def write():
+            uid = uuid.uuid4()
+            update_entity(entity_uid=uid, display_name="A", entity_type="PERSON")
+            update_entity_detail(entity_uid=uid, detail_code="PHONE", value_json="1")
+            update_entity_detail(entity_uid=uid, detail_code="EMAIL", value_json="a@x")
+
+        await asyncio.to_thread(write)
+        frames = []
+        while len(frames) < 1:
+            frame = await stream.__anext__()
+            if not frame.startswith(":"):
+                frames.append(frame)
+        await stream.aclose()
+        return frames
+
+    frames = asyncio.run(scenario())
+    data = json.loads(frames[0].split("data: ", 1)[1])
+    assert data["detail_code"] == "EMAIL" and data["entity_type_code"] == "PERSON"
+    assert event_hub.hub.subscriber_count() == 0
+
+
+def test_replay_pages_through_the_whole_backlog(monkeypatch):
+    backlog = [_event(seq) for seq in range(1, 8)]
+    pages = []
+
+    def fake_changes_since(since, limit):
+        pages.append(since)
+        return [e for e in backlog if e["seq"] > since][:limit]
+
+    monkeypatch.setattr(streams, "changes_since", fake_changes_since)
+    monkeypatch.setattr(streams, "feed_settings", lambda: {"MAX_LIMIT": 3})
+
+    async def scenario():
+        stream = change_events(frozenset(), frozenset(), since=0, heartbeat=0.01)
+        frames = [await stream.__anext__() for _ in range(8)]
+        await stream.aclose()
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert [f.split("\n")[0] for f in frames[1:]] == [f"id: {seq}" for seq in range(1, 8)]
+    assert pages == [0, 3, 6]
+
+
+@pytest.mark.django_db
+def test_stream_endpoint_headers(client):
+    r = client.get("/api/v1/changes/stream", {"entity_type": "PERSON"})
+    assert r["Content-Type"] == "text/event-stream"
+    assert r.streaming
+    assert client.get("/api/v1/changes/stream", {"since": "x"}).status_code == 400
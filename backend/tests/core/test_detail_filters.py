@@ -0,0 +1,99 @@
+import uuid
+
+import pytest
+from django.db.backends.postgresql.base import DatabaseWrapper
+
+from apps.core.detail_filters import DetailPredicate, matching_entity_uids, parse_key
+from apps.core.services.scd2 import update_entity, update_entity_detail
+
+
+def _pg_sql(queryset):
+    conn = DatabaseWrapper({"NAME": "x", "OPTIONS": {}, "TIME_ZONE": None}, alias="pg")
+    return queryset.query.get_compiler(connection=conn).as_sql()
+
+
+def test_parse_key_operators_and_paths():
+    assert parse_key("SCORE__gte", "10") == DetailPredicate("SCORE", (), "gte", 10)
+    assert parse_key("ADDR.city", "Berlin") == DetailPredicate("ADDR", ("city",), "exact", "Berlin")
+    assert parse_key("ADDR.zip__in", "1,x").value == [1, "x"]
+    assert parse_key("EMAIL__contains", "10").value == "10"
+    with pytest.raises(ValueError):
+        parse_key("EMAIL__regex", "x")
+    with pytest.raises(ValueError):
+        parse_key("ADDR..city", "x")
+
+
+def test_postgresql_sql_uses_jsonb_operators():
+    sql, params = _pg_sql(
+        matching_entity_uids(DetailPredicate("ADDR", ("city",), "exact", "Berlin"))
+    )
+    assert '"entity_detail"."value_json" @> %s::jsonb' in sql
+    assert '"entity_detail"."value_json" #> %s = %s::jsonb' in sql
+    assert '{"city": "Berlin"}' in params
+    assert ["city"] in params and '"Berlin"' in params
+
+    sql, params = _pg_sql(matching_entity_uids(DetailPredicate("SCORE", (), "gte", 10)))
+    assert "@? %s::jsonpath" in sql
+    assert "$ ? (@ >= 10)" in params
+
+
+@pytest.fixture
+def people(db, person_type):
+    rows = {
+        "anna": {"EMAIL": "anna@corp.de", "SCORE": 12, "ADDR": {"city": "Berlin", "zip": "10115"}},
+        "bert": {"EMAIL": "bert@mail.at", "SCORE": 7, "ADDR": {"city": "Vienna"}},
+        "cleo": {"EMAIL": "cleo@corp.de", "SCORE": 30},
+    }
+    for name, details in rows.items():
+        uid = uuid.uuid4()
+        update_entity(entity_uid=uid, display_name=name, entity_type="PERSON")
+        for code, value in details.items():
+            update_entity_detail(entity_uid=uid, detail_code=code, value_json=value)
+
+
+def _names(api, params):
+    r = api.get("/api/v1/entities", params)
+    assert r.status_code == 200, r.content
+    return sorted(row["display_name"] for row in r.json())
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        ({"detail[ADDR.city]": "Berlin"}, ["anna"]),
+        ({"detail[SCORE__gte]": "10"}, ["anna", "cleo"]),
+        ({"detail[SCORE__lt]": "10"}, ["bert"]),
+        ({"detail[EMAIL__contains]": "corp"}, ["anna", "cleo"]),
+        ({"detail[EMAIL__icontains]": "MAIL.AT"}, ["bert"]),
+        ({"detail[ADDR.zip__exists]": "1"}, ["anna"]),
+        ({"detail[ADDR.city__in]": "Vienna,Paris"}, ["bert"]),
+        ({"detail[ADDR.city__ne]": "Berlin"}, ["bert"]),
+        ({"detail[SCORE__gte]": "10", "detail[EMAIL__contains]": "cleo"}, ["cleo"]),
+        ({"detail_code": "EMAIL", "detail_value": "bert@mail.at"}, ["bert"]),
+    ],
+)
+def test_entity_list_detail_filters(api, people, params, expected):
+    assert _names(api, params) == expected
+
+
+@pytest.mark.django_db
+def test_bad_operator_is_rejected(api):
+    assert api.get("/api/v1/entities", {"detail[SCORE__between]": "1"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_exact_matches_whole_values_only(api, person_type):
+    uid = uuid.uuid4()
+    update_entity(entity_uid=uid, display_name="dora", entity_type="PERSON")
+    update_entity_detail(entity_uid=uid, detail_code="TAGS", value_json=["vip", "new"])
+    update_entity_detail(
+        entity_uid=uid, detail_code="ADDR", value_json={"city": "Graz", "zip": "8010"}
+    )
+
+    assert _names(api, {"detail[TAGS]": "vip"}) == []
+    assert _names(api, {"detail[TAGS]": '["vip","new"]'}) == ["dora"]
+    assert _names(api, {"detail[TAGS__in]": "vip,new"}) == []
+    assert _names(api, {"detail[ADDR]": '{"city":"Graz"}'}) == []
+    assert _names(api, {"detail[ADDR]": '{"city":"Graz","zip":"8010"}'}) == ["dora"]
+    assert _names(api, {"detail[TAGS__ne]": "vip"}) == ["dora"]
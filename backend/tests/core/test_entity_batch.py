@@ -0,0 +1,172 @@
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from django.db import connection
+
+from apps.audit.models import AuditLog
+from apps.core.models import ChangeEvent, EntityCurrent, EntityDetail
+from apps.core.services import scd2
+from apps.core.services.scd2 import (
+    BatchConflict,
+    BatchError,
+    DetailChange,
+    EntityChange,
+    apply_entity_changes,
+    update_entity,
+    update_entity_detail,
+)
+
+pytestmark = pytest.mark.django_db
+
+T0 = datetime(2025, 1, 1, 12, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture
+def uid(person_type):
+    uid = uuid.uuid4()
+    update_entity(entity_uid=uid, display_name="Ada", entity_type="PERSON", change_ts=T0)
+    update_entity_detail(entity_uid=uid, detail_code="EMAIL", value_json="a@x", change_ts=T0)
+    return uid
+
+
+@pytest.fixture
+def authed(api, django_user_model):
+    api.force_authenticate(django_user_model.objects.create_user("writer", password="x"))
+    return api
+
+
+def test_batch_applies_entity_and_details_with_bounded_queries(uid, django_assert_max_num_queries):
+    ts = T0 + timedelta(hours=1)
+    details = [DetailChange("EMAIL", "a@x")] + [
+        DetailChange(f"CODE_{i}", i, change_ts=ts) for i in range(30)
+    ]
+    with django_assert_max_num_queries(20):
+        entity_res, detail_res = apply_entity_changes(
+            entity_uid=uid,
+            entity=EntityChange(display_name="Ada L.", change_ts=ts),
+            details=details,
+        )
+
+    assert entity_res.status == "updated"
+    assert [r.status for r in detail_res] == ["noop"] + ["created"] * 30
+    doc = EntityCurrent.objects.get(entity_uid=uid)
+    assert doc.display_name == "Ada L." and len(doc.details) == 31
+    assert ChangeEvent.objects.filter(entity_uid=uid).count() == 2 + 31
+    assert AuditLog.objects.filter(entity_uid=uid, action="OPEN_DETAIL").count() == 31
+
+
+def test_batch_rejects_duplicates_and_unknown_type_without_writing(uid):
+    with pytest.raises(BatchError):
+        apply_entity_changes(
+            entity_uid=uid, details=[DetailChange("PHONE", 1), DetailChange("PHONE", 2)]
+        )
+    with pytest.raises(BatchError):
+        apply_entity_changes(
+            entity_uid=uid,
+            entity=EntityChange(entity_type="NOPE"),
+            details=[DetailChange("PHONE", 1)],
+        )
+    assert not EntityDetail.objects.filter(entity_uid=uid, detail_code="PHONE").exists()
+
+
+def test_patch_is_all_or_nothing(authed, uid):
+    url = f"/api/v1/entities/{uid}"
+    body = {"entity_type": "NOPE", "details": [{"detail_code": "PHONE", "value_json": 1}]}
+    r = authed.patch(url, body, format="json")
+    assert r.status_code == 400
+    assert r.json() == {"detail": "invalid entity_type"}
+
+    r = authed.patch(url, {"details": [{"detail_code": "PHONE"}]}, format="json")
+    assert r.status_code == 400
+    assert not EntityDetail.objects.filter(entity_uid=uid, detail_code="PHONE").exists()
+
+    body = {
+        "display_name": "Ada B.",
+        "details": [
+            {"detail_code": "PHONE", "value_json": 1},
+            {"detail_code": "EMAIL", "value_json": "a@x"},
+        ],
+    }
+    r = authed.patch(url, body, format="json")
+    assert r.status_code == 200
+    assert r.json()["entity"]["status"] == "updated"
+    assert [d["status"] for d in r.json()["details"]] == ["created", "noop"]
+
+
+def test_post_creates_entity_and_details_together(authed, person_type):
+    new = uuid.uuid4()
+    body = {
+        "entity_uid": str(new),
+        "display_name": "Grace",
+        "entity_type": "PERSON",
+        "details": [{"detail_code": "EMAIL", "value_json": "g@x"}],
+    }
+    r = authed.post("/api/v1/entities", body, format="json")
+    assert r.status_code == 201
+    assert r.json()["entity"]["status"] == "created"
+    assert EntityCurrent.objects.get(entity_uid=new).details == {"EMAIL": "g@x"}
+
+    r = authed.post(
+        f"/api/v1/entities/{new}/details",
+        [{"detail_code": "EMAIL", "value_json": "g2@x"}, {"detail_code": "PHONE", "value_json": 7}],
+        format="json",
+    )
+    assert r.status_code == 201
+    assert [d["status"] for d in r.json()] == ["updated", "created"]
+
+
+@pytest.fixture
+def current_unique():
+    """The partial unique indexes migration 0016 creates on PostgreSQL."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS entity_current_unique_idx "
+            "ON entity (entity_uid) WHERE is_current"
+        )
+        cursor.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS entity_detail_current_unique_idx "
+            "ON entity_detail (entity_uid, detail_code) WHERE is_current"
+        )
+
+
+def _stale_locks(monkeypatch, times):
+    """Make the first `times` lock reads miss rows, as if a concurrent writer had not committed."""
+    real, calls = scd2._lock_current, []
+
+    def lock(uids, codes):
+        calls.append(1)
+        return ({}, {}) if len(calls) <= times else real(uids, codes)
+
+    monkeypatch.setattr(scd2, "_lock_current", lock)
+    return calls
+
+
+def test_concurrent_first_write_is_re_diffed_against_the_winner(uid, current_unique, monkeypatch):
+    calls = _stale_locks(monkeypatch, 1)
+    entity_res, detail_res = apply_entity_changes(
+        entity_uid=uid,
+        entity=EntityChange("Ada", "PERSON"),
+        details=[DetailChange("EMAIL", "new@x")],
+    )
+    assert len(calls) == 2
+    assert entity_res.status == "noop"
+    assert [r.status for r in detail_res] == ["updated"]
+    emails = EntityDetail.objects.filter(entity_uid=uid, detail_code="EMAIL")
+    assert emails.filter(is_current=True).get().value_json == "new@x"
+    assert AuditLog.objects.filter(entity_uid=uid, action="OPEN_ENTITY").count() == 1
+
+
+def test_persistent_conflict_is_reported_as_409(authed, uid, current_unique, monkeypatch):
+    _stale_locks(monkeypatch, scd2.CONFLICT_RETRIES + 1)
+    with pytest.raises(BatchConflict):
+        apply_entity_changes(entity_uid=uid, entity=EntityChange("Ada", "PERSON"))
+
+    _stale_locks(monkeypatch, scd2.CONFLICT_RETRIES + 1)
+    r = authed.post(
+        f"/api/v1/entities/{uid}/details",
+        [{"detail_code": "EMAIL", "value_json": "b"}],
+        format="json",
+    )
+    assert r.status_code == 409
+    assert EntityDetail.objects.get(entity_uid=uid, is_current=True).value_json == "a@x"
@@ -0,0 +1,101 @@
+import uuid
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.core.models import EntityCurrent
+from apps.core.services import current
+from apps.core.services.scd2 import (
+    close_entity,
+    close_entity_detail,
+    update_entity,
+    update_entity_detail,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def test_document_follows_scd2_transitions(person_type):
+    uid = uuid.uuid4()
+    t0 = timezone.now()
+
+    update_entity(entity_uid=uid, display_name="Alice", entity_type="PERSON", change_ts=t0)
+    update_entity_detail(entity_uid=uid, detail_code="EMAIL", value_json="a@ex.com", change_ts=t0)
+    doc = EntityCurrent.objects.get(pk=uid)
+    assert doc.is_current is True
+    assert doc.display_name == "Alice"
+    assert doc.entity_type_code == "PERSON"
+    assert doc.details == {"EMAIL": "a@ex.com"}
+
+    t1 = t0 + timezone.timedelta(seconds=5)
+    update_entity(entity_uid=uid, display_name="Alice B.", entity_type="PERSON", change_ts=t1)
+    update_entity_detail(entity_uid=uid, detail_code="EMAIL", value_json="b@ex.com", change_ts=t1)
+    doc.refresh_from_db()
+    assert doc.display_name == "Alice B."
+    assert doc.valid_from == t1
+    assert doc.details == {"EMAIL": "b@ex.com"}
+
+    close_entity(entity_uid=uid, change_ts=t1 + timezone.timedelta(seconds=5))
+    doc.refresh_from_db()
+    assert doc.is_current is False
+    assert doc.details == {"EMAIL": "b@ex.com"}
+
+    close_entity_detail(entity_uid=uid, detail_code="EMAIL", change_ts=t1)
+    doc.refresh_from_db()
+    assert doc.is_current is False
+    assert doc.details == {}
+    assert doc.version == 6
+
+
+def test_rebuild_command_resynchronizes(person_type, make_entity, make_detail):
+    e = make_entity(display_name="Direct")
+    make_detail(e, detail_code="PHONE", value_json="+421")
+    assert not EntityCurrent.objects.filter(pk=e.entity_uid).exists()
+
+    call_command("rebuild_entity_current", batch_size=1)
+
+    doc = EntityCurrent.objects.get(pk=e.entity_uid)
+    assert doc.display_name == "Direct"
+    assert doc.details == {"PHONE": "+421"}
+
+
+def test_item_and_details_endpoints_read_document(api, person_type):
+    uid = uuid.uuid4()
+    update_entity(entity_uid=uid, display_name="Bob", entity_type="PERSON")
+    update_entity_detail(entity_uid=uid, detail_code="EMAIL", value_json="bob@ex.com")
+
+    r = api.get(f"/api/v1/entities/{uid}")
+    assert r.status_code == 200
+    assert r.json()["entity_type"] == "PERSON"
+    assert r.json()["details"] == {"EMAIL": "bob@ex.com"}
+
+    r = api.get(f"/api/v1/entities/{uid}/details")
+    assert r.json() == {"EMAIL": "bob@ex.com"}
+
+    r = api.get("/api/v1/entities", {"q": "bo", "detail_code": "EMAIL"})
+    assert [row["entity_uid"] for row in r.json()] == [str(uid)]
+
+
+def test_rebuild_carries_versions_forward(person_type):
+    uid = uuid.uuid4()
+    update_entity(entity_uid=uid, display_name="Carol", entity_type="PERSON")
+    update_entity_detail(entity_uid=uid, detail_code="EMAIL", value_json="c@ex.com")
+    before = EntityCurrent.objects.get(pk=uid).version
+
+    call_command("rebuild_entity_current")
+
+    doc = EntityCurrent.objects.get(pk=uid)
+    assert doc.version == before + 1
+    assert doc.details == {"EMAIL": "c@ex.com"}
+
+
+def test_documents_are_locked_before_scd2_rows_are_read(person_type, monkeypatch):
+    calls = []
+    lock, read = current._lock_documents, current._documents
+    monkeypatch.setattr(current, "_lock_documents", lambda uids: calls.append("lock") or lock(uids))
+    monkeypatch.setattr(current, "_documents", lambda uids: calls.append("read") or read(uids))
+
+    update_entity(entity_uid=uuid.uuid4(), display_name="Dan", entity_type="PERSON")
+
+    assert calls == ["lock", "read"]
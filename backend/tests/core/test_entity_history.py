@@ -0,0 +1,108 @@
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from django.db import connection
+
+from apps.core.services.history import KIND_DETAIL, _page_queries, history_page
+from apps.core.services.scd2 import update_entity, update_entity_detail
+
+pytestmark = pytest.mark.django_db
+
+T0 = datetime(2025, 1, 1, 12, tzinfo=dt_timezone.utc)
+H = timedelta(hours=1)
+
+
+@pytest.fixture
+def uid(person_type):
+    uid = uuid.uuid4()
+    for i in range(6):
+        ts = T0 + i * H
+        update_entity(entity_uid=uid, display_name=f"v{i}", entity_type="PERSON", change_ts=ts)
+        update_entity_detail(entity_uid=uid, detail_code="EMAIL", value_json=f"e{i}", change_ts=ts)
+        update_entity_detail(entity_uid=uid, detail_code="PHONE", value_json=i, change_ts=ts)
+    return uid
+
+
+def _walk(uid, **kwargs):
+    pages, after = [], None
+    while True:
+        ent, det, after = history_page(uid, after=after, **kwargs)
+        pages.append(
+            [("E", r["valid_from"]) for r in ent]
+            + [(r["detail_code"], r["valid_from"]) for r in det]
+        )
+        if after is None:
+            return pages
+
+
+def test_pages_cover_both_streams_once_in_order(uid):
+    pages = _walk(uid, limit=4)
+    rows = [row for page in pages for row in page]
+    assert len(rows) == 18
+    assert len(set(rows)) == 18
+    for prev, page in zip(pages, pages[1:]):
+        assert max(ts for _, ts in prev) <= min(ts for _, ts in page)
+
+
+def test_window_and_detail_code_filter(uid):
+    ent, det, after = history_page(uid, start=T0 + 2 * H, end=T0 + 4 * H, detail_code="EMAIL")
+    assert ent == []
+    assert [d["value_json"] for d in det] == ["e2", "e3"]
+    assert after is None
+
+
+def test_compact_drops_internal_columns(uid):
+    ent, det, _ = history_page(uid, limit=3, compact=True)
+    assert "hashdiff" not in ent[0] and "created_at" not in det[0] and "id" not in det[0]
+    assert {"display_name", "valid_from", "valid_to", "is_current"} <= set(ent[0])
+
+
+def test_history_endpoint_paginates(api, uid):
+    url = f"/api/v1/entities/{uid}/history"
+    body = api.get(url, {"limit": 5, "from": (T0 + H).isoformat(), "compact": "1"}).json()
+    assert len(body["entity"]) + len(body["details"]) == 5
+    assert body["next"]
+
+    rest = api.get(url, {"limit": 100, "from": (T0 + H).isoformat(), "cursor": body["next"]}).json()
+    assert len(rest["entity"]) + len(rest["details"]) == 10
+    assert rest["next"] is None
+
+    assert api.get(url, {"cursor": "garbage"}).status_code == 400
+    assert api.get(url, {"from": "soon"}).status_code == 400
+    assert api.get(f"/api/v1/entities/{uuid.uuid4()}/history").status_code == 404
+
+
+def test_detail_stream_follows_valid_from_then_id(uid):
+    keys, after = [], None
+    while True:
+        _, det, after = history_page(uid, after=after, limit=5)
+        keys += [(r["valid_from"], r["id"]) for r in det]
+        if after is None:
+            break
+    assert len(keys) == 12
+    assert keys == sorted(keys)
+
+
+def _detail_stream():
+    after = (T0, KIND_DETAIL, 0)
+    return dict(_page_queries(uuid.uuid4(), None, None, None, after, 10))[KIND_DETAIL]
+
+
+def test_explain_sqlite_reads_details_in_history_index_order():
+    if connection.vendor != "sqlite":
+        pytest.skip("SQLite query plan")
+    plan = _detail_stream().explain()
+    assert "USING INDEX entity_detail_history_idx" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.pg_only
+def test_explain_postgresql_reads_details_in_history_index_order():
+    if connection.vendor != "postgresql":
+        pytest.skip("PostgreSQL query plan")
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    plan = _detail_stream().explain()
+    assert "entity_detail_history_idx" in plan
+    assert "Sort" not in plan
@@ -0,0 +1,115 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.db.backends.postgresql.base import DatabaseWrapper
+from django.utils import timezone
+
+from apps.core.entity_query import QueryError, compile_query
+from apps.core.services.scd2 import close_entity_detail, update_entity, update_entity_detail
+
+QUERY = {
+    "and": [
+        {"field": "type", "value": "PERSON"},
+        {"has": "EMAIL"},
+        {"or": [{"detail": "COUNTRY", "value": "DE"}, {"detail": "COUNTRY", "value": "AT"}]},
+        {"not": {"has": "CHURNED"}},
+    ]
+}
+
+
+def _pg_sql(queryset):
+    conn = DatabaseWrapper({"NAME": "x", "OPTIONS": {}, "TIME_ZONE": None}, alias="pg")
+    return queryset.query.get_compiler(connection=conn).as_sql()
+
+
+@pytest.fixture
+def customers(db, person_type):
+    t0 = timezone.now() - timedelta(days=10)
+    rows = {
+        "anna": {"EMAIL": "a@x.de", "COUNTRY": "DE"},
+        "bert": {"EMAIL": "b@x.at", "COUNTRY": "AT"},
+        "cleo": {"EMAIL": "c@x.fr", "COUNTRY": "FR"},
+        "dora": {"COUNTRY": "DE"},
+        "emil": {"EMAIL": "e@x.de", "COUNTRY": "DE", "CHURNED": True},
+    }
+    uids = {}
+    for name, details in rows.items():
+        uid = uids[name] = uuid.uuid4()
+        update_entity(entity_uid=uid, display_name=name, entity_type="PERSON", change_ts=t0)
+        for code, value in details.items():
+            update_entity_detail(entity_uid=uid, detail_code=code, value_json=value, change_ts=t0)
+    return t0, uids
+
+
+@pytest.mark.django_db
+def test_boolean_query_over_current_rows(api, django_user_model, customers):
+    api.force_authenticate(django_user_model.objects.create_user("u", password="p"))
+    r = api.post("/api/v1/entities/query", {"where": QUERY}, format="json")
+    assert r.status_code == 200, r.content
+    assert [row["display_name"] for row in r.json()["results"]] == ["anna", "bert"]
+
+
+@pytest.mark.django_db
+def test_query_as_of_uses_rows_alive_at_that_time(api, django_user_model, customers):
+    t0, uids = customers
+    t1 = t0 + timedelta(days=1)
+    update_entity_detail(
+        entity_uid=uids["bert"], detail_code="CHURNED", value_json=True, change_ts=t1
+    )
+    close_entity_detail(entity_uid=uids["emil"], detail_code="CHURNED", change_ts=t1)
+    api.force_authenticate(django_user_model.objects.create_user("u", password="p"))
+
+    def names(body):
+        r = api.post("/api/v1/entities/query", body, format="json")
+        assert r.status_code == 200, r.content
+        return sorted(row["display_name"] for row in r.json()["results"])
+
+    assert names({"where": QUERY}) == ["anna", "emil"]
+    before = (t0 + timedelta(hours=1)).isoformat()
+    assert names({"where": QUERY, "as_of": before}) == ["anna", "bert"]
+    r = api.post("/api/v1/entities/query", {"where": QUERY, "as_of": before}, format="json")
+    assert r.json()["results"][0]["details"] == {"EMAIL": "a@x.de", "COUNTRY": "DE"}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "where",
+    [{}, {"and": []}, {"bogus": 1}, {"field": "hashdiff", "value": "x"}, {"detail": "X"}],
+)
+def test_malformed_queries_are_rejected(api, django_user_model, where):
+    api.force_authenticate(django_user_model.objects.create_user("u", password="p"))
+    r = api.post("/api/v1/entities/query", {"where": where}, format="json")
+    assert r.status_code == 400
+
+
+def test_node_limit():
+    with pytest.raises(QueryError):
+        compile_query({"or": [{"has": "X"}] * 200})
+
+
+def test_compiles_to_one_statement_of_exists_semi_joins():
+    sql, _ = _pg_sql(compile_query(QUERY))
+    assert sql.count("EXISTS(") == 4
+    assert "NOT EXISTS(" in sql or "NOT (EXISTS(" in sql
+    assert " IN (SELECT" not in sql
+
+
+@pytest.mark.django_db
+def test_explain_sqlite_probes_detail_index(customers):
+    if connection.vendor != "sqlite":
+        pytest.skip("SQLite query plan")
+    plan = compile_query(QUERY).explain()
+    assert plan.count("SEARCH U0 USING INDEX") == 4
+    assert "SCAN U0" not in plan
+
+
+@pytest.mark.pg_only
+@pytest.mark.django_db
+def test_explain_postgresql_uses_index_scans(customers):
+    if connection.vendor != "postgresql":
+        pytest.skip("PostgreSQL query plan")
+    plan = compile_query(QUERY).explain()
+    assert "Index Scan" in plan or "Index Only Scan" in plan or "Bitmap Index Scan" in plan
+    assert "Seq Scan on entity_detail" not in plan
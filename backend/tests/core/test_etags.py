@@ -0,0 +1,46 @@
+import uuid
+
+import pytest
+from django.utils import timezone
+
+from apps.core.services.scd2 import update_entity, update_entity_detail
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def entity_uid(person_type):
+    uid = uuid.uuid4()
+    update_entity(entity_uid=uid, display_name="Eve", entity_type="PERSON")
+    update_entity_detail(entity_uid=uid, detail_code="EMAIL", value_json="eve@ex.com")
+    return uid
+
+
+@pytest.mark.parametrize("suffix", ["", "/details", "/history"])
+def test_conditional_get_returns_304_until_write(api, entity_uid, suffix):
+    url = f"/api/v1/entities/{entity_uid}{suffix}"
+    r = api.get(url)
+    assert r.status_code == 200
+    etag = r["ETag"]
+
+    r = api.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 304
+    assert r["ETag"] == etag
+    assert not r.content
+
+    update_entity_detail(
+        entity_uid=entity_uid,
+        detail_code="EMAIL",
+        value_json="eve2@ex.com",
+        change_ts=timezone.now(),
+    )
+    r = api.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 200
+    assert r["ETag"] != etag
+
+
+def test_noop_write_keeps_validator(api, entity_uid):
+    url = f"/api/v1/entities/{entity_uid}"
+    etag = api.get(url)["ETag"]
+    update_entity(entity_uid=entity_uid, display_name="Eve", entity_type="PERSON")
+    assert api.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
@@ -0,0 +1,66 @@
+import uuid
+
+import pytest
+from django.db import connection
+from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.fieldsets import Fieldset, parse_fieldset
+from apps.core.models import Entity
+from apps.core.serializers import EntitySnapshotSerializer
+from apps.core.services.scd2 import update_entity, update_entity_detail
+
+
+def test_parse_fieldset():
+    assert parse_fieldset(QueryDict("")) == Fieldset()
+    fs = parse_fieldset(QueryDict("fields=entity_uid,display_name&include=details:EMAIL,PHONE"))
+    assert fs.fields == {"entity_uid", "display_name", "details"}
+    assert fs.detail_codes == ("EMAIL", "PHONE")
+    assert not parse_fieldset(QueryDict("fields=display_name")).wants_details
+    with pytest.raises(ValueError):
+        parse_fieldset(QueryDict("fields=hashdiff"))
+    with pytest.raises(ValueError):
+        parse_fieldset(QueryDict("include=history"))
+
+
+@pytest.fixture
+def anna(db, person_type):
+    uid = uuid.uuid4()
+    update_entity(entity_uid=uid, display_name="Anna", entity_type="PERSON")
+    for code, value in {"EMAIL": "a@x", "PHONE": "1", "FAX": "2"}.items():
+        update_entity_detail(entity_uid=uid, detail_code=code, value_json=value)
+    return uid
+
+
+@pytest.mark.django_db
+def test_list_without_details_does_not_read_them(api, anna):
+    with CaptureQueriesContext(connection) as ctx:
+        r = api.get("/api/v1/entities", {"fields": "entity_uid,display_name"})
+    assert r.json() == [{"entity_uid": str(anna), "display_name": "Anna"}]
+    assert all('"details"' not in q["sql"] for q in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_list_and_item_restrict_detail_codes(api, anna):
+    r = api.get("/api/v1/entities", {"include": "details:EMAIL,PHONE,NOPE"})
+    assert r.json()[0]["details"] == {"EMAIL": "a@x", "PHONE": "1"}
+    assert r.json()[0]["display_name"] == "Anna"
+
+    r = api.get(f"/api/v1/entities/{anna}", {"fields": "display_name", "include": "details:FAX"})
+    assert r.json() == {"display_name": "Anna", "details": {"FAX": "2"}}
+    assert api.get("/api/v1/entities", {"fields": "nope"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_snapshot_serializer_skips_or_narrows_detail_query(anna, django_assert_num_queries):
+    entity = Entity.objects.get(entity_uid=anna, is_current=True)
+    with django_assert_num_queries(0):
+        data = EntitySnapshotSerializer(
+            entity, context={"fieldset": Fieldset(frozenset({"display_name"}))}
+        ).data
+    assert data == {"display_name": "Anna"}
+
+    data = EntitySnapshotSerializer(
+        entity, context={"fieldset": Fieldset(detail_codes=("PHONE",))}
+    ).data
+    assert data["details"] == {"PHONE": "1"}
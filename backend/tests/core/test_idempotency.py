@@ -0,0 +1,105 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.core import views
+from apps.core.models import ChangeEvent, EntityDetail, IdempotencyKey
+from apps.core.services.scd2 import BatchConflict
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def authed(api, django_user_model):
+    api.force_authenticate(django_user_model.objects.create_user("retry", password="x"))
+    return api
+
+
+def _create(api, uid, key, name="Ada", **extra):
+    body = {"entity_uid": str(uid), "display_name": name, "entity_type": "PERSON", **extra}
+    return api.post("/api/v1/entities", body, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+
+def test_retry_replays_stored_response_without_writing(
+    authed, person_type, django_assert_max_num_queries
+):
+    uid = uuid.uuid4()
+    first = _create(authed, uid, "k-1")
+    assert first.status_code == 201
+    events = ChangeEvent.objects.count()
+
+    with django_assert_max_num_queries(4):
+        again = _create(authed, uid, "k-1")
+    assert again.status_code == 201
+    assert again.json() == first.json()
+    assert again["Idempotent-Replayed"] == "true"
+    assert ChangeEvent.objects.count() == events
+
+
+def test_key_reused_with_different_body_is_rejected(authed, person_type):
+    uid = uuid.uuid4()
+    assert _create(authed, uid, "k-2").status_code == 201
+    r = _create(authed, uid, "k-2", name="Grace")
+    assert r.status_code == 422
+
+
+def test_in_flight_and_expired_keys(authed, person_type, django_user_model):
+    uid = uuid.uuid4()
+    owner = str(django_user_model.objects.get(username="retry").pk)
+    now = timezone.now()
+    first = _create(authed, uid, "k-3")
+    fingerprint = IdempotencyKey.objects.get(key="k-3").fingerprint
+
+    IdempotencyKey.objects.create(
+        owner=owner, key="busy", fingerprint=fingerprint, expires_at=now + timedelta(hours=1)
+    )
+    assert _create(authed, uid, "busy").status_code == 409
+
+    IdempotencyKey.objects.filter(key="k-3").update(expires_at=now - timedelta(seconds=1))
+    r = _create(authed, uid, "k-3")
+    assert r.status_code == 201
+    assert "Idempotent-Replayed" not in r
+    assert r.json()["entity"]["status"] == "noop"
+    assert first.json()["entity"]["status"] == "created"
+
+    IdempotencyKey.objects.filter(key="k-3").update(expires_at=now - timedelta(seconds=1))
+    call_command("purge_idempotency_keys")
+    assert not IdempotencyKey.objects.filter(key="k-3").exists()
+
+
+def test_validation_errors_are_not_stored(authed, person_type):
+    uid = uuid.uuid4()
+    url = f"/api/v1/entities/{uid}/details"
+    r = authed.post(url, [{"detail_code": "EMAIL"}], format="json", HTTP_IDEMPOTENCY_KEY="k-4")
+    assert r.status_code == 400
+    assert not IdempotencyKey.objects.filter(key="k-4").exists()
+
+    body = [{"detail_code": "EMAIL", "value_json": "a@x"}]
+    for _ in range(2):
+        r = authed.post(url, body, format="json", HTTP_IDEMPOTENCY_KEY="k-5")
+        assert r.status_code == 201
+    assert EntityDetail.objects.filter(entity_uid=uid).count() == 1
+
+
+def test_conflicts_are_not_stored(authed, person_type, monkeypatch):
+    apply = views.apply_entity_changes
+    attempts = []
+
+    def conflict_once(**kwargs):
+        attempts.append(kwargs["entity_uid"])
+        if len(attempts) == 1:
+            raise BatchConflict("concurrent writers kept conflicting")
+        return apply(**kwargs)
+
+    monkeypatch.setattr(views, "apply_entity_changes", conflict_once)
+    uid = uuid.uuid4()
+    assert _create(authed, uid, "k-6").status_code == 409
+    assert not IdempotencyKey.objects.filter(key="k-6").exists()
+
+    r = _create(authed, uid, "k-6")
+    assert r.status_code == 201
+    assert "Idempotent-Replayed" not in r
+    assert len(attempts) == 2
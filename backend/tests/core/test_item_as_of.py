@@ -0,0 +1,95 @@
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from django.db import connection
+
+from apps.core.services.asof import _detail_rows, details_at, entity_at
+from apps.core.services.scd2 import (
+    close_entity_detail,
+    update_entity,
+    update_entity_detail,
+)
+
+pytestmark = pytest.mark.django_db
+
+T0 = datetime(2025, 1, 1, 12, tzinfo=dt_timezone.utc)
+H = timedelta(hours=1)
+
+
+@pytest.fixture
+def uid(person_type):
+    uid = uuid.uuid4()
+    update_entity(entity_uid=uid, display_name="v0", entity_type="PERSON", change_ts=T0)
+    for i in range(1, 20):
+        update_entity(
+            entity_uid=uid, display_name=f"v{i}", entity_type="PERSON", change_ts=T0 + i * H
+        )
+        update_entity_detail(
+            entity_uid=uid, detail_code="EMAIL", value_json=f"e{i}@x", change_ts=T0 + i * H
+        )
+    update_entity_detail(
+        entity_uid=uid, detail_code="PHONE", value_json="123", change_ts=T0 + 2 * H
+    )
+    close_entity_detail(entity_uid=uid, detail_code="PHONE", change_ts=T0 + 5 * H)
+    return uid
+
+
+def test_entity_at_picks_the_version_alive_at_as_of(uid, django_assert_num_queries):
+    with django_assert_num_queries(2):
+        state = entity_at(uid, T0 + 3 * H + timedelta(minutes=30))
+    assert state["display_name"] == "v3"
+    assert state["is_current"] is False
+    assert state["details"] == {"EMAIL": "e3@x", "PHONE": "123"}
+
+    assert entity_at(uid, T0 - H) is None
+    assert entity_at(uid, T0 + 30 * H)["is_current"] is True
+
+
+def test_closed_detail_drops_out(uid):
+    assert details_at(uid, T0 + 6 * H) == {"EMAIL": "e6@x"}
+    assert details_at(uid, T0 + 4 * H, detail_code="PHONE") == {"PHONE": "123"}
+    assert details_at(uid, T0 + 6 * H, detail_code="PHONE") == {}
+
+
+def test_item_endpoints_accept_as_of(api, uid):
+    as_of = (T0 + 4 * H).isoformat()
+    base = f"/api/v1/entities/{uid}"
+
+    r = api.get(base, {"as_of": as_of, "fields": "display_name,details"})
+    assert r.status_code == 200
+    assert r.json() == {"display_name": "v4", "details": {"EMAIL": "e4@x", "PHONE": "123"}}
+
+    assert api.get(f"{base}/details", {"as_of": as_of}).json() == {"EMAIL": "e4@x", "PHONE": "123"}
+
+    r = api.get(f"{base}/details/PHONE", {"as_of": as_of})
+    assert r.json() == {"detail_code": "PHONE", "value_json": "123"}
+    assert api.get(f"{base}/details/PHONE").status_code == 404
+
+    assert api.get(base, {"as_of": (T0 - H).isoformat()}).status_code == 404
+    assert api.get(base, {"as_of": "yesterday"}).status_code == 400
+    assert api.get(f"{base}/details/PHONE", {"as_of": "yesterday"}).status_code == 400
+
+
+def test_codes_opened_after_as_of_are_skipped(uid):
+    assert details_at(uid, T0 + H + timedelta(minutes=30)) == {"EMAIL": "e1@x"}
+    assert details_at(uid, T0 + timedelta(minutes=30)) == {}
+    assert details_at(uuid.uuid4(), T0 + 6 * H) == {}
+
+
+def test_explain_sqlite_probes_details_per_code(uid):
+    if connection.vendor != "sqlite":
+        pytest.skip("SQLite query plan")
+    plan = _detail_rows(uid, T0 + 6 * H, None).explain()
+    assert "USING COVERING INDEX entity_deta_entity__b35e2e_idx" in plan
+    assert "SCAN entity_detail" not in plan
+
+
+@pytest.mark.pg_only
+def test_explain_postgresql_probes_details_per_code(uid):
+    if connection.vendor != "postgresql":
+        pytest.skip("PostgreSQL query plan")
+    plan = _detail_rows(uid, T0 + 6 * H, None).explain()
+    assert "Recursive Union" in plan
+    assert "entity_deta_entity__b35e2e_idx" in plan
+    assert "Seq Scan on entity_detail" not in plan
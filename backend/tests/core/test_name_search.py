@@ -0,0 +1,58 @@
+import uuid
+
+import pytest
+from django.db.backends.postgresql.base import DatabaseWrapper
+
+from apps.core.models import EntityCurrent
+from apps.core.search import similarity
+from apps.core.services.scd2 import update_entity
+
+pytestmark = pytest.mark.django_db
+
+
+def _pg_sql(queryset):
+    conn = DatabaseWrapper({"NAME": "x", "OPTIONS": {}, "TIME_ZONE": None}, alias="pg")
+    sql, params = queryset.query.get_compiler(connection=conn).as_sql()
+    return sql, params
+
+
+@pytest.fixture
+def names(person_type):
+    for name in ["Johanna Schmidt", "John Smith", "Jon Smyth", "Alice Jones"]:
+        update_entity(entity_uid=uuid.uuid4(), display_name=name, entity_type="PERSON")
+
+
+def test_similarity_matches_pg_trgm_semantics():
+    assert similarity("word", "word") == 1.0
+    assert similarity("", "word") == 0.0
+    assert round(similarity("word", "two words"), 6) == round(4 / 11, 6)
+
+
+def test_contains_compiles_to_ilike_on_postgresql():
+    sql, params = _pg_sql(EntityCurrent.objects.filter(display_name__trgm_icontains="50%_x"))
+    assert '"entity_current"."display_name" ILIKE %s' in sql
+    assert "UPPER" not in sql
+    assert params == ("%50\\%\\_x%",)
+
+
+def test_contains_falls_back_to_icontains(api, names):
+    r = api.get("/api/v1/entities", {"q": "JOHN"})
+    assert [row["display_name"] for row in r.json()] == ["John Smith"]
+
+
+def test_fuzzy_mode_ranks_by_similarity(api, names):
+    r = api.get("/api/v1/entities", {"q": "John Smith", "match": "fuzzy"})
+    assert r.status_code == 200
+    got = [row["display_name"] for row in r.json()]
+    assert got[0] == "John Smith"
+    assert "Jon Smyth" in got
+    assert "Alice Jones" not in got
+
+    r = api.get("/api/v1/entities", {"q": "John Smith", "match": "fuzzy", "min_similarity": 0.99})
+    assert [row["display_name"] for row in r.json()] == ["John Smith"]
+
+
+def test_invalid_search_params(api, names):
+    assert api.get("/api/v1/entities", {"q": "x", "match": "regex"}).status_code == 400
+    r = api.get("/api/v1/entities", {"q": "x", "match": "fuzzy", "min_similarity": "abc"})
+    assert r.status_code == 400
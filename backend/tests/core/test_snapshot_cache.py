@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+from django.core.cache import caches
+
+from apps.core.services.scd2 import update_entity
+from apps.core.services.snapshot_cache import SnapshotCache, snapshot_cache
+
+
+@pytest.fixture
+def enabled(settings):
+    settings.ENTITY_SNAPSHOT_CACHE = {"ENABLED": True, "LRU_TTL": 60}
+    snapshot_cache.clear()
+    yield
+    snapshot_cache.clear()
+
+
+def test_lru_hit_and_invalidate(enabled):
+    cache = SnapshotCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"v": len(calls)}
+
+    assert cache.get_or_load("k", loader) == {"v": 1}
+    assert cache.get_or_load("k", loader) == {"v": 1}
+    cache.invalidate("k")
+    assert cache.get_or_load("k", loader) == {"v": 2}
+    stats = cache.stats()
+    assert stats["hits_local"] == 1
+    assert stats["misses"] == 2
+    assert stats["invalidations"] == 1
+
+
+def test_concurrent_misses_are_coalesced(enabled):
+    cache = SnapshotCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"v": 1}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("hot", loader)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"v": 1}] * 8
+    assert cache.stats()["hits_coalesced"] == 7
+
+
+def test_concurrent_async_misses_are_coalesced(enabled):
+    cache = SnapshotCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"v": 1}
+
+    async def burst():
+        return await asyncio.gather(*(cache.aget_or_load("hot", loader) for _ in range(8)))
+
+    assert asyncio.run(burst()) == [{"v": 1}] * 8
+    assert len(calls) == 1
+    assert cache.stats()["hits_coalesced"] == 7
+    assert cache._afutures == {}
+
+    async def invalidated_during_load():
+        calls.append(1)
+        cache.invalidate("hot")
+        await asyncio.sleep(0.05)
+        return {"v": "stale"}
+
+    async def racing_burst():
+        return await asyncio.gather(
+            *(cache.aget_or_load("hot", invalidated_during_load) for _ in range(3))
+        )
+
+    cache.invalidate("hot")
+    assert asyncio.run(racing_burst()) == [{"v": "stale"}] * 3
+    assert len(calls) == 4  # the leader's load went stale, so the waiters reloaded
+    assert cache.stats()["hits_coalesced"] == 7
+
+
+def test_shared_tier_serves_other_processes(settings):
+    settings.ENTITY_SNAPSHOT_CACHE = {"ENABLED": True, "SHARED_ALIAS": "default"}
+    caches["default"].clear()
+    writer, reader = SnapshotCache(), SnapshotCache()
+
+    writer.get_or_load("k", lambda: {"v": 1})
+    assert reader.get_or_load("k", lambda: pytest.fail("should hit shared tier")) == {"v": 1}
+    assert reader.stats()["hits_shared"] == 1
+
+    writer.invalidate("k")
+    assert caches["default"].get("entity-snapshot:k") is None
+
+
+def test_load_racing_another_process_write_is_never_served(settings):
+    settings.ENTITY_SNAPSHOT_CACHE = {"ENABLED": True, "SHARED_ALIAS": "default", "LRU_TTL": 60}
+    caches["default"].clear()
+    slow, writer, reader = SnapshotCache(), SnapshotCache(), SnapshotCache()
+
+    def old_read_then_commit():
+        writer.invalidate("k")  # the write commits while `slow` is still loading
+        return {"v": "old"}
+
+    assert slow.get_or_load("k", old_read_then_commit) == {"v": "old"}
+    assert caches["default"].get("entity-snapshot:k") is not None  # published, but stale
+    assert reader.get_or_load("k", lambda: {"v": "new"}) == {"v": "new"}
+    assert reader.stats()["hits_shared"] == 0
+    assert SnapshotCache().get_or_load("k", lambda: pytest.fail("fresh entry")) == {"v": "new"}
+
+
+def test_invalidation_only_discards_loads_of_that_key(enabled):
+    cache = SnapshotCache()
+
+    def load_while_invalidating(key):
+        def loader():
+            cache.invalidate("other")
+            if key == "k":
+                cache.invalidate("k")
+            return {"key": key}
+
+        return loader
+
+    cache.get_or_load("k", load_while_invalidating("k"))
+    cache.get_or_load("j", load_while_invalidating("j"))
+    assert cache.get_or_load("j", lambda: pytest.fail("should be cached")) == {"key": "j"}
+    assert cache.get_or_load("k", lambda: {"key": "k2"}) == {"key": "k2"}
+    assert cache._loads == {}
+
+
+@pytest.mark.django_db
+def test_scd2_write_invalidates_on_commit(
+    api, person_type, enabled, django_capture_on_commit_callbacks
+):
+    uid = uuid.uuid4()
+    with django_capture_on_commit_callbacks(execute=True):
+        update_entity(entity_uid=uid, display_name="Old", entity_type="PERSON")
+    assert api.get(f"/api/v1/entities/{uid}").json()["display_name"] == "Old"
+    assert api.get(f"/api/v1/entities/{uid}").json()["display_name"] == "Old"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        update_entity(entity_uid=uid, display_name="New", entity_type="PERSON")
+    assert api.get(f"/api/v1/entities/{uid}").json()["display_name"] == "New"
+    assert snapshot_cache.stats()["hits_local"] == 1
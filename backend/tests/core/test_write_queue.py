@@ -0,0 +1,149 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.audit.models import AuditLog
+from apps.core.models import EntityCurrent, EntityDetail, QueuedWrite
+from apps.core.services.scd2 import ChangeSet, DetailChange, EntityChange
+from apps.core.services.write_queue import enqueue, process_batch, purge_processed
+
+pytestmark = pytest.mark.django_db
+
+ASYNC = {"HTTP_PREFER": "respond-async"}
+
+
+@pytest.fixture
+def authed(api, django_user_model):
+    api.force_authenticate(django_user_model.objects.create_user("queuer", password="x"))
+    return api
+
+
+def test_async_post_returns_ticket_and_worker_applies_it(authed, person_type):
+    uid = uuid.uuid4()
+    body = {
+        "entity_uid": str(uid),
+        "display_name": "Ada",
+        "entity_type": "PERSON",
+        "details": [{"detail_code": "EMAIL", "value_json": "a@x"}],
+    }
+    r = authed.post("/api/v1/entities", body, format="json", **ASYNC)
+    assert r.status_code == 202
+    assert r["Preference-Applied"] == "respond-async"
+    ticket = r.json()["ticket"]
+    assert r["Location"] == f"/api/v1/writes/{ticket}"
+    assert r.json()["status"] == "pending"
+    assert not EntityCurrent.objects.filter(entity_uid=uid).exists()
+
+    r = authed.patch(f"/api/v1/entities/{uid}", {"display_name": "Ada L."}, format="json", **ASYNC)
+    assert r.status_code == 202
+    second = r.json()["ticket"]
+
+    call_command("process_write_queue", "--once")
+
+    status = authed.get(f"/api/v1/writes/{ticket}").json()
+    assert status["status"] == "applied"
+    assert status["result"]["entity"]["status"] == "created"
+    assert status["result"]["details"][0] == {
+        "detail_code": "EMAIL",
+        "status": "created",
+        "valid_from": status["result"]["details"][0]["valid_from"],
+    }
+    assert authed.get(f"/api/v1/writes/{second}").json()["result"]["entity"]["status"] == "updated"
+    doc = EntityCurrent.objects.get(entity_uid=uid)
+    assert (doc.display_name, doc.details) == ("Ada L.", {"EMAIL": "a@x"})
+    assert authed.get(f"/api/v1/writes/{uuid.uuid4()}").status_code == 404
+
+
+def test_async_request_is_validated_before_queueing(authed, person_type):
+    uid = uuid.uuid4()
+    r = authed.post(
+        f"/api/v1/entities/{uid}/details", [{"detail_code": "X"}], format="json", **ASYNC
+    )
+    assert r.status_code == 400
+    assert not QueuedWrite.objects.exists()
+
+
+def test_worker_keeps_per_entity_order_and_isolates_failures(person_type):
+    a, b = uuid.uuid4(), uuid.uuid4()
+    t0 = timezone.now() - timedelta(hours=1)
+    writes = [
+        enqueue(ChangeSet(a, EntityChange("A", "PERSON", t0))),
+        enqueue(ChangeSet(b, EntityChange("B", "NOPE", t0))),
+        enqueue(ChangeSet(a, details=[DetailChange("EMAIL", "1", t0 + timedelta(minutes=1))])),
+        enqueue(ChangeSet(a, details=[DetailChange("EMAIL", "2", t0 + timedelta(minutes=2))])),
+        enqueue(ChangeSet(b, EntityChange("B", "PERSON", t0))),
+    ]
+
+    assert process_batch(batch_size=10) == 5
+    statuses = [QueuedWrite.objects.get(pk=w.pk).status for w in writes]
+    assert statuses == ["applied", "failed", "applied", "applied", "applied"]
+    assert QueuedWrite.objects.get(pk=writes[1].pk).error == "invalid entity_type"
+    emails = EntityDetail.objects.filter(entity_uid=a, detail_code="EMAIL").order_by("valid_from")
+    assert [(d.value_json, d.is_current) for d in emails] == [("1", False), ("2", True)]
+    assert EntityCurrent.objects.get(entity_uid=b).display_name == "B"
+
+    QueuedWrite.objects.update(processed_at=timezone.now() - timedelta(days=30))
+    assert purge_processed(retention_days=7) == 5
+
+
+def test_small_batches_claim_only_heads(person_type):
+    a = uuid.uuid4()
+    first = enqueue(ChangeSet(a, EntityChange("A", "PERSON")))
+    enqueue(ChangeSet(a, EntityChange("A2", "PERSON")))
+    assert process_batch(batch_size=1) == 1
+    assert QueuedWrite.objects.get(pk=first.pk).status == "applied"
+    assert EntityCurrent.objects.get(entity_uid=a).display_name == "A"
+    assert process_batch(batch_size=1) == 1
+    assert EntityCurrent.objects.get(entity_uid=a).display_name == "A2"
+    assert process_batch(batch_size=1) == 0
+
+
+def test_coalescing_window_keeps_only_last_state(settings, person_type):
+    settings.WRITE_COALESCING = {"DETAIL_CODES": {"LOCATION": 60}, "ENTITY_TYPES": {"PERSON": 60}}
+    a = uuid.uuid4()
+    writes = [enqueue(ChangeSet(a, EntityChange("A", "PERSON")))]
+    writes += [enqueue(ChangeSet(a, details=[DetailChange("LOCATION", i)])) for i in range(5)]
+    writes.append(enqueue(ChangeSet(a, details=[DetailChange("EMAIL", "a@x")])))
+    writes.append(enqueue(ChangeSet(a, EntityChange("A2"))))
+    assert writes[0].not_before is not None
+
+    assert process_batch() == 0  # still inside the window
+    QueuedWrite.objects.update(not_before=timezone.now())
+    assert process_batch() == len(writes)
+
+    rows = {w.pk: w for w in QueuedWrite.objects.all()}
+    statuses = [rows[w.pk].status for w in writes]
+    assert statuses == ["skipped"] * 5 + ["applied"] * 3
+    assert rows[writes[1].pk].result["details"] == [
+        {"detail_code": "LOCATION", "status": "skipped", "superseded_by": str(writes[2].ticket)}
+    ]
+    locations = EntityDetail.objects.filter(entity_uid=a, detail_code="LOCATION")
+    assert [d.value_json for d in locations] == [4]
+    assert EntityDetail.objects.filter(entity_uid=a, detail_code="EMAIL").count() == 1
+    doc = EntityCurrent.objects.get(entity_uid=a)
+    assert (doc.display_name, doc.entity_type_code) == ("A2", "PERSON")
+    assert rows[writes[-1].pk].result["entity"]["status"] == "created"
+    assert AuditLog.objects.filter(entity_uid=a, action="SKIP_DETAIL").count() == 4
+    assert AuditLog.objects.filter(entity_uid=a, action="SKIP_ENTITY").count() == 1
+
+
+def test_failed_survivor_does_not_swallow_superseded_writes(settings, person_type):
+    settings.WRITE_COALESCING = {"DETAIL_CODES": {"LOCATION": 60}}
+    a = uuid.uuid4()
+    writes = [
+        enqueue(ChangeSet(a, EntityChange("A", "PERSON"))),
+        enqueue(ChangeSet(a, details=[DetailChange("LOCATION", 1)])),
+        enqueue(ChangeSet(a, EntityChange("A", "NOPE"), [DetailChange("LOCATION", 2)])),
+    ]
+    QueuedWrite.objects.update(not_before=timezone.now())
+    assert process_batch() == 3
+
+    rows = {w.pk: w for w in QueuedWrite.objects.all()}
+    assert [rows[w.pk].status for w in writes] == ["applied", "applied", "failed"]
+    assert rows[writes[1].pk].result["details"][0]["status"] == "created"
+    locations = EntityDetail.objects.filter(entity_uid=a, detail_code="LOCATION")
+    assert [d.value_json for d in locations] == [1]
+    assert not AuditLog.objects.filter(entity_uid=a, action="SKIP_DETAIL").exists()